@@ -0,0 +1,81 @@
+#
+# This file is part of usb-protocol.
+#
+""" Helpers for lazily loading the contents of our packages; see PEP 562. """
+
+import importlib
+
+
+def lazy_attributes(package_name, submodules=(), attributes=None, reexport=None):
+    """ Creates module-level `__getattr__` and `__dir__` functions that load a package's contents on demand.
+
+    Parameters:
+        package_name -- The `__name__` of the package being populated.
+        submodules   -- The names of submodules that should be importable as attributes of the package.
+        attributes   -- A dictionary mapping attribute names to the (relative) module that provides them.
+        reexport     -- The name of a submodule whose public names should all be available from the
+                        package, as though the package ran `from .<reexport> import *`.
+
+    Returns a (__getattr__, __dir__) tuple, which should be assigned to those names in the package.
+    """
+
+    submodules = frozenset(submodules)
+    attributes = dict(attributes or {})
+    package    = importlib.import_module(package_name)
+
+    def _public_names(module):
+        if hasattr(module, '__all__'):
+            return list(module.__all__)
+        return [name for name in vars(module) if not name.startswith('_')]
+
+    def __getattr__(name):
+
+        # Submodules are imported on first access; which also sets them as attributes of the package.
+        if name in submodules:
+            return importlib.import_module(f".{name}", package_name)
+
+        if name in attributes:
+            value = getattr(importlib.import_module(attributes[name], package_name), name)
+
+        # Re-exported modules provide their public names, and our `__all__`, for `import *`.
+        elif (reexport is not None) and (name == '__all__'):
+            value = _public_names(importlib.import_module(f".{reexport}", package_name))
+
+        elif (reexport is not None) and not name.startswith('_'):
+            try:
+                value = getattr(importlib.import_module(f".{reexport}", package_name), name)
+            except AttributeError:
+                raise AttributeError(f"module {package_name!r} has no attribute {name!r}") from None
+
+        else:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+
+        # Cache the value on the package, so we're only consulted once per name.
+        setattr(package, name, value)
+        return value
+
+
+    def __dir__():
+        names = set(vars(package)) | submodules | set(attributes)
+
+        if reexport is not None:
+            names.update(_public_names(importlib.import_module(f".{reexport}", package_name)))
+
+        return sorted(names)
+
+    return __getattr__, __dir__
+
+
+def import_optional(module_name, feature):
+    """ Imports one of our optional dependencies, raising a helpful ImportError if it isn't installed.
+
+    Parameters:
+        module_name -- The name of the module to import; e.g. 'numpy'.
+        feature     -- A short description of the feature that needs the module; used in our error message.
+    """
+
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(f"{feature} requires {module_name}, which isn't installed; "
+            f"try `pip install usb-protocol[{module_name}]`") from e
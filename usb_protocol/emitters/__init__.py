@@ -3,5 +3,20 @@
 #
 """ USB-related emitters. """
 
-from .construct_interop    import emitter_for_format, ConstructEmitter
-from .descriptors.standard import DeviceDescriptorCollection, SuperSpeedDeviceDescriptorCollection
+from .._lazy import lazy_attributes as _lazy_attributes
+
+# The names we provide; each is only imported from its module on first use.
+_LAZY_ATTRIBUTES = {
+    'emitter_for_format':                   '.construct_interop',
+    'ConstructEmitter':                     '.construct_interop',
+    'DeviceDescriptorCollection':           '.descriptors.standard',
+    'SuperSpeedDeviceDescriptorCollection': '.descriptors.standard',
+}
+
+# Our emitters are imported on first use, so importing a single emitter module stays cheap.
+__getattr__, __dir__ = _lazy_attributes(__name__,
+    submodules = ('construct_interop', 'descriptor', 'descriptors'),
+    attributes = _LAZY_ATTRIBUTES,
+)
+
+__all__ = list(_LAZY_ATTRIBUTES)
@@ -3,10 +3,262 @@
 #
 """ Helpers for creating construct-related emitters. """
 
+import struct
+import weakref
 import unittest
 import construct
 
 
+class EmitPlan:
+    """ Precompiled builder for construct formats that have a fixed layout.
+
+    Plans resolve every constant (and constant default) ahead of time, and then build each descriptor with
+    a single `struct.Struct.pack`. They produce exactly the same bytes as construct's own builder; formats
+    whose layout they can't handle get no plan, and are always built by construct.
+    """
+
+    # Marker for fields that have no default value.
+    _REQUIRED = object()
+
+    def __init__(self, construct_format):
+        """
+        Parameters:
+            construct_format -- The format to compile. A ValueError is raised if the format can't be compiled.
+        """
+
+        layout = '<'
+
+        # The values packed for every emit; with placeholders for any values that vary.
+        self._template  = []
+
+        # (index, name, default, rebuild, encoders) for each value that's computed when emitting.
+        self._variables = []
+
+        # The (name, value) of each constant; which construct requires to match any provided value.
+        self._constants = []
+
+        # Trailing fields that are only emitted if they're provided, as (name, format character, encoders).
+        self._optional  = []
+
+        self._needs_context = False
+
+        # The (offset, format character, encoders) of each named, non-constant field; including optional ones.
+        self.field_layout = {}
+
+        for subcon in construct_format.subcons:
+            name    = subcon.name
+            default = self._REQUIRED
+            rebuild = None
+
+            encoders = []
+            optional = False
+
+            # Peel back the layers around each field, noting anything that affects how it's built.
+            while True:
+
+                if isinstance(subcon, construct.Renamed):
+                    subcon = subcon.subcon
+
+                elif isinstance(subcon, construct.Const):
+
+                    # Constants are always emitted as-is; so we can build them right away.
+                    try:
+                        data = subcon.build(None)
+                    except Exception as e:
+                        raise ValueError(f"can't pre-build constant field {name}") from e
+
+                    if name:
+                        self._constants.append((name, subcon.value))
+
+                    subcon, format_character, value = None, f"{len(data)}s", data
+                    break
+
+                elif isinstance(subcon, construct.Default) and (default is self._REQUIRED) and not optional:
+                    default = subcon.value
+                    self._needs_context |= callable(default)
+                    subcon  = subcon.subcon
+
+                elif isinstance(subcon, construct.Rebuild) and not optional:
+                    rebuild = subcon.func
+                    self._needs_context |= callable(rebuild)
+                    subcon  = subcon.subcon
+
+                # Optional fields are Selects between the field and Pass.
+                elif isinstance(subcon, construct.Select) and len(subcon.subcons) == 2 and (subcon.subcons[1] is construct.Pass):
+                    optional = True
+                    subcon   = subcon.subcons[0]
+
+                elif isinstance(subcon, construct.Adapter):
+                    encoders.append(subcon)
+                    subcon = subcon.subcon
+
+                elif isinstance(subcon, construct.FormatField) and subcon.fmtstr[0] in '<=':
+                    format_character, value = subcon.fmtstr[1:], None
+                    break
+
+                else:
+                    raise ValueError(f"field {name} doesn't have a fixed layout")
+
+            # Optional constants are always emitted; but any other optional field must come at the end.
+            if optional and (subcon is not None):
+                if default is not self._REQUIRED or rebuild is not None or not name:
+                    raise ValueError(f"optional field {name} can't be compiled")
+
+                offset = struct.calcsize(layout + ''.join(character for _, character, _ in self._optional))
+                self.field_layout[name] = (offset, format_character, tuple(encoders))
+
+                self._optional.append((name, format_character, tuple(encoders)))
+                continue
+            elif self._optional:
+                raise ValueError("only trailing fields can be optional")
+
+            if (subcon is not None) and not name:
+                raise ValueError("unnamed fields can't be compiled")
+
+            if subcon is not None:
+                self._variables.append((len(self._template), name, default, rebuild, tuple(encoders)))
+                self.field_layout[name] = (struct.calcsize(layout), format_character, tuple(encoders))
+
+            self._template.append(value)
+            layout += format_character
+
+        # Create a Struct for each number of optional fields we might emit.
+        self._structs = [struct.Struct(layout)]
+        for _, format_character, _ in self._optional:
+            layout += format_character
+            self._structs.append(struct.Struct(layout))
+
+
+    def build(self, fields):
+        """ Builds a descriptor from a dictionary of fields. Raises an exception if this can't be done exactly as construct would. """
+        layout, values = self._pack_arguments(fields)
+        return layout.pack(*values)
+
+
+    def build_into(self, fields, buffer, offset=0):
+        """ Builds a descriptor directly into a writable buffer; returning the offset just past the descriptor. """
+        layout, values = self._pack_arguments(fields)
+        layout.pack_into(buffer, offset, *values)
+        return offset + layout.size
+
+
+    def _pack_arguments(self, fields):
+        """ Returns the Struct and values that should be packed to build a descriptor from the given fields. """
+
+        # Construct won't allow anyone to override a constant.
+        for name, value in self._constants:
+            if name in fields and fields[name] not in (None, value):
+                raise construct.ConstError(f"building expected None or {value!r} but got {fields[name]!r}")
+
+        # Only create a context if something needs to be computed from our other fields.
+        context = construct.Container(fields) if self._needs_context else None
+
+        values = self._template.copy()
+        for index, name, default, rebuild, encoders in self._variables:
+
+            if rebuild is not None:
+                value = rebuild(context) if callable(rebuild) else rebuild
+            else:
+                value = fields.get(name)
+
+                if value is None:
+                    if default is self._REQUIRED:
+                        raise KeyError(name)
+                    value = default(context) if callable(default) else default
+
+            if context is not None:
+                context[name] = value
+
+            for encoder in encoders:
+                value = encoder._encode(value, context, "(building)")
+
+            values[index] = value
+
+        # Add in any optional fields we've been given.
+        for name, _, encoders in self._optional:
+            value = fields.get(name)
+            if value is None:
+                break
+
+            for encoder in encoders:
+                value = encoder._encode(value, context, "(building)")
+            values.append(value)
+
+        # Construct would skip over a missing optional field, and still emit the ones after it; which our layouts can't express.
+        provided = len(values) - len(self._template)
+        if any(fields.get(name) is not None for name, _, _ in self._optional[provided:]):
+            raise ValueError("optional fields can only be omitted from the end of a descriptor")
+
+        return self._structs[provided], values
+
+
+def write_into(buffer, offset, data):
+    """ Copies already-emitted bytes into a buffer at the given offset; returning the offset just past them.
+
+    Unlike a plain slice assignment, this never resizes a bytearray; a ValueError is raised if the data doesn't fit.
+    """
+
+    end = offset + len(data)
+    if end > len(buffer):
+        raise ValueError(f"buffer of {len(buffer)} bytes is too small to hold {len(data)} bytes at offset {offset}")
+
+    buffer[offset:end] = data
+    return end
+
+
+# Emit plans for each format we've seen; or None, if a format can't be compiled.
+_emit_plans = weakref.WeakKeyDictionary()
+
+def get_emit_plan(construct_format):
+    """ Returns the (cached) EmitPlan for a format; or None if the format can't be emitted with a plan. """
+
+    try:
+        return _emit_plans[construct_format]
+    except KeyError:
+        pass
+
+    try:
+        plan = EmitPlan(construct_format)
+    except ValueError:
+        plan = None
+
+    _emit_plans[construct_format] = plan
+    return plan
+
+
+# The fixed size of each format we've seen.
+_format_sizes = weakref.WeakKeyDictionary()
+
+def get_format_size(construct_format):
+    """ Returns the (cached) result of a format's `sizeof()`; which construct computes anew on every call. """
+
+    try:
+        return _format_sizes[construct_format]
+    except KeyError:
+        pass
+
+    size = construct_format.sizeof()
+    _format_sizes[construct_format] = size
+    return size
+
+
+# The names of the fields in each format we've seen; shared by every emitter for that format.
+_field_names = weakref.WeakKeyDictionary()
+
+def get_field_names(construct_format):
+    """ Returns a (cached) frozenset containing the name of each field in a format. """
+
+    try:
+        return _field_names[construct_format]
+    except KeyError:
+        pass
+
+    names = frozenset(subcon.name for subcon in construct_format.subcons if subcon.name)
+    _field_names[construct_format] = names
+    return names
+
+
+
 class ConstructEmitter:
     """ Class that creates a simple emitter based on a construct struct.
 
@@ -29,15 +281,33 @@ class ConstructEmitter:
         emitter.b = 0xcd
         my_bytes  = emitter.emit() # "\xab\xcd"
 
+    Fields can also be provided all at once, either when creating the emitter or via `update`:
+
+    .. code-block:: python
+
+        emitter  = ConstructEmitter(MyStruct, a=0xab)
+        emitter.update(b=0xcd)
+
+    Emitted bytes are cached until a field is changed; and if this emitter is a subordinate of others,
+    changing a field also invalidates each of its parents' bytes.
     """
 
-    def __init__(self, struct):
+    def __init__(self, struct, **fields):
         """
         Parameters:
             construct_format -- The format for which to create an emitter.
+            **fields         -- Initial values for any of the format's fields.
         """
         self.__dict__['format'] = struct
         self.__dict__['fields'] = {}
+        self.__dict__['_field_names'] = get_field_names(struct)
+
+        # Our most recently emitted bytes, if they're still valid; and the emitters we're a subordinate of.
+        self.__dict__['_emitted'] = None
+        self.__dict__['_parents'] = []
+
+        if fields:
+            self.update(**fields)
 
 
     def _format_contains_field(self, field_name):
@@ -47,7 +317,38 @@ class ConstructEmitter:
             format_object -- The Construct format to work with. This includes e.g. most descriptor types.
             field_name    -- The field name to query.
         """
-        return any(f.name == field_name for f in self.format.subcons)
+        return field_name in self._field_names
+
+
+    def update(self, **fields):
+        """ Sets several fields at once. If any field isn't part of our format, no fields are set.
+
+        Parameters:
+            **fields -- The values of the fields to set.
+        """
+
+        unknown = fields.keys() - self._field_names
+        if unknown:
+            raise AttributeError(f"emitter specification contains no field(s) {', '.join(sorted(unknown))}")
+
+        self.fields.update(fields)
+        self.invalidate()
+
+
+    def invalidate(self):
+        """ Discards our cached emitted bytes, and those of any emitters we're a subordinate of.
+
+        This happens automatically whenever a field is set; but should be called after modifying a
+        field's value in place (e.g. appending to a list), or after modifying `fields` directly.
+        """
+
+        # If an emitter is already invalid, its parents must be, too; so we can stop at any invalid emitter.
+        pending = [self]
+        while pending:
+            emitter = pending.pop()
+            if emitter._emitted is not None:
+                emitter._emitted = None
+                pending.extend(emitter._parents)
 
 
     def __setattr__(self, name, value):
@@ -62,17 +363,68 @@ class ConstructEmitter:
             raise AttributeError(f"emitter specification contains no field {name}")
 
         self.fields[name] = value
+        self.invalidate()
 
 
     def emit(self):
         """ Emits the stream of bytes associated with this object. """
 
+        if self._emitted is None:
+            self._emitted = self._build()
+
+        return self._emitted
+
+
+    def _build(self):
+        """ Builds this object's own bytes from its fields. """
+
+        # If we have a compiled plan for our format, use it...
+        plan = get_emit_plan(self.format)
+        if plan is not None:
+            try:
+                return plan.build(self.fields)
+
+            # ... falling back to construct if anything goes wrong; so any errors are reported exactly as construct would.
+            except Exception: # pylint: disable=broad-except
+                pass
+
         try:
             return self.format.build(self.fields)
         except KeyError as e:
             raise KeyError(f"missing necessary field: {e}")
 
 
+    def emit_into(self, buffer, offset=0):
+        """ Emits this object directly into a writable buffer, such as a bytearray or memoryview.
+
+        Parameters:
+            buffer -- The buffer to write into. It must be large enough to hold the emitted bytes.
+            offset -- The offset in the buffer at which to start writing.
+
+        Returns the offset just past the emitted bytes.
+        """
+
+        if self._emitted is not None:
+            return write_into(buffer, offset, self._emitted)
+
+        return self._build_into(buffer, offset)
+
+
+    def _build_into(self, buffer, offset):
+        """ Builds this object's own bytes from its fields, directly into a buffer. """
+
+        # If we can, pack our fields straight into the buffer...
+        plan = get_emit_plan(self.format)
+        if plan is not None:
+            try:
+                return plan.build_into(self.fields, buffer, offset)
+            except Exception: # pylint: disable=broad-except
+                pass
+
+        # ... otherwise, build them as usual and copy them in.
+        return write_into(buffer, offset, self._build())
+
+
     def __getattr__(self, name):
         """ Retrieves an emitter field, if possible. """
 
@@ -101,8 +453,8 @@ class ConstructEmitterTest(unittest.TestCase):
 def emitter_for_format(construct_format):
     """ Creates a factory method for the relevant construct format. """
 
-    def _factory():
-        return ConstructEmitter(construct_format)
+    def _factory(**fields):
+        return ConstructEmitter(construct_format, **fields)
 
     return _factory
 
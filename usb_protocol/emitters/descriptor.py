@@ -5,34 +5,42 @@
 
 from collections import defaultdict
 
-from . import ConstructEmitter
+from .construct_interop import ConstructEmitter, write_into
 
 from ..types.descriptor import DescriptorFormat
 
 class ComplexDescriptorEmitter(ConstructEmitter):
-    """ Base class for emitting complex descriptors, which contain nested subordinates. """
+    """ Base class for emitting complex descriptors, which contain nested subordinates.
+
+    Subordinates added as emitters are kept live: changing one of their fields invalidates our emitted
+    bytes, and our next emission re-emits only the subordinates that have changed.
+    """
 
     # Base classes must override this.
     DESCRIPTOR_FORMAT: DescriptorFormat
 
-    def __init__(self, collection=None):
+    def __init__(self, collection=None, **fields):
         """
         Parameters:
             collection -- If this descriptor belongs to a collection, it should be
                           provided here. Using a collection object allows e.g. automatic
                           assignment of string descriptor indices.
+            **fields   -- Initial values for any of the descriptor's fields.
         """
 
         self._collection = collection
 
         # Always create a basic ConstructEmitter from the given format.
-        super().__init__(self.DESCRIPTOR_FORMAT)
+        super().__init__(self.DESCRIPTOR_FORMAT, **fields)
 
         # Store a list of subordinate descriptors, and a count of
         # subordinate descriptor types.
         self._subordinates = []
         self._type_counts = defaultdict(int)
 
+        # Track any subordinates that are emitters, as (position, emitter) pairs; so we can re-emit them.
+        self._live_subordinates = []
+
 
     def add_subordinate_descriptor(self, subordinate):
         """ Adds a subordinate descriptor to the relevant descriptor.
@@ -43,6 +51,13 @@ class ComplexDescriptorEmitter(ConstructEmitter):
         """
 
         if hasattr(subordinate, 'emit'):
+
+            # If this is one of our emitters, keep it live, so any changes to it are reflected in our bytes.
+            if isinstance(subordinate, ConstructEmitter):
+                if not any(parent is self for parent in subordinate._parents):
+                    subordinate._parents.append(self)
+                self._live_subordinates.append((len(self._subordinates), subordinate))
+
             subordinate = subordinate.emit()
         else:
             subordinate = bytes(subordinate)
@@ -55,6 +70,14 @@ class ComplexDescriptorEmitter(ConstructEmitter):
 
         # ... and add the relevant bytes to our list of subordinates.
         self._subordinates.append(subordinate)
+        self.invalidate()
+
+
+    def _refresh_subordinates(self):
+        """ Updates the bytes of each of our live subordinates; which only re-emits those that have changed. """
+
+        for position, subordinate in self._live_subordinates:
+            self._subordinates[position] = subordinate.emit()
 
 
     def _pre_emit(self):
@@ -69,17 +92,52 @@ class ComplexDescriptorEmitter(ConstructEmitter):
             include_subordinates -- If true or not provided, any subordinate descriptors will be included.
         """
 
-        # Run any pre-emit hook code before we perform our emission...
+        # If nothing's changed since our last emission, we can re-use it.
+        if include_subordinates and (self._emitted is not None):
+            return self._emitted
+
+        # Run any pre-emit hook code before we perform our emission; which may need up-to-date subordinates...
+        self._refresh_subordinates()
         self._pre_emit()
 
         # Start with our core descriptor...
-        result = bytearray()
-        result.extend(super().emit())
+        result = self._build()
+
+        # ... and if desired, add our subordinates; joining everything with a single copy.
+        if include_subordinates:
+            if self._subordinates:
+                result = b"".join([result, *self._subordinates])
+
+            self._emitted = result
+
+        return result
+
+
+    def emit_into(self, buffer, offset=0, include_subordinates=True):
+        """ Emits our descriptor directly into a writable buffer, such as a bytearray or memoryview.
+
+        Parameters:
+            buffer               -- The buffer to write into. It must be large enough to hold the emitted bytes.
+            offset               -- The offset in the buffer at which to start writing.
+            include_subordinates -- If true or not provided, any subordinate descriptors will be included.
+
+        Returns the offset just past the emitted bytes.
+        """
+
+        if include_subordinates and (self._emitted is not None):
+            return write_into(buffer, offset, self._emitted)
+
+        self._refresh_subordinates()
+        self._pre_emit()
+
+        # Write our core descriptor...
+        offset = self._build_into(buffer, offset)
 
-        # ... and if descired, add our subordinates...
-        for sub in self._subordinates:
-            result.extend(sub)
+        # ... followed by each of our subordinates.
+        if include_subordinates:
+            for sub in self._subordinates:
+                offset = write_into(buffer, offset, sub)
 
-        return bytes(result)
+        return offset
 
 
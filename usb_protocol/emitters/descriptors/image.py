@@ -0,0 +1,222 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+A compact binary image format for finished descriptor collections; which can be memory-mapped, and
+queried without parsing or copying its contents.
+
+.. code-block:: python
+
+    collection.export_image("personality.bin")
+
+    with DeviceDescriptorCollection.load_image("personality.bin") as image:
+        device_descriptor = image.get_descriptor_bytes(StandardDescriptorNumbers.DEVICE)
+
+Images consist of a header, a table of entries sorted by key, and a single data region:
+
+    header -- magic (4 bytes, b"UDSC"), format version (u16), collection kind (u16), entry count (u32)
+              and the offset of the data region (u32).
+    table  -- one entry per descriptor: key (u32), data offset (u32) and data length (u32).
+    data   -- the descriptors themselves; with identical descriptors stored only once.
+
+All values are little endian. Each key packs a (descriptor type, index, language ID) triple as
+`type << 24 | index << 16 | langid`. String descriptors other than the language descriptor are keyed by
+each of the collection's language IDs; all other descriptors use a language ID of zero. Microsoft OS 1.0
+descriptors are keyed by a type and index of zero, with their feature index (wIndex) in the place of the
+language ID.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import sys
+
+
+class DescriptorImageKind:
+    """ The kinds of collection an image can contain. """
+
+    STANDARD        = 0
+    MICROSOFT_OS_10 = 1
+
+
+# The layout of our header and table entries.
+_HEADER = struct.Struct("<4sHHII")
+_ENTRY  = struct.Struct("<III")
+
+_MAGIC   = b"UDSC"
+_VERSION = 1
+
+
+def _pack_key(descriptor_type, index, langid):
+    """ Packs a (type, index, langid) triple into a table key. """
+    return (descriptor_type << 24) | (index << 16) | langid
+
+
+def build_image(entries, kind=DescriptorImageKind.STANDARD):
+    """ Builds a binary descriptor image.
+
+    Parameters:
+        entries -- An iterable of ((descriptor type, index, langid), descriptor bytes) pairs.
+        kind    -- The DescriptorImageKind of the collection the descriptors came from.
+
+    Returns the image, as bytes.
+    """
+
+    data_offsets = {}
+    data         = bytearray()
+    table        = {}
+
+    for (descriptor_type, index, langid), descriptor in entries:
+        descriptor = bytes(descriptor)
+
+        # Store each distinct descriptor only once.
+        offset = data_offsets.get(descriptor)
+        if offset is None:
+            offset = data_offsets[descriptor] = len(data)
+            data.extend(descriptor)
+
+        table[_pack_key(descriptor_type, index, langid)] = (offset, len(descriptor))
+
+    data_start = _HEADER.size + (len(table) * _ENTRY.size)
+
+    image = bytearray(_HEADER.pack(_MAGIC, _VERSION, kind, len(table), data_start))
+    for key in sorted(table):
+        image.extend(_ENTRY.pack(key, *table[key]))
+
+    image.extend(data)
+    return bytes(image)
+
+
+def write_image(image, destination):
+    """ Writes an image to a path or binary file object. """
+
+    if isinstance(destination, (str, bytes, os.PathLike)):
+        with open(destination, 'wb') as file:
+            file.write(image)
+    else:
+        destination.write(image)
+
+
+
+class DescriptorImage:
+    """ A binary descriptor image; usually memory-mapped from a file.
+
+    Lookups binary-search the image's table in place, and return read-only memoryviews of the image's data;
+    so neither loading an image nor querying it copies any descriptors.
+    """
+
+    def __init__(self, data, *, mapping=None):
+        """
+        Parameters:
+            data    -- A bytes-like object containing the image.
+            mapping -- The mmap object backing `data`, if any; which is closed with the image.
+        """
+
+        self._mapping = mapping
+        self._data    = memoryview(data).toreadonly()
+
+        if len(self._data) < _HEADER.size:
+            raise ValueError("descriptor image is truncated")
+
+        magic, version, kind, count, data_start = _HEADER.unpack_from(self._data)
+        if magic != _MAGIC:
+            raise ValueError("not a descriptor image")
+        if version != _VERSION:
+            raise ValueError(f"unsupported descriptor image version {version}")
+        if data_start != _HEADER.size + (count * _ENTRY.size) or data_start > len(self._data):
+            raise ValueError("descriptor image has a malformed table")
+
+        self.kind        = kind
+        self._count      = count
+        self._data_start = data_start
+
+        # On little-endian hosts, we can search our table in place; otherwise, we'll need to unpack its keys.
+        table = self._data[_HEADER.size:data_start]
+        if sys.byteorder == 'little':
+            self._table = table.cast('I')
+            self._keys  = self._table[0::3]
+        else:
+            self._table = [value for entry in _ENTRY.iter_unpack(table) for value in entry]
+            self._keys  = self._table[0::3]
+
+
+    @classmethod
+    def open(cls, source):
+        """ Memory-maps an image from a path or binary file object. """
+
+        if isinstance(source, (str, bytes, os.PathLike)):
+            with open(source, 'rb') as file:
+                return cls.open(file)
+
+        mapping = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapping, mapping=mapping)
+
+
+    def close(self):
+        """ Releases our image data; and closes its memory map, if we have one.
+
+        Any views previously returned by the image must be released before it can be closed.
+        """
+
+        for view in (self._keys, self._table, self._data):
+            if isinstance(view, memoryview):
+                view.release()
+
+        if self._mapping is not None:
+            self._mapping.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *_):
+        self.close()
+
+
+    def _view_for_entry(self, position):
+        """ Returns a view of the data for the table entry at the given position. """
+
+        offset = self._data_start + self._table[position * 3 + 1]
+        return self._data[offset:offset + self._table[position * 3 + 2]]
+
+
+    def lookup(self, descriptor_type, index=0, langid=0):
+        """ Returns a read-only memoryview of the given descriptor; or None if the image doesn't contain it. """
+
+        key      = _pack_key(descriptor_type, index, langid)
+        position = bisect.bisect_left(self._keys, key)
+
+        if (position < self._count) and (self._keys[position] == key):
+            return self._view_for_entry(position)
+
+        return None
+
+
+    def get_descriptor_bytes(self, type_number, index=0, langid=0):
+        """ Returns the given descriptor, as a read-only memoryview; raising a KeyError if the image doesn't contain it.
+
+        Parameters:
+            type_number -- The descriptor type number.
+            index       -- The index of the relevant descriptor, if relevant.
+            langid      -- The language ID of the relevant string descriptor, if relevant.
+        """
+
+        descriptor = self.lookup(type_number, index, langid)
+        if descriptor is None:
+            raise KeyError((type_number, index, langid))
+
+        return descriptor
+
+
+    def __iter__(self):
+        """ Yields a (type, index, langid, descriptor) tuple for each entry in the image, in key order. """
+
+        for position in range(self._count):
+            key = self._keys[position]
+            yield key >> 24, (key >> 16) & 0xFF, key & 0xFFFF, self._view_for_entry(position)
+
+
+    def __len__(self):
+        return self._count
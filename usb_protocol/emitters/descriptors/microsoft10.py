@@ -137,6 +137,43 @@ class MicrosoftOS10DescriptorCollection:
     def __iter__(self):
         return ((index, descriptor) for index, descriptor in self._descriptors.items())
 
+    def export_image(self, destination=None):
+        """ Exports this collection as a binary descriptor image; which can be memory-mapped with `load_image`.
+
+        Descriptors are stored with a type and index of zero, and their feature index in place of a langid;
+        so they can be looked up with e.g. `image.lookup(0, 0, feature_index)`.
+
+        Parameters:
+            destination -- A path or binary file object to write the image to, if desired.
+
+        Returns the image, as bytes.
+        """
+        from .image import DescriptorImageKind, build_image, write_image
+
+        image = build_image((((0, 0, index), descriptor) for index, descriptor in self), DescriptorImageKind.MICROSOFT_OS_10)
+
+        if destination is not None:
+            write_image(image, destination)
+
+        return image
+
+    @staticmethod
+    def load_image(source):
+        """ Memory-maps a descriptor image created by `export_image`; returning a DescriptorImage.
+
+        Parameters:
+            source -- A path or binary file object containing the image.
+        """
+        from .image import DescriptorImage, DescriptorImageKind
+
+        image = DescriptorImage.open(source)
+
+        if image.kind != DescriptorImageKind.MICROSOFT_OS_10:
+            image.close()
+            raise ValueError("image does not contain a Microsoft OS 1.0 descriptor collection")
+
+        return image
+
 
 
 class MicrosoftOS10EmitterTests(unittest.TestCase):
@@ -4,6 +4,7 @@
 """ Convenience emitters for USB MIDI Class 1 descriptors. """
 
 from ..                         import emitter_for_format
+from ..construct_interop        import get_format_size
 from ...emitters.descriptor     import ComplexDescriptorEmitter
 from ...types.descriptors.midi1 import *
 
@@ -13,7 +14,7 @@ class ClassSpecificMidiStreamingInterfaceDescriptorEmitter(ComplexDescriptorEmit
     def _pre_emit(self):
         # Figure out the total length of our descriptor, including subordinates.
         subordinate_length = sum(len(sub) for sub in self._subordinates)
-        self.wTotalLength = subordinate_length + self.DESCRIPTOR_FORMAT.sizeof()
+        self.wTotalLength = subordinate_length + get_format_size(self.DESCRIPTOR_FORMAT)
 
 class MidiOutJackDescriptorEmitter(ComplexDescriptorEmitter):
     DESCRIPTOR_FORMAT = MidiOutJackDescriptorHead
@@ -32,7 +33,7 @@ class MidiOutJackDescriptorEmitter(ComplexDescriptorEmitter):
         self.add_subordinate_descriptor(MidiOutJackDescriptorFootEmitter())
         # Figure out the total length of our descriptor, including subordinates.
         subordinate_length = sum(len(sub) for sub in self._subordinates)
-        self.bLength = subordinate_length + self.DESCRIPTOR_FORMAT.sizeof()
+        self.bLength = subordinate_length + get_format_size(self.DESCRIPTOR_FORMAT)
 
 class ClassSpecificMidiStreamingBulkDataEndpointDescriptorEmitter(ComplexDescriptorEmitter):
     DESCRIPTOR_FORMAT = ClassSpecificMidiStreamingBulkDataEndpointDescriptorHead
@@ -49,7 +50,7 @@ class ClassSpecificMidiStreamingBulkDataEndpointDescriptorEmitter(ComplexDescrip
     def _pre_emit(self):
         # Figure out the total length of our descriptor, including subordinates.
         subordinate_length = sum(len(sub) for sub in self._subordinates)
-        self.bLength = subordinate_length + self.DESCRIPTOR_FORMAT.sizeof()
+        self.bLength = subordinate_length + get_format_size(self.DESCRIPTOR_FORMAT)
 
 StandardMidiStreamingInterfaceDescriptorEmitter                    = emitter_for_format(StandardMidiStreamingInterfaceDescriptor)
 ClassSpecificMidiStreamingInterfaceHeaderDescriptorEmitter         = emitter_for_format(ClassSpecificMidiStreamingInterfaceHeaderDescriptor)
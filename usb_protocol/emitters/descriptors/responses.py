@@ -0,0 +1,162 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+Precomputed responses to GET_DESCRIPTOR requests, for devices that need to answer them quickly.
+
+A response table is created from a finished descriptor collection. Every descriptor is copied, once, into
+a single read-only buffer; and each request is answered with a view into that buffer, so answering
+requests never copies any descriptor data:
+
+.. code-block:: python
+
+    responses = collection.create_response_table()
+
+    # When handling a GET_DESCRIPTOR request...
+    for packet in responses.get_packets(setup.wValue, setup.wIndex, setup.wLength):
+        send_packet(packet)
+
+"""
+
+from collections.abc import Mapping
+
+from ...types.descriptors.standard import StandardDescriptorNumbers
+
+
+class DescriptorResponseTable(Mapping):
+    """ A frozen mapping of (wValue, wIndex) to the response to the relevant GET_DESCRIPTOR request.
+
+    String descriptors are available under each of the language IDs in the collection's language
+    descriptor, translated if the collection has a string table for that language; and all other
+    descriptors (including the language descriptor) under a wIndex of zero.
+    """
+
+    __slots__ = ('max_packet_size', '_data', '_responses', '_packets')
+
+    def __init__(self, collection, max_packet_size=None):
+        """
+        Parameters:
+            collection      -- The DeviceDescriptorCollection containing our descriptors.
+            max_packet_size -- The maximum packet size of the control endpoint that will send our responses.
+                               Defaults to the size given by the bMaxPacketSize0 of the collection's device
+                               descriptor; or 64, if it has none.
+        """
+
+        entries = collection._get_keyed_descriptors()
+
+        # Figure out the maximum packet size for our control endpoint.
+        if max_packet_size is None:
+            device = dict(entries).get((StandardDescriptorNumbers.DEVICE, 0, 0))
+            max_packet_size = device[7] if (device is not None) and (len(device) > 7) else 64
+
+            # From USB 3.0 onwards, bMaxPacketSize0 is the exponent of the packet size; not the size itself.
+            if (device is not None) and (len(device) > 7) and (device[3] >= 0x03):
+                max_packet_size = 1 << max_packet_size
+
+        if max_packet_size <= 0:
+            raise ValueError(f"invalid maximum packet size {max_packet_size}")
+
+        self.max_packet_size = max_packet_size
+
+        # Copy each of our distinct descriptors into a single buffer, which we'll share out views of.
+        offsets = {}
+        for _, descriptor in entries:
+            offsets.setdefault(bytes(descriptor), None)
+
+        self._data = memoryview(b"".join(offsets)).toreadonly()
+
+        position = 0
+        for descriptor in offsets:
+            offsets[descriptor] = position
+            position += len(descriptor)
+
+        self._responses = {}
+        for (number, index, langid), descriptor in entries:
+            offset = offsets[bytes(descriptor)]
+            self._responses[((number << 8) | index, langid)] = self._data[offset:offset + len(descriptor)]
+
+        # Precompute the packets for each complete response: both for requests that ask for exactly the
+        # descriptor's length, and for those that ask for more -- which may need to end with a zero-length packet.
+        self._packets = {}
+        for key, view in self._responses.items():
+            packets = self._split(view)
+
+            if len(view) % max_packet_size == 0:
+                self._packets[key] = (len(view), packets, packets + (self._data[0:0],))
+            else:
+                self._packets[key] = (len(view), packets, packets)
+
+
+    def _split(self, view):
+        """ Splits a view into a tuple of max-packet-sized views. """
+
+        packet_size = self.max_packet_size
+        packets = tuple(view[i:i + packet_size] for i in range(0, len(view), packet_size))
+
+        # A response with no data is sent as a single zero-length packet.
+        return packets or (view,)
+
+
+    def get_response(self, w_value, w_index=0, w_length=None):
+        """ Returns a read-only memoryview of the response to a GET_DESCRIPTOR request; or None if we have no such descriptor.
+
+        Parameters:
+            w_value  -- The request's wValue; which contains the descriptor type and index.
+            w_index  -- The request's wIndex; which is the language ID for string descriptors, and zero otherwise.
+            w_length -- The request's wLength. The response is truncated to this length, if provided.
+        """
+
+        response = self._responses.get((w_value, w_index))
+
+        if (response is not None) and (w_length is not None) and (w_length < len(response)):
+            return response[:w_length]
+
+        return response
+
+
+    def get_packets(self, w_value, w_index=0, w_length=0xFFFF):
+        """ Returns a tuple of the packets that make up the data stage of a response to a GET_DESCRIPTOR request.
+
+        A zero-length packet is included if the response is both shorter than requested and a multiple of
+        our maximum packet size. Returns None if we have no such descriptor.
+
+        Parameters:
+            w_value  -- The request's wValue; which contains the descriptor type and index.
+            w_index  -- The request's wIndex; which is the language ID for string descriptors, and zero otherwise.
+            w_length -- The request's wLength.
+        """
+
+        packets = self._packets.get((w_value, w_index))
+        if packets is None:
+            return None
+
+        length, exact_packets, short_packets = packets
+
+        # Most requests ask for an entire descriptor; which we've already split up...
+        if w_length == length:
+            return exact_packets
+        elif w_length > length:
+            return short_packets
+
+        # ... and requests with a wLength of zero have no data stage at all...
+        elif w_length == 0:
+            return ()
+
+        # ... but we'll need to split up any truncated ones ourselves.
+        return self._split(self._responses[(w_value, w_index)][:w_length])
+
+
+    def __getitem__(self, key):
+        return self._responses[key]
+
+
+    def __iter__(self):
+        return iter(self._responses)
+
+
+    def __len__(self):
+        return len(self._responses)
+
+
+    def __repr__(self):
+        return f"<DescriptorResponseTable with {len(self._responses)} responses>"
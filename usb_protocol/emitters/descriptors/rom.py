@@ -0,0 +1,231 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+Generators that lay out a descriptor collection as a ROM, for use in gateware or firmware.
+
+Each distinct descriptor is stored once, starting on a word boundary; and a lookup table maps each
+(type, index, langid) a GET_DESCRIPTOR request can ask for to the descriptor's word address and length.
+Hardware can then answer a request with a single table lookup, followed by a streaming read:
+
+.. code-block:: python
+
+    rom = collection.create_rom(word_size=4)
+
+    with open("descriptors.h", "w") as f:
+        f.write(rom.to_c_header("usb_descriptors"))
+
+    with open("descriptors.hex", "w") as f:
+        f.write(rom.to_readmemh())
+    with open("descriptor_table.hex", "w") as f:
+        f.write(rom.table_to_readmemh())
+
+"""
+
+import struct
+
+
+class DescriptorROMEntry:
+    """ A single entry in a DescriptorROM's lookup table. """
+
+    __slots__ = ('descriptor_type', 'index', 'langid', 'address', 'length')
+
+    def __init__(self, descriptor_type, index, langid, address, length):
+        """
+        Parameters:
+            descriptor_type -- The descriptor type; the high byte of a GET_DESCRIPTOR request's wValue.
+            index           -- The descriptor index; the low byte of a GET_DESCRIPTOR request's wValue.
+            langid          -- The language ID (wIndex) for string descriptors; otherwise zero.
+            address         -- The word address at which the descriptor starts.
+            length          -- The length of the descriptor, in bytes.
+        """
+        self.descriptor_type = descriptor_type
+        self.index           = index
+        self.langid          = langid
+        self.address         = address
+        self.length          = length
+
+
+    @property
+    def key(self):
+        """ The 32-bit key for this entry: the request's wValue in the upper 16 bits, and its wIndex in the lower. """
+        return (self.descriptor_type << 24) | (self.index << 16) | self.langid
+
+
+    def __repr__(self):
+        return f"<DescriptorROMEntry type={self.descriptor_type} index={self.index} langid=0x{self.langid:04x} address={self.address} length={self.length}>"
+
+
+
+class DescriptorROM:
+    """ A word-aligned ROM containing a set of descriptors, and a lookup table that locates them.
+
+    Attributes:
+        word_size -- The width of each ROM word, in bytes.
+        byteorder -- The order in which the bytes of each word are packed; 'little' places the first byte
+                     of each word in its least significant bits.
+        data      -- The contents of the ROM, as bytes; padded to a whole number of words.
+        table     -- A list of DescriptorROMEntry objects, sorted by key.
+    """
+
+    # The layout of each packed lookup table entry: key, word address, and length.
+    TABLE_ENTRY = struct.Struct("<IHH")
+
+    def __init__(self, entries, word_size=4, byteorder='little'):
+        """
+        Parameters:
+            entries   -- An iterable of ((descriptor type, index, langid), descriptor bytes) pairs.
+            word_size -- The width of each ROM word, in bytes.
+            byteorder -- The order in which bytes are packed into each word; 'little' or 'big'.
+        """
+
+        if word_size < 1:
+            raise ValueError(f"invalid word size {word_size}")
+        if byteorder not in ('little', 'big'):
+            raise ValueError(f"invalid byte order {byteorder!r}")
+
+        self.word_size = word_size
+        self.byteorder = byteorder
+
+        data      = bytearray()
+        addresses = {}
+        table     = []
+
+        for (descriptor_type, index, langid), descriptor in entries:
+            descriptor = bytes(descriptor)
+
+            # Store each distinct descriptor once, starting on a word boundary.
+            address = addresses.get(descriptor)
+            if address is None:
+                address = addresses[descriptor] = len(data) // word_size
+                data.extend(descriptor)
+                data.extend(bytes(-len(data) % word_size))
+
+            table.append(DescriptorROMEntry(descriptor_type, index, langid, address, len(descriptor)))
+
+        self.data  = bytes(data)
+        self.table = sorted(table, key=lambda entry: entry.key)
+
+        if self.word_count > 0xFFFF:
+            raise ValueError("descriptors are too large to fit in a ROM with 16-bit addresses")
+
+
+    @property
+    def word_count(self):
+        """ The number of words in the ROM. """
+        return len(self.data) // self.word_size
+
+
+    @property
+    def words(self):
+        """ The contents of the ROM, as a list of integers; one per word. """
+        size = self.word_size
+        return [int.from_bytes(self.data[i:i + size], self.byteorder) for i in range(0, len(self.data), size)]
+
+
+    def pack_table(self):
+        """ Returns the lookup table, packed as a little-endian (key: u32, word address: u16, length: u16) per entry. """
+        return b"".join(self.TABLE_ENTRY.pack(entry.key, entry.address, entry.length) for entry in self.table)
+
+
+    def _describe_addresses(self):
+        """ Returns a dictionary mapping each word address to a description of the descriptors that start there. """
+
+        descriptions = {}
+        for entry in self.table:
+            label = f"type {entry.descriptor_type}, index {entry.index}"
+            if entry.langid:
+                label += f", langid 0x{entry.langid:04x}"
+            descriptions.setdefault(entry.address, []).append(label)
+
+        return {address: "; ".join(labels) for address, labels in descriptions.items()}
+
+
+    def to_readmemh(self):
+        """ Returns the ROM's contents in the format read by Verilog's `$readmemh`; with one word per line. """
+
+        digits       = self.word_size * 2
+        descriptions = self._describe_addresses()
+
+        lines = []
+        for address, word in enumerate(self.words):
+            if address in descriptions:
+                lines.append(f"// {descriptions[address]}")
+            lines.append(f"{word:0{digits}x}")
+
+        return "\n".join(lines) + "\n"
+
+
+    def table_to_readmemh(self):
+        """ Returns the lookup table in `$readmemh` format: one 64-bit {key, word address, length} entry per line. """
+
+        lines = []
+        for entry in self.table:
+            lines.append(f"{entry.key:08x}{entry.address:04x}{entry.length:04x}")
+
+        return "\n".join(lines) + "\n"
+
+
+    def to_c_header(self, name="usb_descriptors"):
+        """ Returns a C header defining the ROM's contents, and its lookup table.
+
+        Parameters:
+            name -- The prefix used for each of the header's identifiers.
+        """
+
+        guard  = f"__{name.upper()}_H__"
+        macro  = name.upper()
+        ctype  = {1: "uint8_t", 2: "uint16_t", 4: "uint32_t", 8: "uint64_t"}.get(self.word_size)
+        suffix = "ull" if self.word_size == 8 else ""
+
+        lines = [
+            "/*",
+            " * Generated by usb-protocol. Do not edit.",
+            " */",
+            "",
+            f"#ifndef {guard}",
+            f"#define {guard}",
+            "",
+            "#include <stdint.h>",
+            "",
+            f"#define {macro}_WORD_SIZE     {self.word_size}",
+            f"#define {macro}_WORD_COUNT    {self.word_count}",
+            f"#define {macro}_TABLE_ENTRIES {len(self.table)}",
+            "",
+            "typedef struct {",
+            "\tuint32_t key;     /* (wValue << 16) | wIndex */",
+            "\tuint16_t address; /* in words */",
+            "\tuint16_t length;  /* in bytes */",
+            f"}} {name}_entry_t;",
+            "",
+        ]
+
+        # Emit our ROM as an array of words, if there's a C type for them; or as bytes, if not.
+        descriptions = self._describe_addresses()
+        if ctype is not None:
+            lines.append(f"static const {ctype} {name}_rom[{max(self.word_count, 1)}] = {{")
+            for address, word in enumerate(self.words):
+                if address in descriptions:
+                    lines.append(f"\t/* {descriptions[address]} */")
+                lines.append(f"\t0x{word:0{self.word_size * 2}x}{suffix},")
+        else:
+            lines.append(f"static const uint8_t {name}_rom[{max(len(self.data), 1)}] = {{")
+            for address in range(self.word_count):
+                if address in descriptions:
+                    lines.append(f"\t/* {descriptions[address]} */")
+                word = self.data[address * self.word_size:(address + 1) * self.word_size]
+                lines.append("\t" + " ".join(f"0x{byte:02x}," for byte in word))
+
+        lines.append("};")
+        lines.append("")
+
+        # Our lookup table is sorted by key; so firmware can binary search it.
+        lines.append(f"static const {name}_entry_t {name}_table[{max(len(self.table), 1)}] = {{")
+        for entry in self.table:
+            lines.append(f"\t{{ 0x{entry.key:08x}, {entry.address:5}, {entry.length:5} }},")
+        lines.append("};")
+
+        lines.append("")
+        lines.append(f"#endif /* {guard} */")
+
+        return "\n".join(lines) + "\n"
@@ -3,14 +3,16 @@
 #
 """ Convenience emitters for simple, standard descriptors. """
 
+import functools
 import unittest
 
 from contextlib import contextmanager
 
-from ..           import emitter_for_format
-from ..descriptor import ComplexDescriptorEmitter
+from ..                  import emitter_for_format
+from ..construct_interop import get_format_size, write_into
+from ..descriptor        import ComplexDescriptorEmitter
 
-from ...types     import LanguageIDs
+from ...types            import LanguageIDs
 from ...types.descriptors.standard import *
 
 
@@ -26,9 +28,16 @@ SuperSpeedUSBDeviceCapabilityDescriptorEmitter  = emitter_for_format(SuperSpeedU
 SuperSpeedEndpointCompanionDescriptorEmitter    = emitter_for_format(SuperSpeedEndpointCompanionDescriptor)
 
 # ... convenience functions ...
+@functools.lru_cache(maxsize=4096)
 def get_string_descriptor(string):
-    """ Generates a string descriptor for the relevant string. """
+    """ Generates a string descriptor for the relevant string. Results are cached, as devices tend to reuse strings. """
 
+    # String descriptors are simple enough that we can encode them directly...
+    data = string.encode('utf_16_le')
+    if len(data) <= 0xFF - 2:
+        return bytes((len(data) + 2, StandardDescriptorNumbers.STRING)) + data
+
+    # ... but we'll let our emitter report any that are too long.
     emitter = StringDescriptorEmitter()
     emitter.bString = string
     return emitter.emit()
@@ -134,7 +143,7 @@ class ConfigurationDescriptorEmitter(ComplexDescriptorEmitter):
 
         # Figure out our total length.
         subordinate_length = sum(len(sub) for sub in self._subordinates)
-        self.wTotalLength = subordinate_length + self.DESCRIPTOR_FORMAT.sizeof()
+        self.wTotalLength = subordinate_length + get_format_size(self.DESCRIPTOR_FORMAT)
 
         # Ensure that our configuration string is an index, if we can.
         if self._collection and hasattr(self, 'iConfiguration'):
@@ -167,6 +176,13 @@ class DeviceDescriptorCollection:
         self._next_string_index = 1
         self._index_for_string = {}
 
+        # Track any translations of our strings; keyed by (index, language ID).
+        self._localized_strings = {}
+        self._string_table_languages = []
+
+        # Note whether we've added a language descriptor automatically; so we can update it if we gain languages.
+        self._has_automatic_language_descriptor = False
+
 
     def ensure_string_field_is_index(self, field_value):
         """ Processes the given field value; if it's not an string index, converts it to one.
@@ -213,6 +229,32 @@ class DeviceDescriptorCollection:
         return index
 
 
+    def add_string_table(self, language, strings):
+        """ Adds a table of translations of our strings into another language.
+
+        Strings requested in that language are then served from the table; with any strings it doesn't
+        contain falling back to our default language. If our language descriptor is created automatically,
+        it will list each language we have a table for.
+
+        Parameters:
+            language -- The LanguageIDs value of the language the strings are translated into.
+            strings  -- A mapping of our strings (or their indices) to their translations. Strings that
+                        don't yet have an index are allocated one, as by `get_index_for_string`.
+        """
+
+        for string, translation in strings.items():
+            index = string if isinstance(string, int) else self.get_index_for_string(string)
+            self._localized_strings[(index, language)] = get_string_descriptor(translation)
+
+        if language not in self._string_table_languages:
+            self._string_table_languages.append(language)
+
+            # If we've already created a language descriptor automatically, it no longer lists all of our languages.
+            if self._has_automatic_language_descriptor:
+                del self._descriptors[(StandardDescriptorNumbers.STRING, 0)]
+                self._has_automatic_language_descriptor = False
+
+
     def add_descriptor(self, descriptor, index=0, descriptor_type=None):
         """ Adds a descriptor to our collection.
 
@@ -243,6 +285,10 @@ class DeviceDescriptorCollection:
         # ... and store it.
         self._descriptors[identifier] = descriptor
 
+        # If this replaces our automatic language descriptor, we should leave it alone from now on.
+        if identifier == (StandardDescriptorNumbers.STRING, 0):
+            self._has_automatic_language_descriptor = False
+
 
     def add_language_descriptor(self, supported_languages=None):
         """ Adds a language descriptor to the list of device descriptors.
@@ -314,21 +360,60 @@ class DeviceDescriptorCollection:
         if not self._automatic_language_descriptor:
             return
 
-        # if we don't have a language descriptor, add our default one.
+        # if we don't have a language descriptor, add our default one; along with any languages we have tables for.
         if (StandardDescriptorNumbers.STRING, 0) not in self._descriptors:
-            self.add_language_descriptor()
+            languages = list(self.DEFAULT_SUPPORTED_LANGUAGES)
+            languages.extend(language for language in self._string_table_languages if language not in languages)
+
+            self.add_language_descriptor(languages)
+            self._has_automatic_language_descriptor = True
 
 
 
-    def get_descriptor_bytes(self, type_number: int, index: int = 0):
+    def _get_language_ids(self):
+        """ Returns the list of language IDs in our language descriptor; adding one first, if necessary. """
+
+        self._ensure_has_language_descriptor()
+
+        descriptor = self._descriptors.get((StandardDescriptorNumbers.STRING, 0), b"")
+        return [int.from_bytes(descriptor[i:i + 2], 'little') for i in range(2, len(descriptor) - 1, 2)]
+
+
+    def _get_keyed_descriptors(self):
+        """ Returns a list of ((type, index, langid), descriptor) pairs, as used by GET_DESCRIPTOR requests.
+
+        Our string descriptors are available in each of our languages; everything else uses a langid of zero.
+        """
+
+        languages = self._get_language_ids() or [0]
+
+        entries = []
+        for number, index, descriptor in self:
+            if (number == StandardDescriptorNumbers.STRING) and (index != 0):
+                entries.extend(((number, index, language), self._localized_strings.get((index, language), descriptor)) for language in languages)
+            else:
+                entries.append(((number, index, 0), descriptor))
+
+        return entries
+
+
+    def get_descriptor_bytes(self, type_number: int, index: int = 0, langid: int = None):
         """ Returns the raw, binary descriptor for a given descriptor type/index.
 
         Parmeters:
             type_number -- The descriptor type number.
             index       -- The index of the relevant descriptor, if relevant.
+            langid      -- For string descriptors, the language ID of the string to return. Strings without
+                           a translation into that language are returned in our default language.
         """
 
-        # If this is a request for a language descriptor, return one.
+        # If this is a request for a translated string, look it up...
+        if (langid is not None) and (type_number == StandardDescriptorNumbers.STRING):
+            descriptor = self._localized_strings.get((index, langid))
+            if descriptor is not None:
+                return descriptor
+
+        # ... and if this is a request for a language descriptor, return one.
         if (type_number, index) == (StandardDescriptorNumbers.STRING, 0):
             self._ensure_has_language_descriptor()
 
@@ -341,6 +426,95 @@ class DeviceDescriptorCollection:
         return ((number, index, desc) for ((number, index), desc) in self._descriptors.items())
 
 
+    def create_template(self):
+        """ Creates a DescriptorTemplate from this collection; which can quickly create variants of it.
+
+        See `usb_protocol.emitters.descriptors.template` for details.
+        """
+        from .template import DescriptorTemplate
+        return DescriptorTemplate(self)
+
+
+    def create_response_table(self, max_packet_size=None):
+        """ Creates a frozen DescriptorResponseTable, which answers GET_DESCRIPTOR requests for this collection.
+
+        See `usb_protocol.emitters.descriptors.responses` for details.
+
+        Parameters:
+            max_packet_size -- The maximum packet size of the control endpoint; defaults to our device's bMaxPacketSize0.
+        """
+        from .responses import DescriptorResponseTable
+        return DescriptorResponseTable(self, max_packet_size)
+
+
+    def export_image(self, destination=None):
+        """ Exports this collection as a binary descriptor image; which can be memory-mapped with `load_image`.
+
+        See `usb_protocol.emitters.descriptors.image` for details of the image format.
+
+        Parameters:
+            destination -- A path or binary file object to write the image to, if desired.
+
+        Returns the image, as bytes.
+        """
+        from .image import build_image, write_image
+
+        image = build_image(self._get_keyed_descriptors())
+
+        if destination is not None:
+            write_image(image, destination)
+
+        return image
+
+
+    def create_rom(self, word_size=4, byteorder='little'):
+        """ Lays out this collection as a word-aligned DescriptorROM; for generating gateware or firmware.
+
+        See `usb_protocol.emitters.descriptors.rom` for details.
+
+        Parameters:
+            word_size -- The width of each ROM word, in bytes.
+            byteorder -- The order in which bytes are packed into each word; 'little' or 'big'.
+        """
+        from .rom import DescriptorROM
+        return DescriptorROM(self._get_keyed_descriptors(), word_size, byteorder)
+
+
+    @staticmethod
+    def load_image(source):
+        """ Memory-maps a descriptor image created by `export_image`; returning a DescriptorImage.
+
+        Parameters:
+            source -- A path or binary file object containing the image.
+        """
+        from .image import DescriptorImage, DescriptorImageKind
+
+        image = DescriptorImage.open(source)
+
+        if image.kind != DescriptorImageKind.STANDARD:
+            image.close()
+            raise ValueError("image does not contain a standard descriptor collection")
+
+        return image
+
+
+    def emit_into(self, buffer, offset=0):
+        """ Writes each of our descriptors, back to back and in iteration order, into a writable buffer.
+
+        Parameters:
+            buffer -- The buffer to write into, such as a bytearray or memoryview. It must be large enough
+                      to hold every descriptor.
+            offset -- The offset in the buffer at which to start writing.
+
+        Returns the offset just past the last descriptor.
+        """
+
+        for _, _, descriptor in self:
+            offset = write_into(buffer, offset, descriptor)
+
+        return offset
+
+
 
 
 class BinaryObjectStoreDescriptorEmitter(ComplexDescriptorEmitter):
@@ -391,7 +565,7 @@ class BinaryObjectStoreDescriptorEmitter(ComplexDescriptorEmitter):
 
         # Figure out the total length of our descriptor, including subordinates.
         subordinate_length = sum(len(sub) for sub in self._subordinates)
-        self.wTotalLength = subordinate_length + self.DESCRIPTOR_FORMAT.sizeof()
+        self.wTotalLength = subordinate_length + get_format_size(self.DESCRIPTOR_FORMAT)
 
         # Count our subordinate descriptors, and update our internal count.
         self.bNumDeviceCaps = len(self._subordinates)
@@ -0,0 +1,238 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+Templates for quickly creating many variants of a descriptor collection, which differ only in a few fields.
+
+A template is created from a finished collection; which is emitted once, and has the location of each
+of its fields recorded. Variants are then created by patching the relevant bytes, rather than by running
+each of the emitters again:
+
+.. code-block:: python
+
+    template = collection.create_template()
+
+    for serial in range(100_000):
+        variant = template.variant(idProduct=0x0002, iSerialNumber=f"{serial:08}")
+        store_personality(variant)
+
+"""
+
+import struct
+
+from collections import Counter
+
+from ..construct_interop import get_emit_plan
+from .standard           import get_string_descriptor
+from ...types.descriptors.standard import StandardDescriptorNumbers
+from ...types.descriptors.tree     import iter_descriptors
+
+
+class FieldLocation:
+    """ The location of a single field in one of a template's descriptors. """
+
+    __slots__ = ('identifier', 'offset', 'layout', 'encoders', 'is_string_index')
+
+    def __init__(self, identifier, offset, layout, encoders, is_string_index):
+        """
+        Parameters:
+            identifier      -- The (type, index) of the descriptor this field appears in.
+            offset          -- The offset of the field within that descriptor.
+            layout          -- The struct.Struct used to pack the field.
+            encoders        -- The construct Adapters that encode values for the field, outermost first.
+            is_string_index -- True iff the field contains the index of a string descriptor.
+        """
+        self.identifier      = identifier
+        self.offset          = offset
+        self.layout          = layout
+        self.encoders        = encoders
+        self.is_string_index = is_string_index
+
+
+    def __repr__(self):
+        return f"<FieldLocation {self.identifier} offset={self.offset}>"
+
+
+
+class DescriptorTemplate:
+    """ A snapshot of a DeviceDescriptorCollection, from which variants can be created by patching fields.
+
+    Fields are identified by keys of the form `(descriptor_type, index, field_name, occurrence)`; where
+    `descriptor_type` and `index` identify one of the collection's descriptors, and `occurrence` counts
+    fields of the same name within it. For example, `(StandardDescriptorNumbers.CONFIGURATION, 0,
+    'bEndpointAddress', 1)` is the address of the second endpoint in the first configuration. The
+    occurrence can be omitted when it's zero; and fields of the device descriptor can be identified by
+    their names alone.
+
+    Setting a string index field (e.g. `iSerialNumber`) to a string rather than an integer creates or
+    reuses a string descriptor for that string; just as when using an emitter.
+    """
+
+    def __init__(self, collection):
+        """
+        Parameters:
+            collection -- The DeviceDescriptorCollection to create a template from. Later changes to the
+                          collection don't affect the template.
+        """
+
+        self._collection = collection
+
+        # Iterating over our collection adds any automatic descriptors it's missing; so we'll capture those, too.
+        self._descriptors = {(number, index): bytes(descriptor) for number, index, descriptor in collection}
+
+        self._index_for_string  = dict(collection._index_for_string)
+        self._next_string_index = collection._next_string_index
+        self._localized_strings = dict(collection._localized_strings)
+
+        self._fields = {}
+        self._locate_fields()
+
+        # Count the number of fields that reference each string; so we know which strings can be replaced in-place.
+        self._string_references = Counter(
+            self._read_field(location) for location in set(self._fields.values()) if location.is_string_index
+        )
+
+
+    def _locate_fields(self):
+        """ Finds the location of every field we know how to patch. """
+
+        for identifier, data in self._descriptors.items():
+
+            # String descriptors are recreated, rather than patched.
+            if identifier[0] == StandardDescriptorNumbers.STRING:
+                continue
+
+            occurrences = Counter()
+
+            for node in iter_descriptors(data):
+                descriptor_format = node.descriptor_format
+                plan = get_emit_plan(descriptor_format) if descriptor_format is not None else None
+
+                # We can only patch fields whose position we know.
+                if plan is None:
+                    continue
+
+                for name, (offset, format_character, encoders) in plan.field_layout.items():
+                    layout = struct.Struct('<' + format_character)
+
+                    # Skip any optional fields that weren't emitted.
+                    if offset + layout.size > node.length:
+                        continue
+
+                    is_string_index = name.startswith('i') and (format_character == 'B')
+                    location = FieldLocation(identifier, node.offset + offset, layout, encoders, is_string_index)
+
+                    self._fields[(*identifier, name, occurrences[name])] = location
+                    occurrences[name] += 1
+
+                    # Fields of our device descriptor can also be identified by name alone.
+                    if identifier == (StandardDescriptorNumbers.DEVICE, 0):
+                        self._fields.setdefault(name, location)
+
+
+    def _read_field(self, location):
+        """ Returns the current (raw) value of the field at the given location. """
+        return location.layout.unpack_from(self._descriptors[location.identifier], location.offset)[0]
+
+
+    @property
+    def field_keys(self):
+        """ The keys of every field that can be patched. """
+        return self._fields.keys()
+
+
+    def get_field_location(self, key):
+        """ Returns the FieldLocation for the given field key; raising a KeyError if the template has no such field. """
+
+        # Allow the occurrence to be omitted, when it's the first.
+        if isinstance(key, tuple) and len(key) == 3:
+            key = (*key, 0)
+
+        try:
+            return self._fields[key]
+        except KeyError:
+            raise KeyError(f"descriptor template has no field {key!r}") from None
+
+
+    def variant(self, fields=None, **named_fields):
+        """ Creates a new DeviceDescriptorCollection, with the given fields patched.
+
+        Only descriptors with patched fields, and any strings that have changed, are recreated; all other
+        descriptors are shared with the template.
+
+        Parameters:
+            fields         -- A dictionary mapping field keys to their new values.
+            **named_fields -- New values for fields of the device descriptor.
+        """
+
+        patches = {}
+        strings = {}
+
+        index_for_string  = self._index_for_string
+        next_string_index = self._next_string_index
+
+        for key, value in (*(fields or {}).items(), *named_fields.items()):
+            location = self.get_field_location(key)
+
+            # If we've been handed a string for a string index field, find or create an index for it.
+            if location.is_string_index and isinstance(value, str):
+
+                # Copy our string table the first time we need to change it.
+                if index_for_string is self._index_for_string:
+                    index_for_string = dict(index_for_string)
+
+                index = index_for_string.get(value)
+
+                if index is None:
+                    current = self._read_field(location)
+
+                    # If nothing else uses the string we're replacing, replace it in place; otherwise, add a new one.
+                    if current and (self._string_references[current] == 1) and (current not in strings):
+                        index = current
+                        for string in [string for string, i in index_for_string.items() if i == current]:
+                            del index_for_string[string]
+                    else:
+                        index = next_string_index
+                        next_string_index += 1
+
+                    index_for_string[value] = index
+                    strings[index] = get_string_descriptor(value)
+
+                value = index
+
+            for encoder in location.encoders:
+                value = encoder._encode(value, None, "(building)")
+
+            # Patch a copy of the relevant descriptor; copying it only once, no matter how many fields change.
+            data = patches.get(location.identifier)
+            if data is None:
+                data = patches[location.identifier] = bytearray(self._descriptors[location.identifier])
+
+            location.layout.pack_into(data, location.offset, value)
+
+        # Finally, assemble our variant from our template and our changes.
+        descriptors = self._descriptors.copy()
+        for identifier, data in patches.items():
+            descriptors[identifier] = bytes(data)
+        for index, data in strings.items():
+            descriptors[(StandardDescriptorNumbers.STRING, index)] = data
+
+        replaced_strings = {index for index in strings if index < self._next_string_index}
+        return self._create_collection(descriptors, index_for_string, next_string_index, replaced_strings)
+
+
+    def _create_collection(self, descriptors, index_for_string, next_string_index, replaced_strings):
+        """ Creates a new collection like our original one, but with the given contents. """
+
+        collection = object.__new__(type(self._collection))
+        collection.__dict__.update(self._collection.__dict__)
+
+        collection._descriptors       = descriptors
+        collection._index_for_string  = index_for_string if (index_for_string is not self._index_for_string) else dict(index_for_string)
+        collection._next_string_index = next_string_index
+
+        # Translations of any strings we've replaced no longer apply.
+        collection._localized_strings      = {key: value for key, value in self._localized_strings.items() if key[0] not in replaced_strings}
+        collection._string_table_languages = list(self._collection._string_table_languages)
+
+        return collection
@@ -0,0 +1,101 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for binary descriptor images.
+"""
+
+import os
+import tempfile
+import unittest
+
+from .image         import DescriptorImage, DescriptorImageKind, build_image
+from .microsoft10   import MicrosoftOS10DescriptorCollection
+from .standard      import DeviceDescriptorCollection
+from .test_standard import _create_collection
+from ...types       import LanguageIDs
+from ...types.descriptors.standard import StandardDescriptorNumbers
+
+
+class DescriptorImageCases(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = _create_collection()
+
+        handle, self.path = tempfile.mkstemp(suffix=".bin")
+        os.close(handle)
+
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+
+    def test_round_trip(self):
+        self.collection.export_image(self.path)
+
+        with DeviceDescriptorCollection.load_image(self.path) as image:
+            self.assertEqual(image.kind, DescriptorImageKind.STANDARD)
+
+            for number, index, descriptor in self.collection:
+                langid = LanguageIDs.ENGLISH_US if (number == StandardDescriptorNumbers.STRING and index) else 0
+
+                with self.subTest(number=number, index=index):
+                    view = image.get_descriptor_bytes(number, index, langid)
+                    self.assertEqual(view, descriptor)
+                    self.assertTrue(view.readonly)
+                    view.release()
+
+            self.assertIsNone(image.lookup(StandardDescriptorNumbers.DEVICE, 1))
+            with self.assertRaises(KeyError):
+                image.get_descriptor_bytes(StandardDescriptorNumbers.STRING, 1, 0)
+
+
+    def test_iteration_is_sorted(self):
+        image   = DescriptorImage(self.collection.export_image())
+        entries = [(number, index, langid) for number, index, langid, _ in image]
+
+        self.assertEqual(entries, sorted(entries))
+        self.assertEqual(len(image), len(entries))
+
+
+    def test_deduplication(self):
+        image = build_image([((3, 1, 0x0409), b"\x04\x03a\x00"), ((3, 1, 0x0407), b"\x04\x03a\x00"), ((1, 0, 0), b"\x02\x01")])
+
+        # Two distinct descriptors, behind a 16-byte header and three 12-byte table entries.
+        self.assertEqual(len(image), 16 + (3 * 12) + 4 + 2)
+        self.assertEqual(DescriptorImage(image).lookup(3, 1, 0x0407), b"\x04\x03a\x00")
+
+
+    def test_invalid_images(self):
+        image = self.collection.export_image()
+
+        with self.assertRaises(ValueError):
+            DescriptorImage(b"NOPE" + image[4:])
+        with self.assertRaises(ValueError):
+            DescriptorImage(image[:8])
+
+        MicrosoftOS10DescriptorCollection().export_image(self.path)
+        with self.assertRaises(ValueError):
+            DeviceDescriptorCollection.load_image(self.path)
+
+
+    def test_microsoft_images(self):
+        collection = MicrosoftOS10DescriptorCollection()
+
+        with collection.ExtendedCompatIDDescriptor() as d:
+            with d.Function() as f:
+                f.bFirstInterfaceNumber = 0
+                f.compatibleID          = 'WINUSB'
+
+        with open(self.path, 'wb') as file:
+            collection.export_image(file)
+
+        with MicrosoftOS10DescriptorCollection.load_image(self.path) as image:
+            for index, descriptor in collection:
+                view = image.lookup(0, 0, index)
+                self.assertEqual(view, descriptor)
+                view.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for precomputed GET_DESCRIPTOR response tables.
+"""
+
+import unittest
+
+from .standard      import SuperSpeedDeviceDescriptorCollection
+from .test_standard import _create_collection
+from ...types       import LanguageIDs
+from ...types.descriptors.standard import StandardDescriptorNumbers
+
+
+DEVICE        = StandardDescriptorNumbers.DEVICE << 8
+CONFIGURATION = StandardDescriptorNumbers.CONFIGURATION << 8
+STRING        = StandardDescriptorNumbers.STRING << 8
+
+
+class DescriptorResponseTableCases(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = _create_collection()
+        self.responses  = self.collection.create_response_table()
+
+
+    def test_responses_match_collection(self):
+        for number, index, descriptor in self.collection:
+            w_index = LanguageIDs.ENGLISH_US if (number == StandardDescriptorNumbers.STRING and index) else 0
+
+            with self.subTest(number=number, index=index):
+                self.assertEqual(self.responses[((number << 8) | index, w_index)], descriptor)
+
+        self.assertIsNone(self.responses.get_response(STRING | 1, 0))
+        self.assertIsNone(self.responses.get_response(DEVICE | 1))
+
+
+    def test_responses_are_shared_views(self):
+        first  = self.responses.get_response(CONFIGURATION)
+        second = self.responses.get_response(CONFIGURATION)
+
+        self.assertIs(first.obj, second.obj)
+        self.assertTrue(first.readonly)
+        self.assertIs(self.responses.get_packets(DEVICE), self.responses.get_packets(DEVICE))
+
+
+    def test_truncation(self):
+        self.assertEqual(self.responses.get_response(CONFIGURATION, 0, 9), self.collection.get_descriptor_bytes(StandardDescriptorNumbers.CONFIGURATION)[:9])
+        self.assertEqual(len(self.responses.get_response(CONFIGURATION, 0, 0xFF)), 25)
+
+
+    def test_packets(self):
+        responses = self.collection.create_response_table(max_packet_size=8)
+        self.assertEqual(responses.max_packet_size, 8)
+
+        # Our configuration descriptor set is 25 bytes long; so it should take four packets...
+        packets = responses.get_packets(CONFIGURATION, 0, 0xFF)
+        self.assertEqual([len(packet) for packet in packets], [8, 8, 8, 1])
+        self.assertEqual(b"".join(packets), self.collection.get_descriptor_bytes(StandardDescriptorNumbers.CONFIGURATION))
+
+        # ... or fewer, if truncated.
+        self.assertEqual([len(packet) for packet in responses.get_packets(CONFIGURATION, 0, 9)], [8, 1])
+        self.assertEqual(responses.get_packets(CONFIGURATION, 0, 0), ())
+
+        # Responses that are shorter than requested, and a multiple of our packet size, should end with a ZLP.
+        self.assertEqual([len(packet) for packet in responses.get_packets(DEVICE, 0, 0x40)], [8, 8, 2])
+        self.assertEqual([len(packet) for packet in responses.get_packets(DEVICE, 0, 16)], [8, 8])
+        self.assertEqual([len(packet) for packet in responses.get_packets(STRING, 0, 0xFF)], [4])
+
+        responses = self.collection.create_response_table(max_packet_size=2)
+        self.assertEqual([len(packet) for packet in responses.get_packets(STRING, 0, 0xFF)], [2, 2, 0])
+        self.assertEqual([len(packet) for packet in responses.get_packets(STRING, 0, 4)], [2, 2])
+
+
+    def test_default_packet_size(self):
+        self.assertEqual(self.responses.max_packet_size, self.collection.get_descriptor_bytes(StandardDescriptorNumbers.DEVICE)[7])
+
+
+    def test_superspeed_packet_size(self):
+        collection = SuperSpeedDeviceDescriptorCollection()
+
+        with collection.DeviceDescriptor() as d:
+            d.bcdUSB             = 3.2
+            d.bMaxPacketSize0    = 9
+            d.idVendor           = 0x1209
+            d.idProduct          = 0x0001
+            d.iProduct           = "A SuperSpeed device with a long product name, sent in a single packet"
+            d.bNumConfigurations = 1
+
+        with collection.ConfigurationDescriptor() as c:
+            with c.InterfaceDescriptor() as i:
+                i.bInterfaceNumber = 0
+
+        responses = collection.create_response_table()
+        i_product = collection.get_descriptor_bytes(StandardDescriptorNumbers.DEVICE)[15]
+
+        self.assertEqual(responses.max_packet_size, 512)
+        self.assertEqual([len(packet) for packet in responses.get_packets(DEVICE, 0, 0xFF)], [18])
+        self.assertEqual(len(responses.get_packets(STRING | i_product, LanguageIDs.ENGLISH_US, 0xFF)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for descriptor ROM generation.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from .rom           import DescriptorROM
+from .test_standard import _create_collection
+from ...types       import LanguageIDs
+from ...types.descriptors.standard import StandardDescriptorNumbers
+
+
+class DescriptorROMCases(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = _create_collection()
+        self.collection.add_language_descriptor([LanguageIDs.ENGLISH_US, LanguageIDs.GERMAN_STANDARD])
+
+        self.rom = self.collection.create_rom()
+
+
+    def _read_entry(self, rom, entry):
+        start = entry.address * rom.word_size
+        return rom.data[start:start + entry.length]
+
+
+    def test_layout(self):
+        descriptors = {(number, index): descriptor for number, index, descriptor in self.collection}
+
+        for entry in self.rom.table:
+            with self.subTest(entry=entry):
+                self.assertEqual(self._read_entry(self.rom, entry), descriptors[(entry.descriptor_type, entry.index)])
+
+        # Our table should be sorted, for searching...
+        keys = [entry.key for entry in self.rom.table]
+        self.assertEqual(keys, sorted(keys))
+
+        # ... and our ROM should be a whole number of words.
+        self.assertEqual(len(self.rom.data) % 4, 0)
+        self.assertEqual(len(self.rom.words), self.rom.word_count)
+
+
+    def test_deduplication(self):
+        strings = [entry for entry in self.rom.table if (entry.descriptor_type == StandardDescriptorNumbers.STRING) and (entry.index == 1)]
+
+        self.assertEqual({entry.langid for entry in strings}, {LanguageIDs.ENGLISH_US, LanguageIDs.GERMAN_STANDARD})
+        self.assertEqual(len({entry.address for entry in strings}), 1)
+
+        rom = DescriptorROM([((3, 1, 0), b"\x04\x03a\x00"), ((3, 2, 0), b"\x04\x03a\x00"), ((1, 0, 0), b"\x02\x01")], word_size=2)
+        self.assertEqual(rom.data, b"\x04\x03a\x00\x02\x01")
+        self.assertEqual(rom.words, [0x0304, 0x0061, 0x0102])
+        self.assertEqual(DescriptorROM([((1, 0, 0), b"\x02\x01")], word_size=2, byteorder='big').words, [0x0201])
+
+
+    def test_readmemh(self):
+        words = [line for line in self.rom.to_readmemh().splitlines() if not line.startswith("//")]
+        self.assertEqual([int(word, 16) for word in words], self.rom.words)
+        self.assertTrue(all(len(word) == 8 for word in words))
+
+        table = self.rom.table_to_readmemh().splitlines()
+        self.assertEqual(len(table), len(self.rom.table))
+        self.assertEqual(bytes.fromhex(table[0])[4:6], self.rom.table[0].address.to_bytes(2, 'big'))
+
+        self.assertEqual(len(self.rom.pack_table()), 8 * len(self.rom.table))
+
+
+    @unittest.skipUnless(shutil.which("cc"), "no C compiler available")
+    def test_c_header(self):
+        for word_size in (1, 3, 4):
+            rom = self.collection.create_rom(word_size=word_size)
+
+            with self.subTest(word_size=word_size), tempfile.TemporaryDirectory() as directory:
+                with open(os.path.join(directory, "descriptors.h"), "w") as f:
+                    f.write(rom.to_c_header("test_descriptors"))
+
+                # Compile a small program that finds and prints our device descriptor, to check our header.
+                with open(os.path.join(directory, "main.c"), "w") as f:
+                    f.write(
+                        '#include <stdio.h>\n'
+                        '#include "descriptors.h"\n'
+                        'int main(void) {\n'
+                        '\tconst uint8_t *rom = (const uint8_t *)test_descriptors_rom;\n'
+                        '\tfor (int i = 0; i < TEST_DESCRIPTORS_TABLE_ENTRIES; i++) {\n'
+                        '\t\tif (test_descriptors_table[i].key != 0x01000000) continue;\n'
+                        '\t\tfor (int j = 0; j < test_descriptors_table[i].length; j++)\n'
+                        '\t\t\tprintf("%02x", rom[test_descriptors_table[i].address * TEST_DESCRIPTORS_WORD_SIZE + j]);\n'
+                        '\t}\n'
+                        '\treturn 0;\n'
+                        '}\n'
+                    )
+
+                executable = os.path.join(directory, "main")
+                subprocess.run(["cc", "-Wall", "-Werror", "-o", executable, os.path.join(directory, "main.c")], check=True)
+                output = subprocess.run([executable], capture_output=True, text=True, check=True).stdout
+
+                # Reading words as bytes only works if our host shares our ROM's byte order.
+                if (word_size in (1, 3)) or (sys.byteorder == rom.byteorder):
+                    self.assertEqual(bytes.fromhex(output), self.collection.get_descriptor_bytes(StandardDescriptorNumbers.DEVICE))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for our standard descriptor emitters and collections.
+"""
+
+import timeit
+import unittest
+
+import construct
+
+from .standard import DeviceDescriptorCollection, ConfigurationDescriptorEmitter, EndpointDescriptorEmitter, StringDescriptorEmitter, get_string_descriptor
+from ...types  import LanguageIDs
+from ...types.descriptors.standard import StandardDescriptorNumbers
+
+
+def _create_configuration(collection=None):
+    """ Creates a configuration emitter with a couple of interfaces, each with a couple of endpoints. """
+
+    configuration = ConfigurationDescriptorEmitter(collection=collection)
+    configuration.bConfigurationValue = 1
+
+    for number in range(2):
+        with configuration.InterfaceDescriptor() as interface:
+            interface.bInterfaceNumber = number
+
+            for address in (0x01, 0x81):
+                with interface.EndpointDescriptor() as endpoint:
+                    endpoint.bEndpointAddress = address + number
+                    endpoint.wMaxPacketSize   = 512
+
+    return configuration
+
+
+def _create_collection():
+    """ Creates a simple, complete device descriptor collection. """
+
+    collection = DeviceDescriptorCollection()
+
+    with collection.DeviceDescriptor() as d:
+        d.idVendor           = 0x1209
+        d.idProduct          = 0x0001
+        d.iManufacturer      = "usb-protocol"
+        d.iProduct           = "Test Device"
+        d.bNumConfigurations = 1
+
+    with collection.ConfigurationDescriptor() as c:
+        c.bConfigurationValue = 1
+
+        with c.InterfaceDescriptor() as i:
+            i.bInterfaceNumber = 0
+            i.iInterface       = "Test Interface"
+
+            with i.EndpointDescriptor() as e:
+                e.bEndpointAddress = 0x81
+                e.wMaxPacketSize   = 512
+
+    return collection
+
+
+class EmitIntoCases(unittest.TestCase):
+
+    def test_complex_emit_into(self):
+        configuration = _create_configuration()
+        expected = configuration.emit()
+
+        buffer = bytearray(len(expected) + 1)
+        self.assertEqual(configuration.emit_into(buffer, 1), len(buffer))
+        self.assertEqual(buffer[1:], expected)
+
+        # Our total length should count every subordinate.
+        self.assertEqual(expected[2] | (expected[3] << 8), 9 + (2 * 9) + (4 * 7))
+
+
+    def test_without_subordinates(self):
+        configuration = _create_configuration()
+
+        buffer = bytearray(9)
+        self.assertEqual(configuration.emit_into(buffer, include_subordinates=False), 9)
+        self.assertEqual(bytes(buffer), configuration.emit(include_subordinates=False))
+
+
+    def test_collection_emit_into(self):
+        collection = _create_collection()
+        expected   = b"".join(descriptor for _, _, descriptor in collection)
+
+        buffer = memoryview(bytearray(len(expected)))
+        self.assertEqual(collection.emit_into(buffer), len(expected))
+        self.assertEqual(buffer, expected)
+
+        # Our language descriptor should have been added, automatically.
+        self.assertIn(collection.get_descriptor_bytes(StandardDescriptorNumbers.STRING, 0), expected)
+
+        with self.assertRaises(ValueError):
+            collection.emit_into(bytearray(len(expected) - 1))
+
+
+class IncrementalEmissionCases(unittest.TestCase):
+
+    def test_emission_is_cached(self):
+        configuration = _create_configuration()
+        self.assertIs(configuration.emit(), configuration.emit())
+
+
+    def test_subordinate_changes_are_reflected(self):
+        configuration = _create_configuration()
+        before = configuration.emit()
+
+        # Change a single endpoint, deep in our tree...
+        interface = configuration._live_subordinates[1][1]
+        endpoint  = interface._live_subordinates[1][1]
+        untouched = configuration._live_subordinates[0][1]
+        cached    = untouched.emit()
+
+        endpoint.wMaxPacketSize = 64
+        after = configuration.emit()
+
+        # ... which should affect only that endpoint's bytes...
+        self.assertEqual(len(after), len(before))
+        self.assertEqual([i for i in range(len(after)) if after[i] != before[i]], [len(before) - 3, len(before) - 2])
+
+        # ... and leave our untouched interface's cached bytes alone.
+        self.assertIs(untouched.emit(), cached)
+
+        # Re-emitting from scratch should produce the same result.
+        fresh = _create_configuration()
+        fresh._live_subordinates[1][1]._live_subordinates[1][1].wMaxPacketSize = 64
+        self.assertEqual(fresh.emit(), after)
+
+
+    def test_derived_fields_are_updated(self):
+        configuration = _create_configuration()
+        configuration.emit()
+
+        # Adding an endpoint to an existing interface should update both bNumEndpoints and wTotalLength.
+        interface = configuration._live_subordinates[0][1]
+        with interface.EndpointDescriptor() as endpoint:
+            endpoint.bEndpointAddress = 0x83
+
+        data = configuration.emit()
+        self.assertEqual(data[2] | (data[3] << 8), len(data))
+        self.assertEqual(data[9 + 4], 3)
+        self.assertEqual(data[4], 2)
+
+        buffer = bytearray(len(data))
+        configuration.emit_into(buffer)
+        self.assertEqual(buffer, data)
+
+
+    def test_invalidate(self):
+        configuration = _create_configuration()
+        endpoint = configuration._live_subordinates[0][1]._live_subordinates[0][1]
+        configuration.emit()
+
+        # Changing fields directly isn't noticed until we invalidate the emitter.
+        endpoint.fields['bInterval'] = 4
+        self.assertNotIn(b"\x07\x05\x01\x02\x00\x02\x04", configuration.emit())
+
+        endpoint.invalidate()
+        self.assertIn(b"\x07\x05\x01\x02\x00\x02\x04", configuration.emit())
+
+
+    def test_shared_subordinates(self):
+        first, second = _create_configuration(), _create_configuration()
+
+        # Add the same endpoint to an interface in each configuration...
+        endpoint = EndpointDescriptorEmitter(bEndpointAddress=0x83, wMaxPacketSize=64)
+        for configuration in (first, second):
+            configuration._live_subordinates[0][1].add_subordinate_descriptor(endpoint)
+
+        first.emit()
+        second.emit()
+
+        # ... and check that changing it is reflected in both.
+        endpoint.wMaxPacketSize = 512
+        for configuration in (first, second):
+            self.assertIn(b"\x07\x05\x83\x02\x00\x02", configuration.emit())
+
+
+class StringDescriptorCases(unittest.TestCase):
+
+    def _emit_string(self, string):
+        emitter = StringDescriptorEmitter()
+        emitter.bString = string
+        return emitter.emit()
+
+
+    def test_encoding_matches_emitter(self):
+        for string in ("", "Hello", "Grüße", "x" * 126):
+            with self.subTest(string=string):
+                self.assertEqual(get_string_descriptor(string), self._emit_string(string))
+
+        # Characters outside of the BMP take two UTF-16 code units; which should both be counted in bLength.
+        self.assertEqual(get_string_descriptor("\U0001F50C USB")[0], 2 + (2 * 6))
+
+        # Strings that don't fit in a descriptor should be rejected, just as by our emitter.
+        with self.assertRaises(construct.ConstructError):
+            get_string_descriptor("x" * 127)
+
+
+    def test_encoding_is_cached(self):
+        self.assertIs(get_string_descriptor("Cached"), get_string_descriptor("Cached"))
+
+
+    def test_encoding_microbenchmark(self):
+        strings = [f"Serial {i:08}" for i in range(100)]
+
+        direct  = timeit.timeit(lambda: [get_string_descriptor.__wrapped__(string) for string in strings], number=10)
+        emitted = timeit.timeit(lambda: [self._emit_string(string) for string in strings], number=10)
+        self.assertLess(direct, emitted)
+
+
+
+class StringTableCases(unittest.TestCase):
+
+    GERMAN = LanguageIDs.GERMAN_STANDARD
+    FRENCH = LanguageIDs.FRENCH_STANDARD
+
+    def setUp(self):
+        self.collection = _create_collection()
+        self.collection.add_string_table(self.GERMAN, {"Test Device": "Testgerät", "Test Interface": "Testschnittstelle"})
+        self.collection.add_string_table(self.FRENCH, {"Test Device": "Appareil de test"})
+
+        self.product = self.collection.get_index_for_string("Test Device")
+
+
+    def test_language_descriptor(self):
+        self.assertEqual(self.collection._get_language_ids(), [LanguageIDs.ENGLISH_US, self.GERMAN, self.FRENCH])
+
+        # Adding a language after our language descriptor has been created automatically should update it...
+        self.collection.add_string_table(LanguageIDs.SPANISH_MODERN_SORT, {"Test Device": "Dispositivo de prueba"})
+        self.assertIn(LanguageIDs.SPANISH_MODERN_SORT, self.collection._get_language_ids())
+
+        # ... but an explicit language descriptor should be left alone.
+        self.collection.add_language_descriptor([LanguageIDs.ENGLISH_US])
+        self.collection.add_string_table(LanguageIDs.ITALIAN_STANDARD, {"Test Device": "Dispositivo di prova"})
+        self.assertEqual(self.collection._get_language_ids(), [LanguageIDs.ENGLISH_US])
+
+
+    def test_localized_lookups(self):
+        STRING = StandardDescriptorNumbers.STRING
+
+        self.assertEqual(self.collection.get_descriptor_bytes(STRING, self.product, self.GERMAN), get_string_descriptor("Testgerät"))
+        self.assertEqual(self.collection.get_descriptor_bytes(STRING, self.product, self.FRENCH), get_string_descriptor("Appareil de test"))
+        self.assertEqual(self.collection.get_descriptor_bytes(STRING, self.product), get_string_descriptor("Test Device"))
+
+        # Strings without a translation should fall back to our default language.
+        manufacturer = self.collection.get_index_for_string("usb-protocol")
+        self.assertEqual(self.collection.get_descriptor_bytes(STRING, manufacturer, self.GERMAN), get_string_descriptor("usb-protocol"))
+
+
+    def test_tables_by_index(self):
+        self.collection.add_string_table(self.FRENCH, {self.product: "Périphérique de test"})
+
+        descriptor = self.collection.get_descriptor_bytes(StandardDescriptorNumbers.STRING, self.product, self.FRENCH)
+        self.assertEqual(descriptor, get_string_descriptor("Périphérique de test"))
+
+
+    def test_translations_are_exported(self):
+        STRING = StandardDescriptorNumbers.STRING << 8
+
+        responses = self.collection.create_response_table()
+        self.assertEqual(responses[(STRING | self.product, self.GERMAN)], get_string_descriptor("Testgerät"))
+        self.assertEqual(responses[(STRING | self.product, LanguageIDs.ENGLISH_US)], get_string_descriptor("Test Device"))
+
+        from .image import DescriptorImage
+        image = DescriptorImage(self.collection.export_image())
+        self.assertEqual(image.lookup(StandardDescriptorNumbers.STRING, self.product, self.FRENCH), get_string_descriptor("Appareil de test"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for descriptor collection templates.
+"""
+
+import timeit
+import unittest
+
+from .standard      import DeviceDescriptorCollection
+from .test_standard import _create_collection
+from ...types       import LanguageIDs
+from ...types.descriptors.standard import StandardDescriptorNumbers, DeviceDescriptor, ConfigurationDescriptor
+
+
+DEVICE        = StandardDescriptorNumbers.DEVICE
+CONFIGURATION = StandardDescriptorNumbers.CONFIGURATION
+STRING        = StandardDescriptorNumbers.STRING
+
+
+def _get_string(collection, index):
+    """ Returns the string stored in the given string descriptor of a collection. """
+    return collection.get_descriptor_bytes(STRING, index)[2:].decode('utf_16_le')
+
+
+class DescriptorTemplateCases(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = _create_collection()
+        self.template   = self.collection.create_template()
+
+
+    def test_patching_matches_emitters(self):
+        variant = self.template.variant(idProduct=0x1234, bcdDevice=1.5)
+
+        device = DeviceDescriptor.parse(variant.get_descriptor_bytes(DEVICE))
+        self.assertEqual(device.idProduct, 0x1234)
+        self.assertEqual(device.bcdDevice, 1.5)
+
+        # Our original collection and its unchanged descriptors should be left alone.
+        self.assertEqual(DeviceDescriptor.parse(self.collection.get_descriptor_bytes(DEVICE)).idProduct, 0x0001)
+        self.assertIs(variant.get_descriptor_bytes(CONFIGURATION), self.template.variant().get_descriptor_bytes(CONFIGURATION))
+
+
+    def test_nested_fields(self):
+        self.assertIn((CONFIGURATION, 0, 'bEndpointAddress', 0), self.template.field_keys)
+
+        variant = self.template.variant({(CONFIGURATION, 0, 'bEndpointAddress'): 0x82, (CONFIGURATION, 0, 'bMaxPower', 0): 50})
+        data    = variant.get_descriptor_bytes(CONFIGURATION)
+
+        self.assertEqual(ConfigurationDescriptor.parse(data).bMaxPower, 50)
+        self.assertEqual(data[9 + 9 + 2], 0x82)
+
+        with self.assertRaises(KeyError):
+            self.template.variant({(CONFIGURATION, 0, 'bEndpointAddress', 1): 0x83})
+
+
+    def test_new_strings(self):
+        variant = self.template.variant(iSerialNumber="0001")
+        device  = DeviceDescriptor.parse(variant.get_descriptor_bytes(DEVICE))
+
+        self.assertEqual(_get_string(variant, device.iSerialNumber), "0001")
+        self.assertEqual(variant.get_index_for_string("0001"), device.iSerialNumber)
+
+        # Our variant should keep allocating indices after the one it added.
+        self.assertEqual(variant.get_index_for_string("another"), device.iSerialNumber + 1)
+        self.assertNotIn((STRING, device.iSerialNumber), dict(((n, i), d) for n, i, d in self.collection))
+
+
+    def test_replaced_strings(self):
+        original = DeviceDescriptor.parse(self.collection.get_descriptor_bytes(DEVICE))
+
+        # A string used by only one field should be replaced in place...
+        variant = self.template.variant(iProduct="Other Device")
+        self.assertEqual(_get_string(variant, original.iProduct), "Other Device")
+        self.assertEqual(variant.get_index_for_string("Other Device"), original.iProduct)
+        self.assertEqual(_get_string(self.collection, original.iProduct), "Test Device")
+
+        # ... and an existing string should be reused.
+        variant = self.template.variant(iSerialNumber="usb-protocol")
+        self.assertEqual(DeviceDescriptor.parse(variant.get_descriptor_bytes(DEVICE)).iSerialNumber, original.iManufacturer)
+
+
+    def test_translations(self):
+        self.collection.add_string_table(LanguageIDs.GERMAN_STANDARD, {"Test Device": "Testgerät", "usb-protocol": "USB-Protokoll"})
+        template = self.collection.create_template()
+
+        original = DeviceDescriptor.parse(self.collection.get_descriptor_bytes(DEVICE))
+        variant  = template.variant(iProduct="Other Device")
+
+        # Translations should be kept for any strings we haven't replaced; but not for those we have.
+        manufacturer = variant.get_descriptor_bytes(STRING, original.iManufacturer, LanguageIDs.GERMAN_STANDARD)
+        product      = variant.get_descriptor_bytes(STRING, original.iProduct, LanguageIDs.GERMAN_STANDARD)
+
+        self.assertEqual(manufacturer[2:].decode('utf_16_le'), "USB-Protokoll")
+        self.assertEqual(product[2:].decode('utf_16_le'), "Other Device")
+
+        # Variants shouldn't share their string tables with each other.
+        variant.add_string_table(LanguageIDs.FRENCH_STANDARD, {"Other Device": "Autre appareil"})
+        self.assertNotIn(LanguageIDs.FRENCH_STANDARD, template.variant()._string_table_languages)
+
+
+    def test_shared_strings(self):
+        collection = DeviceDescriptorCollection()
+
+        with collection.DeviceDescriptor() as d:
+            d.idVendor, d.idProduct, d.bNumConfigurations = 0x1209, 0x0001, 1
+            d.iManufacturer = "Shared"
+            d.iProduct      = "Shared"
+
+        # Replacing a string that's used elsewhere should leave the other users alone.
+        variant = collection.create_template().variant(iProduct="Unshared")
+        device  = DeviceDescriptor.parse(variant.get_descriptor_bytes(DEVICE))
+
+        self.assertEqual(_get_string(variant, device.iManufacturer), "Shared")
+        self.assertEqual(_get_string(variant, device.iProduct), "Unshared")
+
+
+    def test_unknown_fields(self):
+        with self.assertRaises(KeyError):
+            self.template.variant(idProdcut=0x1234)
+
+
+    def test_variant_microbenchmark(self):
+        template = min(timeit.repeat(lambda: self.template.variant(idProduct=0x1234, iSerialNumber="0001"), number=100, repeat=3))
+        emitted  = min(timeit.repeat(_create_collection, number=100, repeat=3))
+        self.assertLess(template, emitted)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,7 @@
 from contextlib import contextmanager
 
 from .. import emitter_for_format
+from ..construct_interop       import get_format_size
 from ...types.descriptors.uac2 import *
 from ...emitters.descriptor    import ComplexDescriptorEmitter
 
@@ -19,7 +20,7 @@ class ClassSpecificAudioControlInterfaceDescriptorEmitter(ComplexDescriptorEmitt
     def _pre_emit(self):
         # Figure out the total length of our descriptor, including subordinates.
         subordinate_length = sum(len(sub) for sub in self._subordinates)
-        self.wTotalLength = subordinate_length + self.DESCRIPTOR_FORMAT.sizeof()
+        self.wTotalLength = subordinate_length + get_format_size(self.DESCRIPTOR_FORMAT)
 
 ClockSourceDescriptorEmitter                                             = emitter_for_format(ClockSourceDescriptor)
 InputTerminalDescriptorEmitter                                           = emitter_for_format(InputTerminalDescriptor)
@@ -0,0 +1,198 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for our construct-based emitters.
+"""
+
+import struct
+import timeit
+import unittest
+
+import construct
+
+from .construct_interop        import ConstructEmitter, emitter_for_format, get_emit_plan, get_field_names
+from ..types.descriptor        import BCDFieldAdapter, BCDVersion
+from ..types.test_descriptor   import _all_descriptor_formats
+from ..types.descriptors.standard import \
+    DeviceDescriptor, EndpointDescriptor, DeviceQualifierDescriptor, StringDescriptor
+
+
+def _sample_fields(plan, value=1):
+    """ Returns a set of fields that provides a value for each of a plan's variable fields. """
+
+    fields = {}
+    for _, name, _, rebuild, encoders in plan._variables:
+        if rebuild is None:
+            fields[name] = 1.1 if any(isinstance(encoder, BCDFieldAdapter) for encoder in encoders) else value
+
+    return fields
+
+
+class EmitPlanCases(unittest.TestCase):
+
+    def assertBuildsIdentically(self, descriptor_format, fields):
+        plan = get_emit_plan(descriptor_format)
+
+        # Some of our sample values aren't valid for every format; in which case, the plan should reject them, too.
+        try:
+            expected = descriptor_format.build(fields)
+        except construct.ConstructError:
+            with self.assertRaises(Exception):
+                plan.build(fields)
+            return
+
+        self.assertEqual(plan.build(fields), expected)
+
+
+    def test_plans_match_construct(self):
+        for name, descriptor_format in _all_descriptor_formats():
+            plan = get_emit_plan(descriptor_format)
+            if plan is None:
+                continue
+
+            with self.subTest(descriptor=name):
+
+                # Check with only our required fields, so defaults are used...
+                required = {
+                    name: value for name, value in _sample_fields(plan).items()
+                        if any(variable[1] == name and variable[2] is plan._REQUIRED for variable in plan._variables)
+                }
+                self.assertBuildsIdentically(descriptor_format, required)
+
+                # ... and with every field provided.
+                self.assertBuildsIdentically(descriptor_format, _sample_fields(plan, value=2))
+
+
+    def test_field_layout(self):
+        layout = get_emit_plan(EndpointDescriptor).field_layout
+
+        self.assertEqual(layout['wMaxPacketSize'][:2], (4, 'H'))
+        self.assertEqual(layout['bSynchAddress'][:2], (8, 'B'))
+        self.assertNotIn('bDescriptorType', layout)
+
+
+    def test_plans_are_cached(self):
+        self.assertIs(get_emit_plan(DeviceDescriptor), get_emit_plan(DeviceDescriptor))
+        self.assertIsNone(get_emit_plan(StringDescriptor))
+
+
+    def test_optional_and_constant_fields(self):
+        self.assertBuildsIdentically(EndpointDescriptor, {'bEndpointAddress': 0x81})
+        self.assertBuildsIdentically(EndpointDescriptor, {'bEndpointAddress': 0x01, 'bLength': 9, 'bRefresh': 0, 'bSynchAddress': 0x81})
+        self.assertBuildsIdentically(DeviceQualifierDescriptor, {'bcdUSB': 2.0, 'bDeviceClass': 0, 'bDeviceSubclass': 0,
+            'bDeviceProtocol': 0, 'bMaxPacketSize0': 64, 'bNumConfigurations': 1})
+
+
+    def test_bcd_versions(self):
+        fields = {'idVendor': 0x1209, 'idProduct': 0x0001, 'bNumConfigurations': 1, 'bcdDevice': BCDVersion("1.01")}
+        self.assertBuildsIdentically(DeviceDescriptor, fields)
+
+
+    def test_emitter_errors_match_construct(self):
+        emitter = ConstructEmitter(DeviceDescriptor)
+
+        # Missing fields should still be reported by name...
+        with self.assertRaises(KeyError):
+            emitter.emit()
+
+        # ... and invalid values should still be rejected by construct.
+        emitter.idVendor, emitter.idProduct, emitter.bNumConfigurations = 0x1209, 1, 1
+        emitter.bLength = 9
+        with self.assertRaises(construct.ConstError):
+            emitter.emit()
+
+        emitter.bLength = 0x12
+        emitter.idVendor = 0x10000
+        with self.assertRaises(construct.FormatFieldError):
+            emitter.emit()
+
+
+    def test_emit_microbenchmark(self):
+        emitter = ConstructEmitter(DeviceDescriptor)
+        emitter.idVendor, emitter.idProduct, emitter.bNumConfigurations = 0x1209, 1, 1
+
+        # Emitters cache their output; so discard it each time, to measure our emit plan rather than the cache.
+        def emit():
+            emitter.invalidate()
+            return emitter.emit()
+
+        self.assertEqual(emit(), DeviceDescriptor.build(emitter.fields))
+
+        compiled    = min(timeit.repeat(emit, number=200, repeat=3))
+        interpreted = min(timeit.repeat(lambda: DeviceDescriptor.build(emitter.fields), number=200, repeat=3))
+        self.assertLess(compiled, interpreted)
+
+
+class FieldNameCases(unittest.TestCase):
+
+    def test_field_names_are_shared(self):
+        first, second = ConstructEmitter(DeviceDescriptor), ConstructEmitter(DeviceDescriptor)
+
+        self.assertIs(first._field_names, second._field_names)
+        self.assertIs(get_field_names(DeviceDescriptor), first._field_names)
+        self.assertIn('idVendor', first._field_names)
+
+
+    def test_attribute_validation(self):
+        emitter = ConstructEmitter(DeviceDescriptor)
+        emitter.idVendor = 0x1209
+
+        with self.assertRaises(AttributeError):
+            emitter.idVendr = 0x1209
+
+
+    def test_bulk_update(self):
+        emitter = ConstructEmitter(DeviceDescriptor, idVendor=0x1209)
+        emitter.update(idProduct=0x0001, bNumConfigurations=1)
+        self.assertEqual(emitter.fields, {'idVendor': 0x1209, 'idProduct': 0x0001, 'bNumConfigurations': 1})
+
+        # A single bad field name should prevent any of the fields from being set.
+        with self.assertRaises(AttributeError):
+            emitter.update(idProduct=0x0002, bNumConfiguration=2)
+        self.assertEqual(emitter.idProduct, 0x0001)
+
+        with self.assertRaises(AttributeError):
+            ConstructEmitter(DeviceDescriptor, idVendr=0x1209)
+
+
+    def test_factory_fields(self):
+        emitter = emitter_for_format(DeviceDescriptor)(idVendor=0x1209, idProduct=0x0001, bNumConfigurations=1)
+        self.assertEqual(emitter.emit()[8:12], b"\x09\x12\x01\x00")
+
+        from .descriptors.standard import InterfaceDescriptorEmitter
+        interface = InterfaceDescriptorEmitter(bInterfaceNumber=1)
+        self.assertEqual(interface.emit()[2], 1)
+
+
+class EmitIntoCases(unittest.TestCase):
+
+    def test_emit_into_matches_emit(self):
+        for descriptor_format, fields in ((DeviceDescriptor, {'idVendor': 0x1209, 'idProduct': 1, 'bNumConfigurations': 1}),
+                                          (StringDescriptor, {'bString': "Hello"})):
+            emitter = ConstructEmitter(descriptor_format, **fields)
+            expected = emitter.emit()
+
+            with self.subTest(descriptor=descriptor_format.name):
+                buffer = bytearray(b"\xff" * (len(expected) + 4))
+                end    = emitter.emit_into(memoryview(buffer), 2)
+
+                self.assertEqual(end, len(expected) + 2)
+                self.assertEqual(buffer, b"\xff\xff" + expected + b"\xff\xff")
+
+
+    def test_emit_into_small_buffer(self):
+        emitter = ConstructEmitter(StringDescriptor, bString="Hello")
+
+        # Buffers should never be grown to fit a descriptor.
+        buffer = bytearray(4)
+        with self.assertRaises(ValueError):
+            emitter.emit_into(buffer)
+        self.assertEqual(len(buffer), 4)
+
+        with self.assertRaises(struct.error):
+            get_emit_plan(DeviceDescriptor).build_into({'idVendor': 0, 'idProduct': 0, 'bNumConfigurations': 1}, buffer)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for our lazily-loaded packages, and the time taken to import them.
+"""
+
+import subprocess
+import sys
+import unittest
+
+
+class LazyImportCases(unittest.TestCase):
+
+    # The total time our own modules may take to import a single descriptor module, in microseconds.
+    # This is deliberately generous; it's meant to catch eagerly-loaded tables, not small regressions.
+    IMPORT_TIME_BUDGET_US = 100_000
+
+
+    def _import_in_fresh_interpreter(self, module):
+        """ Imports a module in a new interpreter; and returns {module name: self import time in µs} for our modules. """
+
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, check=True)
+
+        # Each line of -X importtime's output looks like "import time: <self> | <cumulative> | <name>".
+        times = {}
+        for line in result.stderr.splitlines():
+            fields = line.split('|')
+            if not line.startswith('import time:') or len(fields) != 3:
+                continue
+
+            name = fields[2].strip()
+            if name.startswith('usb_protocol'):
+                times[name] = int(fields[0].split(':')[1])
+
+        return times
+
+
+    def test_standard_descriptors_import_alone(self):
+        modules = self._import_in_fresh_interpreter('usb_protocol.types.descriptors.standard')
+
+        for unneeded in ('usb_protocol.types.languages', 'usb_protocol.types.descriptors.uac2',
+                'usb_protocol.types.descriptors.uac3', 'usb_protocol.emitters'):
+            self.assertNotIn(unneeded, modules)
+
+        self.assertLess(sum(modules.values()), self.IMPORT_TIME_BUDGET_US, modules)
+
+
+    def test_packages_import_lazily(self):
+        self.assertEqual(set(self._import_in_fresh_interpreter('usb_protocol.types.descriptors')),
+            {'usb_protocol', 'usb_protocol._lazy', 'usb_protocol.types', 'usb_protocol.types.descriptors'})
+
+        emitter_modules = self._import_in_fresh_interpreter('usb_protocol.emitters')
+        self.assertNotIn('usb_protocol.emitters.descriptors.standard', emitter_modules)
+        self.assertNotIn('usb_protocol.types.descriptors.standard',    emitter_modules)
+
+
+    def test_public_names_are_available(self):
+        import usb_protocol.types                     as types
+        import usb_protocol.types.descriptors         as descriptors
+        import usb_protocol.types.descriptors.partial as partial
+        import usb_protocol.emitters                  as emitters
+        import usb_protocol.emitters.descriptors      as emitter_descriptors
+
+        from usb_protocol.types.descriptors import standard, uac2
+        from usb_protocol.emitters.descriptors import standard as standard_emitters
+
+        self.assertIs(descriptors.DeviceDescriptor, standard.DeviceDescriptor)
+        self.assertIs(descriptors.uac2, uac2)
+        self.assertIs(partial.DeviceDescriptor, standard.DeviceDescriptor.Partial)
+        self.assertIs(types.LanguageIDs.ENGLISH_US, standard.LanguageIDs.ENGLISH_US)
+        self.assertEqual(types.LANGUAGE_NAMES[0x0409], "English (US)")
+
+        self.assertIs(emitters.DeviceDescriptorCollection, standard_emitters.DeviceDescriptorCollection)
+        self.assertIs(emitter_descriptors.DeviceDescriptorEmitter, standard_emitters.DeviceDescriptorEmitter)
+        self.assertIn('DeviceDescriptor', dir(descriptors))
+
+        with self.assertRaises(AttributeError):
+            descriptors.NotADescriptor
+
+
+    def test_star_imports(self):
+        namespace = {}
+        exec("from usb_protocol.types.descriptors import *", namespace)
+
+        self.assertIn('DeviceDescriptor', namespace)
+        self.assertIn('StandardDescriptorNumbers', namespace)
+
+        namespace = {}
+        exec("from usb_protocol.types.descriptors.standard import *", namespace)
+
+        self.assertIn('DeviceDescriptor', namespace)
+        self.assertIs(namespace['LanguageIDs'], sys.modules['usb_protocol.types.languages'].LanguageIDs)
+
+
+    def test_types_star_import(self):
+        namespace = {}
+        exec("from usb_protocol.types import *", namespace)
+
+        for name in ('USBDirection', 'USBPacketID', 'USBTransferType', 'endpoint_number_from_address',
+                'LanguageIDs', 'LANGUAGE_NAMES'):
+            self.assertIn(name, namespace)
+
+        self.assertNotIn('lazy_attributes', namespace)
+        self.assertNotIn('languages', namespace)
+
+
+    def test_emitters_star_import(self):
+        from usb_protocol.emitters.construct_interop    import emitter_for_format, ConstructEmitter
+        from usb_protocol.emitters.descriptors.standard import DeviceDescriptorCollection, SuperSpeedDeviceDescriptorCollection
+
+        namespace = {}
+        exec("from usb_protocol.emitters import *", namespace)
+        namespace.pop('__builtins__')
+
+        self.assertEqual(namespace, {
+            'emitter_for_format':                   emitter_for_format,
+            'ConstructEmitter':                     ConstructEmitter,
+            'DeviceDescriptorCollection':           DeviceDescriptorCollection,
+            'SuperSpeedDeviceDescriptorCollection': SuperSpeedDeviceDescriptorCollection,
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
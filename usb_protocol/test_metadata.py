@@ -0,0 +1,42 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for our packaging metadata.
+"""
+
+import pathlib
+import unittest
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+
+PYPROJECT_PATH = pathlib.Path(__file__).parent.parent / "pyproject.toml"
+
+
+@unittest.skipIf(tomllib is None, "tomllib requires Python 3.11")
+@unittest.skipUnless(PYPROJECT_PATH.exists(), "not running from a source tree")
+class PackageMetadataCases(unittest.TestCase):
+
+    def setUp(self):
+        with PYPROJECT_PATH.open("rb") as f:
+            self.project = tomllib.load(f)["project"]
+
+
+    def test_version_is_dynamic(self):
+        self.assertEqual(self.project.get("dynamic"), ["version"])
+
+
+    def test_optional_dependencies(self):
+        extras = self.project.get("optional-dependencies", {})
+
+        self.assertEqual(set(extras), {"numpy"})
+        for requirements in extras.values():
+            self.assertIsInstance(requirements, list)
+
+
+if __name__ == "__main__":
+    unittest.main()
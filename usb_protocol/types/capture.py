@@ -0,0 +1,732 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+A memory-mapped reader for USB captures in pcap and pcapng files.
+
+Captures are mapped rather than read; and each record's data is a memoryview into the mapping, so walking a
+capture never copies its packets. Records from USB 2.0 link types decode directly into packet objects, and
+records from Linux usbmon link types into URB objects:
+
+.. code-block:: python
+
+    with CaptureReader("capture.pcapng", index_path="capture.pcapng.idx") as capture:
+        decoder = TransferDecoder()
+
+        for transfer in decoder.transfers(record.packet() for record in capture):
+            ...
+
+        # Once a capture has been walked once, any record can be found directly.
+        record = capture[len(capture) // 2]
+
+The first complete pass over a capture builds an index of the offset of each of its records; which allows
+records to be found by number in constant time. The index is written to a file as it's built, rather than kept
+in memory; so memory use stays bounded, no matter the size of the capture. By default, that file is an anonymous
+temporary file; but if an `index_path` is provided, the index is kept there, and reused by later readers of the
+same capture.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+
+from array import array
+from enum  import IntEnum
+
+from .          import USBDirection, USBTransferType
+from .packets   import decode_packet
+from .transfers import SetupRequest
+
+
+class LinkType(IntEnum):
+    """ The pcap link types used for USB captures that this module understands. """
+
+    USB_LINUX            = 189
+    USB_LINUX_MMAPPED    = 220
+    USB_2_0              = 288
+    USB_2_0_LOW_SPEED    = 293
+    USB_2_0_FULL_SPEED   = 294
+    USB_2_0_HIGH_SPEED   = 295
+
+
+# Link types whose records each contain a single raw USB 2.0 packet.
+_USB_2_0_LINK_TYPES = frozenset((LinkType.USB_2_0, LinkType.USB_2_0_LOW_SPEED, LinkType.USB_2_0_FULL_SPEED, LinkType.USB_2_0_HIGH_SPEED))
+
+# Link types whose records start with a Linux usbmon header; and the length of that header.
+_USBMON_HEADER_LENGTHS = {LinkType.USB_LINUX: 48, LinkType.USB_LINUX_MMAPPED: 64}
+
+
+class UsbmonURB:
+    """ A single usbmon event: the submission or completion of a URB, as captured by Linux.
+
+    Attributes:
+        id              -- The kernel's identifier for the URB; shared by its submission and completion.
+        event_type      -- 'S' for submissions, 'C' for completions, or 'E' for errors.
+        transfer_type   -- The USBTransferType of the URB's endpoint.
+        endpoint        -- The number of the URB's endpoint.
+        direction       -- The USBDirection of the URB's endpoint.
+        device          -- The address of the URB's device.
+        bus             -- The number of the bus the URB's device is attached to.
+        setup           -- The SetupRequest for control submissions; or None.
+        status          -- The URB's status; zero on success, or a negative errno.
+        length          -- The length of the URB's data, as submitted or completed.
+        data            -- A memoryview of the captured portion of the URB's data. For isochronous URBs in
+                           memory-mapped captures, this begins with the URB's isochronous descriptors.
+    """
+
+    __slots__ = ('id', 'event_type', 'transfer_type', 'endpoint', 'direction', 'device', 'bus', 'setup', 'status', 'length', 'data')
+
+    # The layout of the common part of each usbmon header.
+    HEADER = {
+        '<': struct.Struct("<QBBBBHbbqiiII8s"),
+        '>': struct.Struct(">QBBBBHbbqiiII8s"),
+    }
+
+    # usbmon's transfer type numbers, in terms of our own.
+    _TRANSFER_TYPES = (USBTransferType.ISOCHRONOUS, USBTransferType.INTERRUPT, USBTransferType.CONTROL, USBTransferType.BULK)
+
+    def __init__(self, record, header_length=48, byteorder='<'):
+        """
+        Parameters:
+            record        -- A memoryview of the captured record; including its usbmon header.
+            header_length -- The length of the record's usbmon header; 48 bytes, or 64 for memory-mapped captures.
+            byteorder     -- The struct byte order character for the header's fields; those of the capturing host.
+        """
+
+        urb_id, event_type, transfer_type, endpoint_address, device, bus, setup_flag, _, _, _, \
+            status, length, _, setup = self.HEADER[byteorder].unpack_from(record)
+
+        self.id            = urb_id
+        self.event_type    = chr(event_type)
+        self.transfer_type = self._TRANSFER_TYPES[transfer_type & 0b11]
+        self.endpoint      = endpoint_address & 0x7F
+        self.direction     = USBDirection.from_endpoint_address(endpoint_address)
+        self.device        = device
+        self.bus           = bus
+        self.setup         = SetupRequest(setup) if (setup_flag == 0) else None
+        self.status        = status
+        self.length        = length
+        self.data          = record[header_length:]
+
+
+    def __repr__(self):
+        return f"<UsbmonURB {self.event_type} {self.transfer_type.name} {self.direction.name} bus={self.bus} " \
+               f"device={self.device} endpoint={self.endpoint} length={self.length}>"
+
+
+
+class CaptureRecord:
+    """ A single record from a capture.
+
+    Attributes:
+        number          -- The position of the record in its capture; starting from zero.
+        timestamp       -- The time at which the record was captured, in nanoseconds since the epoch; or None
+                           for records without timestamps.
+        link_type       -- The LinkType (or raw link type number) of the interface the record was captured on.
+        interface       -- The number of the interface the record was captured on, within its pcapng section.
+        original_length -- The length of the packet on the wire; which may exceed the length of the captured data.
+        data            -- A read-only memoryview of the captured data.
+    """
+
+    __slots__ = ('number', 'timestamp', 'link_type', 'interface', 'original_length', 'data', '_byteorder')
+
+    def __init__(self, number, timestamp, link_type, interface, original_length, data, byteorder='<'):
+        self.number          = number
+        self.timestamp       = timestamp
+        self.link_type       = link_type
+        self.interface       = interface
+        self.original_length = original_length
+        self.data            = data
+        self._byteorder      = byteorder
+
+
+    def packet(self, check_crcs=True):
+        """ Decodes this record as a USB 2.0 packet; see `decode_packet()`. """
+
+        if self.link_type in _USB_2_0_LINK_TYPES:
+            return decode_packet(self.data, check_crcs=check_crcs)
+
+        raise ValueError(f"records with link type {self.link_type} don't contain raw USB packets")
+
+
+    def urb(self):
+        """ Decodes this record as a Linux usbmon event. """
+
+        header_length = _USBMON_HEADER_LENGTHS.get(self.link_type)
+
+        if header_length is None:
+            raise ValueError(f"records with link type {self.link_type} don't contain usbmon events")
+        if len(self.data) < header_length:
+            raise ValueError("usbmon record is truncated")
+
+        return UsbmonURB(self.data, header_length, self._byteorder)
+
+
+    def __repr__(self):
+        link_type = getattr(self.link_type, 'name', self.link_type)
+        return f"<CaptureRecord {self.number} {link_type} length={len(self.data)}>"
+
+
+
+class _Interface:
+    """ The details of a capture interface that we need to interpret its records. """
+
+    __slots__ = ('link_type', 'byteorder', 'resolution')
+
+    def __init__(self, link_type, byteorder, resolution):
+        """
+        Parameters:
+            link_type  -- The interface's link type number.
+            byteorder  -- The struct byte order character of the interface's section.
+            resolution -- The interface's timestamp resolution; in pcapng's if_tsresol format.
+        """
+
+        try:
+            link_type = LinkType(link_type)
+        except ValueError:
+            pass
+
+        self.link_type  = link_type
+        self.byteorder  = byteorder
+        self.resolution = resolution
+
+
+    def to_nanoseconds(self, timestamp):
+        """ Converts a timestamp in this interface's units into nanoseconds. """
+
+        resolution = self.resolution
+
+        # Resolutions with their top bit set are negative powers of two; the rest, of ten.
+        if resolution & 0x80:
+            return (timestamp * 1_000_000_000) >> (resolution & 0x7F)
+        if resolution <= 9:
+            return timestamp * (10 ** (9 - resolution))
+
+        return timestamp // (10 ** (resolution - 9))
+
+
+
+#
+# File format details.
+#
+
+_PCAP_MAGICS = {
+    0xA1B2C3D4: 6,
+    0xA1B23C4D: 9,
+}
+
+_PCAPNG_SECTION_HEADER    = 0x0A0D0D0A
+_PCAPNG_BYTE_ORDER_MAGIC  = 0x1A2B3C4D
+_PCAPNG_INTERFACE         = 0x00000001
+_PCAPNG_SIMPLE_PACKET     = 0x00000003
+_PCAPNG_ENHANCED_PACKET   = 0x00000006
+
+_PCAPNG_OPTION_TSRESOL    = 9
+
+_STRUCTS = {
+    byteorder: {
+        'pcap_record':     struct.Struct(byteorder + "IIII"),
+        'block_header':    struct.Struct(byteorder + "II"),
+        'interface':       struct.Struct(byteorder + "HHI"),
+        'option':          struct.Struct(byteorder + "HH"),
+        'enhanced_packet': struct.Struct(byteorder + "IIIII"),
+        'simple_packet':   struct.Struct(byteorder + "I"),
+    }
+    for byteorder in '<>'
+}
+
+# Our index files: a header; an entry for each record, which contains the record's offset in its low 48 bits,
+# and the number of its interface in its high 16; and finally, a table of the capture's interfaces. Headers
+# identify the capture they were built for by its size, a CRC32 of its first and last blocks, its modification
+# time, and its inode number.
+_INDEX_HEADER    = struct.Struct("<4sHHQQIIqQ")
+_INDEX_INTERFACE = struct.Struct("<HcB4x")
+_INDEX_ENTRY     = struct.Struct("<Q")
+_INDEX_MAGIC     = b"UCIX"
+_INDEX_VERSION   = 2
+
+# The size of the blocks at the start and end of a capture that are checked before its index is reused.
+_INDEX_CHECKED_BLOCK_SIZE = 65536
+
+_OFFSET_MASK     = (1 << 48) - 1
+
+# How many index entries we buffer before writing them out.
+_INDEX_BUFFER_ENTRIES = 65536
+
+
+
+class CaptureReader:
+    """ Reads the records of a pcap or pcapng capture, via a memory map. """
+
+    def __init__(self, source, index_path=None):
+        """
+        Parameters:
+            source     -- The path to a capture file; or a binary file object with a file descriptor.
+            index_path -- The path of a file in which to keep an index of the capture's records. If omitted,
+                          the index is kept in a temporary file, which is discarded once the capture is closed.
+        """
+
+        if isinstance(source, (str, bytes, os.PathLike)):
+            with open(source, 'rb') as file:
+                self._mapping = self._map(file)
+                self._status  = os.fstat(file.fileno())
+        else:
+            self._mapping = self._map(source)
+            self._status  = os.fstat(source.fileno())
+
+        self._data       = memoryview(self._mapping).toreadonly()
+        self._index_path = index_path
+
+        # Our index; and the interfaces it refers to, across every section of the capture.
+        self._interfaces    = []
+        self._index         = None
+        self._index_mapping = None
+
+        # True while a pass over the capture is building our index.
+        self._indexing      = False
+
+        if len(self._data) < 4:
+            raise ValueError("capture file is truncated")
+
+        # Figure out which format we're reading.
+        magic = int.from_bytes(self._data[0:4], 'little')
+        if magic == _PCAPNG_SECTION_HEADER:
+            self._format = 'pcapng'
+        elif (magic in _PCAP_MAGICS) or (int.from_bytes(self._data[0:4], 'big') in _PCAP_MAGICS):
+            self._format = 'pcap'
+            self._read_pcap_header()
+        else:
+            raise ValueError("not a pcap or pcapng file")
+
+        if index_path is not None:
+            self._load_index()
+
+
+    @staticmethod
+    def _map(file):
+        """ Creates a read-only memory map of an entire file. """
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+    def close(self):
+        """ Closes the capture, and its index.
+
+        Any records' data views must be released before the capture can be closed.
+        """
+
+        if isinstance(self._index, memoryview):
+            self._index.release()
+        if self._index_mapping is not None:
+            self._index_mapping.close()
+
+        self._data.release()
+        self._mapping.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *_):
+        self.close()
+
+
+    @property
+    def link_types(self):
+        """ The set of link types of the capture's interfaces; which are only all known after a complete pass. """
+        return {interface.link_type for interface in self._interfaces}
+
+
+    #
+    # Walking the capture.
+    #
+
+    def _read_pcap_header(self):
+        """ Reads a pcap file header; which describes its single interface. """
+
+        data = self._data
+        if len(data) < 24:
+            raise ValueError("pcap file header is truncated")
+
+        byteorder  = '<' if int.from_bytes(data[0:4], 'little') in _PCAP_MAGICS else '>'
+        resolution = _PCAP_MAGICS[struct.unpack_from(byteorder + "I", data)[0]]
+        link_type  = struct.unpack_from(byteorder + "I", data, 20)[0] & 0x0FFFFFFF
+
+        self._interfaces = [_Interface(link_type, byteorder, resolution)]
+
+
+    def _read_interface(self, offset, length, byteorder):
+        """ Reads a pcapng interface description block. """
+
+        structs = _STRUCTS[byteorder]
+        link_type, _, _ = structs['interface'].unpack_from(self._data, offset + 8)
+
+        # Find the interface's timestamp resolution, if it has one.
+        resolution = 6
+        position   = offset + 16
+        end        = offset + length - 4
+
+        while position + 4 <= end:
+            code, option_length = structs['option'].unpack_from(self._data, position)
+            if code == 0:
+                break
+            if (code == _PCAPNG_OPTION_TSRESOL) and (option_length >= 1):
+                resolution = self._data[position + 4]
+
+            position += 4 + ((option_length + 3) & ~3)
+
+        return _Interface(link_type, byteorder, resolution)
+
+
+    def _walk(self, interfaces):
+        """ Yields the (offset, interface number) of each record in the capture.
+
+        Parameters:
+            interfaces -- A list to which each of a pcapng capture's interfaces is appended, as it's found.
+                          The interface numbers we yield are indices into this list.
+        """
+
+        data = self._data
+        size = len(data)
+
+        if self._format == 'pcap':
+            header   = _STRUCTS[self._interfaces[0].byteorder]['pcap_record']
+            position = 24
+
+            while position + 16 <= size:
+                _, _, captured_length, _ = header.unpack_from(data, position)
+                if position + 16 + captured_length > size:
+                    break
+
+                yield position, 0
+                position += 16 + captured_length
+
+            return
+
+        # pcapng files consist of sections; each with their own byte order, and their own interfaces.
+        section_interfaces = []
+        byteorder = '<'
+        position  = 0
+
+        while position + 12 <= size:
+            block_type = int.from_bytes(data[position:position + 4], 'little')
+
+            if block_type == _PCAPNG_SECTION_HEADER:
+                byteorder = '<' if int.from_bytes(data[position + 8:position + 12], 'little') == _PCAPNG_BYTE_ORDER_MAGIC else '>'
+                section_interfaces = []
+            else:
+                block_type = int.from_bytes(data[position:position + 4], 'little' if byteorder == '<' else 'big')
+
+            _, length = _STRUCTS[byteorder]['block_header'].unpack_from(data, position)
+            if (length < 12) or (length % 4):
+                raise ValueError(f"pcapng block at offset {position} has an invalid length {length}")
+            if position + length > size:
+                break
+
+            if block_type == _PCAPNG_INTERFACE:
+                section_interfaces.append(len(interfaces))
+                interfaces.append(self._read_interface(position, length, byteorder))
+
+            elif block_type == _PCAPNG_ENHANCED_PACKET:
+                interface = _STRUCTS[byteorder]['simple_packet'].unpack_from(data, position + 8)[0]
+                if interface >= len(section_interfaces):
+                    raise ValueError(f"pcapng packet at offset {position} refers to an unknown interface")
+                yield position, section_interfaces[interface]
+
+            elif block_type == _PCAPNG_SIMPLE_PACKET:
+                if not section_interfaces:
+                    raise ValueError(f"pcapng packet at offset {position} precedes any interfaces")
+                yield position, section_interfaces[0]
+
+            position += length
+
+
+    def _read_record(self, interfaces, number, offset, interface_number):
+        """ Creates a CaptureRecord for the record at the given offset; whose interface is in `interfaces`. """
+
+        data      = self._data
+        interface = interfaces[interface_number]
+        structs   = _STRUCTS[interface.byteorder]
+
+        if self._format == 'pcap':
+            seconds, fraction, captured_length, original_length = structs['pcap_record'].unpack_from(data, offset)
+            timestamp    = (seconds * 1_000_000_000) + interface.to_nanoseconds(fraction)
+            interface_id = 0
+            start        = offset + 16
+
+        else:
+            block_type, length = structs['block_header'].unpack_from(data, offset)
+
+            if block_type == _PCAPNG_ENHANCED_PACKET:
+                interface_id, high, low, captured_length, original_length = structs['enhanced_packet'].unpack_from(data, offset + 8)
+                timestamp = interface.to_nanoseconds((high << 32) | low)
+                start     = offset + 28
+
+            # Simple packet blocks always belong to their section's first interface, and have no timestamps.
+            else:
+                original_length = structs['simple_packet'].unpack_from(data, offset + 8)[0]
+                captured_length = min(original_length, length - 16)
+                timestamp       = None
+                interface_id    = 0
+                start           = offset + 12
+
+        return CaptureRecord(number, timestamp, interface.link_type, interface_id, original_length,
+            data[start:start + captured_length], interface.byteorder)
+
+
+    def __iter__(self):
+        """ Yields each of the capture's records, in order; building our index, if we don't have one yet. """
+
+        if self._index is not None:
+            yield from self.records()
+            return
+
+        # Only one pass builds our index. Any that start while it's in progress walk the capture on their own,
+        # with their own list of its interfaces; so they don't disturb the first.
+        if self._indexing:
+            interfaces = self._interfaces if (self._format == 'pcap') else []
+            for number, (offset, interface_number) in enumerate(self._walk(interfaces)):
+                yield self._read_record(interfaces, number, offset, interface_number)
+            return
+
+        # Hint to the OS that we'll be reading through the capture once; so it can read ahead, and drop pages behind us.
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self._mapping.madvise(mmap.MADV_SEQUENTIAL)
+
+        builder = self._start_index()
+        try:
+            interfaces = self._interfaces
+            for number, (offset, interface_number) in enumerate(self._walk(interfaces)):
+                builder.add(offset, interface_number)
+                yield self._read_record(interfaces, number, offset, interface_number)
+
+            self._finish_index(builder)
+        finally:
+            builder.close()
+            self._indexing = False
+
+
+    #
+    # Indexing.
+    #
+
+    def _start_index(self):
+        """ Prepares to build our index, during a pass over the capture; returning an _IndexBuilder. """
+
+        if self._indexing:
+            raise RuntimeError("the capture's index is already being built, by a pass over it that hasn't finished")
+
+        # pcapng captures' interfaces are learned as we go.
+        if self._format == 'pcapng':
+            self._interfaces = []
+
+        builder = _IndexBuilder(self._index_path)
+        self._indexing = True
+        return builder
+
+
+    def _finish_index(self, builder):
+        """ Completes our index, once we've walked the whole capture. """
+
+        with builder.finish(self._signature(), self._interfaces) as file:
+            self._use_index(file)
+
+
+    def _signature(self):
+        """ Returns the (size, checksum, modification time, inode) that identify our capture in its index. """
+
+        data  = self._data
+        block = _INDEX_CHECKED_BLOCK_SIZE
+
+        # Checking the data at each end of the capture catches captures rewritten without changing their size,
+        # or their modification time; and the modification time catches those modified anywhere else.
+        checksum = zlib.crc32(data[:block])
+        if len(data) > block:
+            checksum = zlib.crc32(data[max(block, len(data) - block):], checksum)
+
+        return len(data), checksum, self._status.st_mtime_ns, self._status.st_ino
+
+
+    def _load_index(self):
+        """ Loads our index file, if it exists and describes our capture. """
+
+        try:
+            with open(self._index_path, 'rb') as file:
+                self._use_index(file)
+        except FileNotFoundError:
+            pass
+
+
+    def _use_index(self, file):
+        """ Maps an open index file, and uses it as our index; if it describes our capture. """
+
+        try:
+            mapping = self._map(file)
+        except ValueError:
+            return
+
+        try:
+            magic, version, _, capture_size, count, interface_count, checksum, modified, inode = _INDEX_HEADER.unpack_from(mapping)
+            entries_end = _INDEX_HEADER.size + (count * _INDEX_ENTRY.size)
+
+            # Ignore any index that's damaged, or that was built for a different (or since modified) capture.
+            if (magic != _INDEX_MAGIC) or (version != _INDEX_VERSION) or \
+                    ((capture_size, checksum, modified, inode) != self._signature()) or \
+                    (len(mapping) != entries_end + (interface_count * _INDEX_INTERFACE.size)):
+                mapping.close()
+                return
+
+        except struct.error:
+            mapping.close()
+            return
+
+        self._interfaces = []
+        for position in range(interface_count):
+            link_type, byteorder, resolution = _INDEX_INTERFACE.unpack_from(mapping, entries_end + position * _INDEX_INTERFACE.size)
+            self._interfaces.append(_Interface(link_type, byteorder.decode(), resolution))
+
+        self._index_mapping = mapping
+        self._index = memoryview(mapping)[_INDEX_HEADER.size:entries_end]
+
+        # Our entries are little endian; so we can only use them in place on little-endian hosts.
+        if sys.byteorder == 'little':
+            self._index = self._index.cast('Q')
+        else:
+            self._index = array('Q', [entry for (entry,) in _INDEX_ENTRY.iter_unpack(self._index)])
+
+
+    def build_index(self):
+        """ Walks the capture to build our index, if we don't already have one; without creating any records.
+
+        Raises a RuntimeError if the index is already being built by an unfinished iteration over the capture;
+        in which case, the capture's length and individual records aren't available until it's finished.
+        """
+
+        if self._index is not None:
+            return
+
+        builder = self._start_index()
+        try:
+            for offset, interface_number in self._walk(self._interfaces):
+                builder.add(offset, interface_number)
+
+            self._finish_index(builder)
+        finally:
+            builder.close()
+            self._indexing = False
+
+
+    def __len__(self):
+        self.build_index()
+        return len(self._index)
+
+
+    def __getitem__(self, number):
+        """ Returns the record with the given number; building our index first, if necessary. """
+
+        self.build_index()
+
+        if number < 0:
+            number += len(self._index)
+        if not 0 <= number < len(self._index):
+            raise IndexError("capture record number out of range")
+
+        entry = self._index[number]
+        return self._read_record(self._interfaces, number, entry & _OFFSET_MASK, entry >> 48)
+
+
+    def records(self, start=0, stop=None):
+        """ Yields the records numbered from `start` up to (but excluding) `stop`; seeking directly to the first. """
+
+        self.build_index()
+
+        index      = self._index
+        interfaces = self._interfaces
+        stop       = len(index) if stop is None else min(stop, len(index))
+
+        for number in range(start, stop):
+            entry = index[number]
+            yield self._read_record(interfaces, number, entry & _OFFSET_MASK, entry >> 48)
+
+
+
+class _IndexBuilder:
+    """ Collects index entries during a pass over a capture, into an index file.
+
+    If no path is given, the index is written to an anonymous temporary file; which is removed once it's closed,
+    and once any memory maps of it are.
+    """
+
+    def __init__(self, path):
+        self.path    = path
+        self.entries = array('Q')
+        self.count   = 0
+
+        if path is not None:
+            self._file = open(f"{path}.tmp", 'wb')
+        else:
+            self._file = tempfile.TemporaryFile()
+
+        # Leave room for our header; which we'll write once we know what it contains.
+        self._file.write(bytes(_INDEX_HEADER.size))
+
+
+    def add(self, offset, interface_number):
+        """ Adds an entry for the record at the given offset. """
+
+        self.entries.append(offset | (interface_number << 48))
+
+        # Only hold onto a limited number of entries at once.
+        if len(self.entries) >= _INDEX_BUFFER_ENTRIES:
+            self._flush()
+
+
+    def _flush(self):
+        """ Writes out our buffered entries; which are always little endian. """
+
+        entries = self.entries
+        if sys.byteorder != 'little':
+            entries = array('Q', entries)
+            entries.byteswap()
+
+        self._file.write(entries.tobytes())
+        self.count += len(self.entries)
+        del self.entries[:]
+
+
+    def finish(self, signature, interfaces):
+        """ Completes our index file, and moves it into place; returning the completed file, opened for reading. """
+
+        self._flush()
+
+        for interface in interfaces:
+            self._file.write(_INDEX_INTERFACE.pack(int(interface.link_type), interface.byteorder.encode(), interface.resolution))
+
+        self._file.seek(0)
+        capture_size, checksum, modified, inode = signature
+        self._file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, 0, capture_size, self.count, len(interfaces),
+            checksum, modified, inode))
+
+        file, self._file = self._file, None
+
+        # Temporary files have nowhere to be moved to; so they're used as they are.
+        if self.path is None:
+            file.flush()
+            return file
+
+        file.close()
+        os.replace(f"{self.path}.tmp", self.path)
+        return open(self.path, 'rb')
+
+
+    def close(self):
+        """ Discards any incomplete index file. """
+
+        if self._file is not None:
+            self._file.close()
+            if self.path is not None:
+                os.remove(f"{self.path}.tmp")
+            self._file = None
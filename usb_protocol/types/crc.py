@@ -0,0 +1,277 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+Table-driven implementations of the CRCs used by USB 2.0 packets.
+
+Token, SOF and SPLIT packets are protected by a five-bit CRC (polynomial x^5 + x^2 + 1); and data packets
+by a sixteen-bit CRC (polynomial x^16 + x^15 + x^2 + 1). Both are computed over fields in the order they're
+transmitted, least significant bit first; and both are stored in packets in that same form:
+
+.. code-block:: python
+
+    # An IN token, for endpoint 1 of device 3; as captured from the bus.
+    token = bytes([0x69, 0x83, 0xE0])
+
+    field = token[1] | (token[2] << 8)
+    assert crc5(field & 0x7FF) == field >> 11
+
+    # A data packet ends with the CRC of its payload, little endian.
+    packet = bytes([0xC3, 0x80, 0x06, 0x00, 0x01, 0x00, 0x00, 0x40, 0x00, 0xDD, 0x94])
+    assert crc16(packet[1:-2]) == int.from_bytes(packet[-2:], byteorder='little')
+
+Large captures can be re-validated in bulk, if NumPy is installed; using `crc5_batch()` over an array of
+token fields, and `crc16_batch()` over a buffer of payloads packed back to back.
+"""
+
+import sys
+
+from .._lazy import import_optional
+
+# The polynomials for each of our CRCs, in their bit-reversed forms; and their initial values.
+CRC5_POLYNOMIAL  = 0b10100
+CRC5_INITIAL     = 0b11111
+CRC16_POLYNOMIAL = 0xA001
+CRC16_INITIAL    = 0xFFFF
+
+# Running a CRC16 over a payload followed by its CRC leaves this value, before inversion, if the CRC is correct.
+CRC16_RESIDUAL   = 0xB001
+
+
+def _build_table(polynomial, bit_count, entries):
+    """ Builds a table mapping each register value to the register after shifting in `bit_count` zero bits. """
+
+    table = []
+    for crc in range(entries):
+        for _ in range(bit_count):
+            crc = (crc >> 1) ^ polynomial if (crc & 1) else (crc >> 1)
+        table.append(crc)
+
+    return tuple(table)
+
+
+# Our lookup tables; which are only built once they're needed.
+_crc5_byte_table   = None
+_crc5_token_table  = None
+_crc16_table       = None
+_crc16_word_table  = None
+
+# Our word table processes payloads as native 16-bit words; which only works on little-endian hosts.
+_USE_WORD_TABLE = (sys.byteorder == 'little')
+
+
+def get_crc5_byte_table():
+    """ Returns a 256-entry table for advancing a CRC5 register by one byte. """
+
+    global _crc5_byte_table
+
+    if _crc5_byte_table is None:
+        _crc5_byte_table = _build_table(CRC5_POLYNOMIAL, 8, 256)
+
+    return _crc5_byte_table
+
+
+def get_crc5_token_table():
+    """ Returns a 2048-entry table mapping each 11-bit token field (address and endpoint, or frame number) to its CRC5. """
+
+    global _crc5_token_table
+
+    if _crc5_token_table is None:
+        byte_table = get_crc5_byte_table()
+        last_bits  = _build_table(CRC5_POLYNOMIAL, 3, 32)
+
+        # Each entry is the CRC of a whole byte, followed by the three remaining bits.
+        _crc5_token_table = tuple(
+            last_bits[byte_table[(CRC5_INITIAL ^ value) & 0xFF] ^ (value >> 8)] ^ CRC5_INITIAL
+            for value in range(2048)
+        )
+
+    return _crc5_token_table
+
+
+def get_crc16_table():
+    """ Returns a 256-entry table for advancing a CRC16 register by one byte. """
+
+    global _crc16_table
+
+    if _crc16_table is None:
+        _crc16_table = _build_table(CRC16_POLYNOMIAL, 8, 256)
+
+    return _crc16_table
+
+
+def get_crc16_word_table():
+    """ Returns a 65536-entry table for advancing a CRC16 register by one little-endian, 16-bit word. """
+
+    global _crc16_word_table
+
+    if _crc16_word_table is None:
+        table = get_crc16_table()
+
+        # Advancing by a word is advancing by its low byte, and then its high byte.
+        low_bytes = [table[value & 0xFF] ^ (value >> 8) for value in range(65536)]
+        _crc16_word_table = tuple(table[crc & 0xFF] ^ (crc >> 8) for crc in low_bytes)
+
+    return _crc16_word_table
+
+
+def crc5(value, bit_length=11):
+    """ Computes the USB CRC5 of a packet field.
+
+    Parameters:
+        value      -- The field to compute a CRC over, as an integer; its least significant bit is sent first.
+        bit_length -- The length of the field, in bits; 11 for tokens and SOFs, and 19 for SPLIT tokens.
+
+    Returns the CRC, as it appears in the packet's final five bits.
+    """
+
+    # Tokens and SOFs are by far the most common; so they have their own table.
+    if bit_length == 11:
+        return (_crc5_token_table or get_crc5_token_table())[value & 0x7FF]
+
+    table = _crc5_byte_table or get_crc5_byte_table()
+    crc   = CRC5_INITIAL
+
+    # Process whole bytes using our table...
+    while bit_length >= 8:
+        crc = table[(crc ^ value) & 0xFF]
+        value >>= 8
+        bit_length -= 8
+
+    # ... and then any remaining bits, one at a time.
+    for _ in range(bit_length):
+        crc = (crc >> 1) ^ CRC5_POLYNOMIAL if ((crc ^ value) & 1) else (crc >> 1)
+        value >>= 1
+
+    return crc ^ CRC5_INITIAL
+
+
+def crc16_update(crc, data):
+    """ Advances a CRC16 register over the given bytes; without the final inversion.
+
+    Parameters:
+        crc  -- The current value of the CRC register; CRC16_INITIAL for a new packet.
+        data -- A bytes-like object containing the data to process.
+    """
+
+    table = _crc16_table or get_crc16_table()
+    data  = memoryview(data).cast('B')
+
+    # Longer payloads are processed a word at a time; which halves the number of trips around our loop.
+    if (len(data) >= 32) and _USE_WORD_TABLE:
+        word_table = _crc16_word_table or get_crc16_word_table()
+        word_bytes = len(data) & ~1
+
+        for word in data[:word_bytes].cast('H'):
+            crc = word_table[crc ^ word]
+
+        data = data[word_bytes:]
+
+    for byte in data:
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+
+    return crc
+
+
+def crc16(data):
+    """ Computes the USB CRC16 of a data packet's payload; as it appears, little endian, at the end of the packet. """
+    return crc16_update(CRC16_INITIAL, data) ^ 0xFFFF
+
+
+#
+# Batch versions of our CRCs; for re-validating large captures. These require NumPy.
+#
+
+# NumPy copies of our lookup tables; created the first time they're needed.
+_numpy_tables = None
+
+def _get_numpy_tables(numpy):
+    """ Returns our (CRC5 token, CRC16 byte, CRC16 word) tables, as NumPy arrays. """
+
+    global _numpy_tables
+
+    if _numpy_tables is None:
+        _numpy_tables = (
+            numpy.array(get_crc5_token_table(), dtype=numpy.uint8),
+            numpy.array(get_crc16_table(),      dtype=numpy.uint16),
+            numpy.array(get_crc16_word_table(), dtype=numpy.uint16),
+        )
+
+        for table in _numpy_tables:
+            table.flags.writeable = False
+
+    return _numpy_tables
+
+
+def crc5_batch(fields):
+    """ Computes the CRC5s of many 11-bit token fields (address and endpoint, or frame number) at once.
+
+    Parameters:
+        fields -- An array of token fields; as a NumPy array, or anything convertible to one. Any bits
+                  above the lowest 11 are ignored, so the 16 bits following a token's PID may be passed directly.
+
+    Returns a NumPy uint8 array containing the CRC5 of each field.
+    """
+
+    numpy = import_optional('numpy', "crc5_batch()")
+    crc5_table, _, _ = _get_numpy_tables(numpy)
+
+    return crc5_table[numpy.asarray(fields) & 0x7FF]
+
+
+def crc16_batch(data, offsets):
+    """ Computes the CRC16s of many payloads, packed one after another into a single buffer.
+
+    Parameters:
+        data    -- A bytes-like object or NumPy uint8 array containing each of the payloads, back to back.
+        offsets -- The offset of the start of each payload in `data`, in ascending order. Each payload ends
+                   where the next begins; and the last at the end of `data`.
+
+    Returns a NumPy uint16 array containing the CRC16 of each payload.
+    """
+
+    numpy = import_optional('numpy', "crc16_batch()")
+    _, byte_table, word_table = _get_numpy_tables(numpy)
+
+    data    = numpy.frombuffer(data, dtype=numpy.uint8) if not isinstance(data, numpy.ndarray) else data
+    offsets = numpy.asarray(offsets, dtype=numpy.intp)
+
+    if len(offsets) == 0:
+        return numpy.zeros(0, dtype=numpy.uint16)
+
+    lengths = numpy.diff(offsets, append=len(data))
+    if (offsets[0] < 0) or (lengths < 0).any():
+        raise ValueError("payload offsets must be ascending, and within the payload data")
+
+    # We'll advance every payload's CRC together, a word at a time. Sorting our payloads longest-first
+    # means those that still have data left are always at the front of our arrays.
+    order   = numpy.argsort(-lengths, kind='stable')
+    starts  = offsets[order]
+    lengths = lengths[order]
+    crcs    = numpy.full(len(offsets), CRC16_INITIAL, dtype=numpy.uint16)
+
+    # Our words are little-endian; so we'll read them as pairs of bytes, which works on any host.
+    data16  = data.astype(numpy.uint16)
+
+    # For each position in our longest payload, find how many payloads have at least one, or at least two, bytes left.
+    descending = lengths[::-1]
+    for position in range(0, int(lengths[0]), 2):
+        with_words = len(lengths) - numpy.searchsorted(descending, position + 2)
+        with_bytes = len(lengths) - numpy.searchsorted(descending, position + 1)
+
+        # Payloads with a word left advance by a word...
+        if with_words:
+            indices = starts[:with_words] + position
+            words   = data16[indices] | (data16[indices + 1] << 8)
+            crcs[:with_words] = word_table[crcs[:with_words] ^ words]
+
+        # ... and any with a single (last) byte left advance by a byte.
+        if with_bytes > with_words:
+            active  = slice(with_words, with_bytes)
+            current = crcs[active]
+            crcs[active] = byte_table[(current ^ data16[starts[active] + position]) & 0xFF] ^ (current >> 8)
+
+    # Finally, put our CRCs back into their original order.
+    result = numpy.empty_like(crcs)
+    result[order] = crcs ^ 0xFFFF
+    return result
@@ -3,22 +3,130 @@
 #
 """ Type elements for defining USB descriptors. """
 
+import io
+import sys
+import operator
+import struct
+import importlib
 import unittest
 import construct
 
+from collections.abc import Mapping
+
+
+class _BufferStream:
+    """ Minimal read-only stream that reads a window of a buffer in place, without copying it.
+
+    This accepts any object supporting the buffer protocol (bytes, bytearray, memoryview, mmap, ...).
+    Only the bytes actually read by a parse are copied out of the buffer.
+    """
+
+    def __init__(self, buffer, start=0):
+        view = memoryview(buffer)
+        if view.format != 'B' or view.ndim != 1:
+            view = view.cast('B')
+
+        if not (0 <= start <= len(view)):
+            raise ValueError(f"offset {start} is outside of the provided buffer")
+
+        self._view     = view
+        self._start    = start
+        self._end      = len(view)
+        self._position = start
+
+
+    def limit(self, length):
+        """ Prevents this stream from reading more than `length` bytes past its start. """
+        self._end = min(self._start + length, len(self._view))
+
+
+    def release(self):
+        """ Releases our view of the underlying buffer; e.g. so an mmap can be closed. """
+        self._view.release()
+
+
+    def peek_byte(self):
+        """ Returns the next byte in the stream without consuming it; or None at end of stream. """
+        return self._view[self._position] if (self._position < self._end) else None
+
+
+    def read(self, length=-1):
+        if (length is None) or (length < 0):
+            end = self._end
+        else:
+            end = min(self._position + length, self._end)
+
+        data = self._view[self._position:end].tobytes()
+        self._position = end
+        return data
+
+
+    def tell(self):
+        return self._position
+
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        else:
+            position = self._end + offset
+
+        self._position = max(self._start, min(position, self._end))
+        return self._position
+
+
 class DescriptorFormat(construct.Struct):
     """
     Creates a Construct structure for a USB descriptor, and a corresponding version that
     supports parsing incomplete binary as `DescriptorType.Partial`, e.g. `DeviceDescriptor.Partial`.
+
+    The Partial version is only created the first time it's accessed.
     """
 
     def __init__(self, *subcons, _create_partial=True, **subconskw):
 
-        if _create_partial:
-            self.Partial = self._create_partial(*subcons, **subconskw) # pylint: disable=invalid-name
+        # Our Partial is only created the first time it's accessed; so hang on to what we need to build it.
+        self._partial_arguments = (subcons, subconskw) if _create_partial else None
+        self._partial           = None
+
+        # Note where we were defined, so our results can refer to us by name when pickled; see `get_identifier`.
+        self._module     = sys._getframe(1).f_globals.get('__name__') # pylint: disable=protected-access
+        self._parent     = None
+        self._identifier = None
 
         super().__init__(*subcons, **subconskw)
 
+        # Our compiled parser, descriptor numbers and record type are only computed the first time they're needed.
+        self._compiled           = None
+        self._descriptor_numbers = None
+        self._record_type        = None
+
+        # Map each of our public fields to the name we use for it in detail dictionaries; using any
+        # documentation on the field rather than its internal name.
+        self._pretty_names = {
+            subcon.name: (subcon.docs or subcon.name)
+                for subcon in self.subcons if subcon.name and not subcon.name.startswith('_')
+        }
+
+
+    @property
+    def Partial(self): # pylint: disable=invalid-name
+        """ A version of this format that can parse incomplete descriptors; created on first access. """
+
+        if self._partial is None:
+
+            # Partial formats don't have Partials of their own.
+            if self._partial_arguments is None:
+                raise AttributeError("Partial")
+
+            subcons, subconskw = self._partial_arguments
+            self._partial = self._create_partial(*subcons, **subconskw)
+            self._partial._parent = self
+
+        return self._partial
+
 
     @classmethod
     def _get_subcon_field_type(cls, subcon):
@@ -67,45 +175,510 @@ class DescriptorFormat(construct.Struct):
         return DescriptorFormat(*new_subcons, _create_partial=False, **subconskw)
 
 
+    def get_identifier(self):
+        """ Returns a string that identifies this format, e.g. 'usb_protocol.types.descriptors.standard:DeviceDescriptor'.
+
+        Identifiers are used to refer to formats when parse results are pickled; see `from_identifier`.
+        Only formats that are assigned to a module-level name (and their Partials) have identifiers.
+        """
+
+        if self._identifier is not None:
+            return self._identifier
+
+        if self._parent is not None:
+            self._identifier = f"{self._parent.get_identifier()}.Partial"
+            return self._identifier
+
+        # Find the name we were assigned to in the module that defined us.
+        module = sys.modules.get(self._module)
+        for name, value in vars(module or {}).items():
+            if value is self:
+                self._identifier = f"{self._module}:{name}"
+                return self._identifier
+
+        raise ValueError("only DescriptorFormats assigned to a module-level name have identifiers")
+
+
+    @staticmethod
+    def from_identifier(identifier):
+        """ Returns the DescriptorFormat with the given identifier; see `get_identifier`. """
+
+        module_name, _, path = identifier.partition(':')
+        descriptor_format = importlib.import_module(module_name)
+
+        for name in path.split('.'):
+            descriptor_format = getattr(descriptor_format, name)
+
+        return descriptor_format
+
+
+    def __reduce_ex__(self, protocol):
+
+        # Formats with identifiers are pickled by name; so they can be sent to (e.g.) worker processes.
+        try:
+            return (DescriptorFormat.from_identifier, (self.get_identifier(),))
+        except ValueError:
+            return super().__reduce_ex__(protocol)
+
+
+    def get_descriptor_numbers(self):
+        """ Returns the constant descriptor numbers this format declares, as a tuple of (offset, number).
+
+        Only the fixed-position fields at the start of the descriptor are considered; e.g. for most
+        class-specific descriptors, this yields the bDescriptorType and bDescriptorSubtype numbers.
+        """
+
+        # This is called for every descriptor we look up; so only compute it once.
+        if self._descriptor_numbers is not None:
+            return self._descriptor_numbers
+
+        numbers = []
+        offset  = 0
+
+        for subcon in self.subcons:
+            field_type = self._get_subcon_field_type(subcon)
+
+            if isinstance(field_type, DescriptorNumber):
+                numbers.append((offset, field_type.get_descriptor_number()))
+
+            # Stop once we reach a field whose position depends on the data.
+            try:
+                offset += subcon.sizeof()
+            except construct.SizeofError:
+                break
+
+        self._descriptor_numbers = tuple(numbers)
+        return self._descriptor_numbers
+
+
     @staticmethod
     def _to_detail_dictionary(descriptor, use_pretty_names=True):
-        result = {}
+        pretty_names = descriptor._format._pretty_names
 
-        # Loop over every entry in our descriptor context, and try to get a
-        # fancy name for it.
-        for key, value in descriptor.items():
+        # Include only the entries that are defined in our format, skipping any private members...
+        if not use_pretty_names:
+            return {key: value for key, value in descriptor.items() if key in pretty_names}
 
-            # Don't include any underscore-prefixed private members.
-            if key.startswith('_'):
-                continue
+        # ... and name them using their documentation, where we have it.
+        return {pretty_names[key]: value for key, value in descriptor.items() if key in pretty_names}
 
-            # If there's no definition for the given key in our format, # skip it.
-            if not hasattr(descriptor._format, key):
-                continue
 
-            # Try to apply any documentation on the given field rather than it's internal name.
-            format_element = getattr(descriptor._format, key)
-            detail_key = format_element.docs if (format_element.docs and use_pretty_names) else key
+    def get_detail_columns(self, use_pretty_names=True):
+        """ Returns the names of the columns produced by `to_detail_rows`, in order. """
+        return tuple(self._pretty_names.values()) if use_pretty_names else tuple(self._pretty_names)
 
-            # Finally, add the entry to our dict.
-            result[detail_key] = value
 
-        return result
+    def to_detail_rows(self, descriptors, use_pretty_names=True, as_tuples=False):
+        """ Converts a collection of descriptors parsed with this format into rows, for e.g. tabular export.
+
+        Parameters:
+            descriptors      -- An iterable of parsed descriptors (Containers or DescriptorRecords).
+            use_pretty_names -- If true, dictionary rows are keyed by each field's documentation, as with
+                                `_to_detail_dictionary`; otherwise, they're keyed by field name.
+            as_tuples        -- If true, each row is a tuple with an entry for each of `get_detail_columns()`;
+                                fields a descriptor doesn't have are None. Otherwise, each row is a dictionary.
+        """
+
+        fields = tuple(self._pretty_names)
+
+        if as_tuples:
+            rows   = []
+            getter = operator.itemgetter(*fields)
+
+            for descriptor in descriptors:
+
+                # Most descriptors have every field; so grab them all at once, when we can.
+                try:
+                    row = getter(descriptor)
+                    rows.append(row if len(fields) > 1 else (row,))
+                except KeyError:
+                    rows.append(tuple(descriptor.get(field) for field in fields))
+
+            return rows
+
+        keys = self.get_detail_columns(use_pretty_names)
+        return [
+            {key: descriptor[field] for key, field in zip(keys, fields) if field in descriptor}
+                for descriptor in descriptors
+        ]
+
+
+    def _emitbuild(self, code):
+        # We only compile our parsers; building always uses the interpreted path.
+        # Raising here asks construct to link in our existing builder instead.
+        raise NotImplementedError()
+
+
+    def get_compiled(self):
+        """ Returns a compiled version of this format, creating it on first use.
+
+        If this format can't be compiled, this format itself is returned; so the result
+        can always be used for parsing.
+        """
+
+        # Construct reports constructs it can't compile with NotImplementedError or one of its own
+        # errors; anything else is a genuine bug, and shouldn't be hidden behind the interpreted parser.
+        if self._compiled is None:
+            try:
+                self._compiled = self.compile()
+            except (NotImplementedError, construct.ConstructError):
+                self._compiled = self
+
+        return self._compiled
+
+
+    @staticmethod
+    def _parse_compiled(parse, data, **context_keywords):
+        """ Runs a compiled parse; reporting truncated data the same way the interpreted parser does. """
+
+        # Compiled parsers unpack fixed-size fields with struct directly; so short reads surface
+        # as a struct.error, rather than the StreamError our callers expect.
+        try:
+            return parse(data, **context_keywords)
+        except struct.error as e:
+            raise construct.StreamError(f"stream read less than specified amount ({e})") from e
+
+
+    def parse(self, data, *, compiled=False, **context_keywords):
+        """ Hook on the parent parse() method which attaches a few methods.
+
+        Parameters:
+            data     -- The binary data to be parsed.
+            compiled -- If true, the parse is run with a compiled version of this format,
+                        which is created and cached the first time it's requested.
+        """
+
+        # Use construct to run the parse itself...
+        if compiled:
+            result = self._parse_compiled(self.get_compiled().parse, bytes(data), **context_keywords)
+        else:
+            result = super().parse(bytes(data), **context_keywords)
 
+        # ... and then bind our extra methods to it.
+        return self._bind_result(result)
 
-    def parse(self, data, **context_keywords):
-        """ Hook on the parent parse() method which attaches a few methods. """
+
+    def parse_from(self, buffer, offset=0, *, length=None, compiled=False, **context_keywords):
+        """ Parses a descriptor directly out of a larger buffer, without copying the buffer.
+
+        Parameters:
+            buffer   -- Any object supporting the buffer protocol; e.g. bytes, bytearray, memoryview or mmap.
+            offset   -- The offset into the buffer at which the descriptor starts.
+            length   -- The maximum number of bytes the descriptor may occupy. If not provided, and this
+                        format starts with a bLength field, the descriptor's own bLength is used.
+            compiled -- If true, the parse is run with this format's compiled parser.
+
+        Returns a tuple of (descriptor, consumed); where consumed is the number of bytes read from the buffer.
+        """
+
+        stream = _BufferStream(buffer, offset)
+
+        # If we can, bound our parse by the descriptor's own length, so greedy fields
+        # don't run on into whatever follows this descriptor in the buffer.
+        if (length is None) and (self.subcons[0].name == 'bLength'):
+            length = stream.peek_byte()
+
+        if length is not None:
+            stream.limit(length)
 
         # Use construct to run the parse itself...
-        result = super().parse(bytes(data), **context_keywords)
+        try:
+            if compiled:
+                result = self._parse_compiled(self.get_compiled().parse_stream, stream, **context_keywords)
+            else:
+                result = super().parse_stream(stream, **context_keywords)
+        finally:
+            stream.release()
+
+        # ... and then bind our extra methods to it.
+        return self._bind_result(result), stream.tell() - offset
+
+
+    def get_record_type(self):
+        """ Returns the DescriptorRecord subclass used by `parse_record`, creating it on first use.
 
-        # ... and then bind our static to_detail_dictionary to it.
+        Raises a ValueError if this format doesn't have a fixed layout of integer fields.
+        """
+
+        if self._record_type is None:
+            self._record_type = DescriptorRecord.create_type(self)
+
+        return self._record_type
+
+
+    def parse_record(self, buffer, offset=0):
+        """ Parses a fixed-layout descriptor into a compact DescriptorRecord, rather than a Container.
+
+        Records are decoded with a single struct unpack, and support the same dict-style and attribute
+        access as Containers. Like `parse_from`, this doesn't copy the buffer, and the parse is bounded
+        by the descriptor's bLength.
+
+        Parameters:
+            buffer -- Any object supporting the buffer protocol.
+            offset -- The offset into the buffer at which the descriptor starts.
+        """
+        return self.get_record_type().unpack_from(buffer, offset)
+
+
+    def _bind_result(self, result):
+        """ Converts a parsed result into a DescriptorContainer, and attaches our format to it. """
+
+        result = DescriptorContainer(result)
         result._format = self
-        result._to_detail_dictionary = self._to_detail_dictionary.__get__(result, type(result))
+
+        # Construct leaves behind the stream it parsed from; which can hold a whole copy of the input,
+        # or a view of a buffer that's since been released. We don't need it once the parse is done.
+        result.pop('_io', None)
 
         return result
 
 
+class DescriptorContainer(construct.Container):
+    """ The Container type returned when parsing DescriptorFormats.
+
+    These carry a reference to the format that parsed them, as `_format`. When pickled, only the format's
+    identifier is kept; the format itself is looked up again the first time it's needed.
+    """
+
+    def __getattr__(self, name):
+
+        # If we've been unpickled, find our format on first use.
+        if (name == '_format') and ('_format_identifier' in vars(self)):
+            self._format = DescriptorFormat.from_identifier(vars(self).pop('_format_identifier'))
+            return self['_format']
+
+        return super().__getattr__(name)
+
+
+    def _to_detail_dictionary(self, use_pretty_names=True):
+        """ Returns a dictionary of this descriptor's fields; keyed by their documentation, if requested. """
+        descriptor_format = self._format
+        return descriptor_format._to_detail_dictionary(self, use_pretty_names)
+
+
+    def __reduce__(self):
+        fields     = [(key, value) for key, value in self.items() if key not in ('_format', '_io')]
+        identifier = vars(self).get('_format_identifier') or self._format.get_identifier()
+        return (_restore_container, (identifier, fields))
+
+
+
+def _restore_container(identifier, fields):
+    """ Unpickles a DescriptorContainer; deferring the lookup of its format until it's needed. """
+
+    container = DescriptorContainer(fields)
+    object.__setattr__(container, '_format_identifier', identifier)
+
+    return container
+
+
+def _restore_record(identifier, values):
+    """ Unpickles a DescriptorRecord. """
+    return DescriptorFormat.from_identifier(identifier).get_record_type()(*values)
+
+
+
+class DescriptorRecord(Mapping):
+    """ Compact, read-only result type for descriptors with a fixed layout; see `DescriptorFormat.parse_record`.
+
+    Each format gets its own subclass, with a slot per field. Records behave like the Containers
+    returned by `parse`: fields can be accessed as attributes or keys, and optional trailing fields
+    that aren't present are None.
+    """
+
+    __slots__ = ()
+
+    # Populated for each subclass by `create_type`.
+    _format      = None
+    _fields      = ()
+    _layouts     = ()
+    _constants   = ()
+    _decoders    = ()
+    _field_count = 0
+
+
+    @staticmethod
+    def _analyze_subcon(subcon):
+        """ Returns (format character, constant, decoders, optional) for a field; or None if it can't be part of a record. """
+
+        constant = None
+        decoders = []
+        optional = False
+
+        # Peel back the layers construct has wrapped around our field, noting anything that affects parsing...
+        while not isinstance(subcon, construct.FormatField):
+
+            if isinstance(subcon, (construct.Renamed, construct.Default)):
+                subcon = subcon.subcon
+
+            # Optional fields are Selects between the field and Pass.
+            elif isinstance(subcon, construct.Select) and len(subcon.subcons) == 2 and (subcon.subcons[1] is construct.Pass):
+                optional = True
+                subcon   = subcon.subcons[0]
+
+            elif isinstance(subcon, DescriptorNumber):
+                return 'B', subcon.number, decoders, optional
+
+            elif isinstance(subcon, construct.Const):
+                constant = subcon.value
+                subcon   = subcon.subcon
+
+            # ... including adapters, which we'll apply from the innermost out.
+            elif isinstance(subcon, construct.Adapter):
+                decoders.insert(0, subcon)
+                subcon = subcon.subcon
+
+            else:
+                return None
+
+        # We only handle little-endian fields, which all of our descriptors use.
+        if not subcon.fmtstr.startswith('<'):
+            return None
+
+        return subcon.fmtstr[1:], constant, decoders, optional
+
+
+    @classmethod
+    def create_type(cls, descriptor_format):
+        """ Creates a DescriptorRecord subclass for the given format. """
+
+        fields    = []
+        layout    = '<'
+        layouts   = []
+        constants = []
+        decoders  = []
+
+        for subcon in descriptor_format.subcons:
+
+            # Private trailing fields (e.g. reserved bytes) aren't part of our records.
+            if subcon.name.startswith('_') and (subcon is descriptor_format.subcons[-1]):
+                continue
+
+            analysis = cls._analyze_subcon(subcon)
+            if analysis is None:
+                raise ValueError(f"field {subcon.name} doesn't have a fixed layout; this format can't be parsed into a record")
+
+            format_character, constant, field_decoders, optional = analysis
+
+            # Each optional field starts a longer layout; which we'll use if the descriptor is long enough.
+            if optional:
+                layouts.append((struct.Struct(layout), len(fields)))
+            elif layouts:
+                raise ValueError("only trailing fields can be optional in a record")
+
+            if constant is not None:
+                constants.append((len(fields), constant))
+            if field_decoders:
+                decoders.append((len(fields), tuple(field_decoders)))
+
+            fields.append(subcon.name)
+            layout += format_character
+
+        layouts.append((struct.Struct(layout), len(fields)))
+
+        namespace = {
+            '__slots__':    tuple(fields),
+            '_format':      descriptor_format,
+            '_fields':      tuple(fields),
+            '_constants':   tuple(constants),
+            '_decoders':    tuple(decoders),
+            '_field_count': len(fields),
+
+            # We keep our layouts longest-first, so we can pick the first one that fits.
+            '_layouts':     tuple(reversed(layouts)),
+        }
+
+        # Generate a simple __init__, which is much faster than setting each of our slots by name.
+        arguments = ', '.join(fields)
+        assignments = ''.join(f"\n    self.{name} = {name}" for name in fields)
+        exec(f"def __init__(self, {arguments}):{assignments}", namespace) # pylint: disable=exec-used
+
+        return type('DescriptorRecord', (cls,), namespace)
+
+
+    @classmethod
+    def unpack_from(cls, buffer, offset=0):
+        """ Decodes a record from the descriptor at the given offset into the buffer. """
+
+        # Figure out how many bytes our descriptor occupies; bounded by its bLength.
+        available = len(buffer) - offset
+        if available <= 0:
+            raise construct.StreamError("stream read less than specified amount, expected 1, found 0")
+
+        length = min(buffer[offset], available)
+
+        # Find the longest layout that fits in our descriptor...
+        for layout, field_count in cls._layouts:
+            if layout.size <= length:
+                break
+        else:
+            raise construct.StreamError(f"stream read less than specified amount, expected {layout.size}, found {length}")
+
+        values = layout.unpack_from(buffer, offset)
+
+        # ... validate our constants...
+        for index, constant in cls._constants:
+            if values[index] != constant:
+                raise construct.ConstError(f"parsing expected {constant!r} but parsed {values[index]!r}")
+
+        # ... and apply any adapters.
+        if cls._decoders or field_count < cls._field_count:
+            values = list(values) + [None] * (cls._field_count - field_count)
+
+            context = construct.Container()
+            for index, decoders in cls._decoders:
+                if values[index] is not None:
+                    for decoder in decoders:
+                        values[index] = decoder._decode(values[index], context, "(record)")
+
+        return cls(*values)
+
+
+    def to_detail_dictionary(self, use_pretty_names=True):
+        """ Returns a dictionary of this descriptor's fields; keyed by their documentation, if requested. """
+        return self._format._to_detail_dictionary(self, use_pretty_names)
+
+    # Allow records to be used anywhere a parsed Container's detail dictionary is.
+    _to_detail_dictionary = to_detail_dictionary
+
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return self._field_count
+
+    def __contains__(self, key):
+        return key in self._fields
+
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+
+        # Like construct's Containers, we ignore private fields when comparing.
+        public = {key: value for key, value in other.items() if not key.startswith('_')}
+        return dict(self.items()) == public
+
+    __hash__ = None
+
+
+    def __reduce__(self):
+        values = tuple(getattr(self, name) for name in self._fields)
+        return (_restore_record, (self._format.get_identifier(), values))
+
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+
+
 class DescriptorNumber(construct.Const):
     """ Trivial wrapper class that denotes a particular Const as the descriptor number. """
 
@@ -131,31 +704,139 @@ class DescriptorNumber(construct.Const):
         return const_bytes[0]
 
 
+    def _emitparse(self, code):
+        return f"{super()._emitparse(code)}[0]"
+
+
     def get_descriptor_number(self):
         """ Returns this constant's associated descriptor number."""
         return self.number
 
 
+class BCDVersion:
+    """ Exact representation of a binary-coded-decimal version number, such as a bcdUSB field.
+
+    Unlike the floats BCD fields are normally parsed into, these keep every digit; so e.g. 2.10 and 2.01
+    stay distinct, and always print as written. They compare equal to the equivalent float.
+    """
+
+    __slots__ = ('major', 'minor')
+
+    def __init__(self, major, minor=0):
+        """
+        Parameters:
+            major -- The major version number, in the range 0-99; or a string such as "2.10".
+            minor -- The minor version number, in hundredths; e.g. 10 for version 2.10.
+        """
+
+        if isinstance(major, str):
+            major, _, minor = major.partition('.')
+            major, minor    = int(major), int(minor.ljust(2, '0')) if minor else 0
+
+        if not (0 <= major <= 99 and 0 <= minor <= 99):
+            raise ValueError("BCD versions must be in the format XX.YY")
+
+        self.major = major
+        self.minor = minor
+
+
+    @classmethod
+    def from_bcd(cls, value):
+        """ Creates a BCDVersion from a raw 16-bit BCD value; e.g. 0x0210 for version 2.10. """
+        major = _BCD_BYTE_TO_INT[value >> 8]
+        minor = _BCD_BYTE_TO_INT[value & 0xff]
+
+        if major is None or minor is None:
+            raise ValueError(f"0x{value:04x} is not a valid BCD value")
+
+        return cls(major, minor)
+
+
+    def to_bcd(self):
+        """ Returns this version as a raw 16-bit BCD value. """
+        return (_INT_TO_BCD_BYTE[self.major] << 8) | _INT_TO_BCD_BYTE[self.minor]
+
+
+    def __float__(self):
+        return (self.major * 100 + self.minor) / 100
+
+    def __eq__(self, other):
+        if isinstance(other, BCDVersion):
+            return (self.major, self.minor) == (other.major, other.minor)
+        if isinstance(other, (int, float)):
+            return float(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(float(self))
+
+    def __str__(self):
+        return f"{self.major}.{self.minor:02}"
+
+    def __repr__(self):
+        return f"BCDVersion('{self}')"
+
+
+
+# Tables that convert between single BCD bytes and the numbers 0-99 they represent.
+# Bytes that aren't valid BCD map to None.
+_BCD_BYTE_TO_INT = tuple(
+    ((byte >> 4) * 10 + (byte & 0xf)) if ((byte >> 4) < 10 and (byte & 0xf) < 10) else None
+        for byte in range(256)
+)
+_INT_TO_BCD_BYTE = tuple(((number // 10) << 4) | (number % 10) for number in range(100))
+
+
 class BCDFieldAdapter(construct.Adapter):
-    """ Construct adapter that dynamically parses BCD fields. """
+    """ Construct adapter that dynamically parses BCD fields.
+
+    Fields are parsed into floats; e.g. 0x0210 becomes 2.1. If `exact` is set -- or the parse is run
+    with `exact_bcd=True` -- fields are instead parsed into exact BCDVersion objects.
+    """
+
+    def __init__(self, subcon, *, exact=False):
+        super().__init__(subcon)
+        self.exact = exact
+
 
     def _decode(self, obj, context, path):
-        hex_string = f"{obj:04x}"
-        return float(f"{hex_string[0:2]}.{hex_string[2:]}")
+        major = _BCD_BYTE_TO_INT[obj >> 8]
+        minor = _BCD_BYTE_TO_INT[obj & 0xff]
+
+        if major is None or minor is None:
+            raise ValueError(f"0x{obj:04x} is not a valid BCD value")
+
+        # Produce an exact version, if one's been requested...
+        params = context.get('_params') if context else None
+        if self.exact or (params and params.get('exact_bcd')):
+            return BCDVersion(major, minor)
+
+        # ... otherwise, produce the same float we'd get by parsing "XX.YY".
+        # Dividing by 100 rounds exactly as parsing the decimal string would.
+        return (major * 100 + minor) / 100
 
 
     def _encode(self, obj, context, path):
 
-        # Break the object down into its component parts...
-        integer = int(obj) % 100
-        percent = int(round(obj * 100)) % 100
+        # Exact versions already know their encoding.
+        if isinstance(obj, BCDVersion):
+            return obj.to_bcd()
+
+        # Otherwise, break the object down into hundredths...
+        hundredths = round(obj * 100)
 
         # ... make sure nothing is lost during conversion...
-        if float(f"{integer:02}.{percent:02}") != obj:
+        if not (0 <= hundredths <= 9999) or (hundredths / 100 != obj):
             raise AssertionError("BCD fields must be in the format XX.YY")
 
         # ... and squish them into an integer.
-        return int(f"{integer:02}{percent:02}", 16)
+        return (_INT_TO_BCD_BYTE[hundredths // 100] << 8) | _INT_TO_BCD_BYTE[hundredths % 100]
+
+
+    def _emitparse(self, code):
+        # Link ourself into the compiled code, so compiled parsers decode exactly as we do.
+        code.linkedinstances[id(self)] = self
+        return f"linkedinstances[{id(self)}]._decode({self.subcon._compileparse(code)}, this, None)"
 
 
 
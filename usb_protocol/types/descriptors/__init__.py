@@ -1,2 +1,8 @@
 
-from .standard import *
+from ..._lazy import lazy_attributes as _lazy_attributes
+
+# Equivalent to `from .standard import *`; but our submodules are only imported once they're used.
+__getattr__, __dir__ = _lazy_attributes(__name__,
+    submodules = ('batch', 'cdc', 'microsoft10', 'midi1', 'midi2', 'partial', 'registry', 'standard', 'tree', 'uac1', 'uac2', 'uac3'),
+    reexport   = 'standard',
+)
@@ -0,0 +1,225 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+Batch parsing of large collections of raw descriptor blobs -- e.g. device descriptors or complete
+configuration descriptor sets dumped from many devices -- spread across a pool of processes.
+
+.. code-block:: python
+
+    for result in parse_batch(read_blobs("corpus.bin")):
+        if result.error:
+            print(f"blob {result.index} failed: {result.error}")
+        else:
+            handle_descriptors(result.value)
+
+"""
+
+import mmap
+import os
+import itertools
+import traceback
+
+from collections                import deque
+from concurrent.futures         import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .standard import StandardDescriptorNumbers
+from .tree     import iter_descriptors
+
+
+class BatchResult:
+    """ The result of parsing a single blob in a batch.
+
+    Attributes:
+        index -- The position of the blob in the batch's input.
+        value -- The value returned by the parser; or None if parsing failed.
+        error -- A description of the failure, if parsing failed; otherwise None.
+    """
+
+    __slots__ = ('index', 'value', 'error')
+
+    def __init__(self, index, value=None, error=None):
+        self.index = index
+        self.value = value
+        self.error = error
+
+
+    def __reduce__(self):
+        return (BatchResult, (self.index, self.value, self.error))
+
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"<BatchResult index={self.index} error={self.error!r}>"
+        return f"<BatchResult index={self.index} value={self.value!r}>"
+
+
+
+def parse_blob(blob):
+    """ Default batch parser: parses every descriptor in a blob.
+
+    Returns a list with an entry for each descriptor; which is its parsed Container if its format is
+    known, or its raw bytes if not. Configuration descriptor sets are bounded by their wTotalLength.
+    """
+    return [node.parse() or bytes(node.raw) for node in iter_descriptors(blob)]
+
+
+def read_blobs(source):
+    """ Reads a file of concatenated descriptor blobs, yielding each blob as bytes.
+
+    Configuration (and other-speed configuration) descriptor sets are split using their wTotalLength;
+    any other descriptor is taken to be a single descriptor, and split using its bLength.
+
+    Parameters:
+        source -- A path, or a binary file object. The file is memory-mapped; so only one blob
+                  needs to be held in memory at a time.
+    """
+
+    # If we were handed a path, open it ourselves.
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, 'rb') as file:
+            yield from read_blobs(file)
+        return
+
+    # mmap refuses to map empty files; but those don't contain any blobs, anyway.
+    if os.fstat(source.fileno()).st_size == 0:
+        return
+
+    with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset = 0
+
+        while offset < len(data):
+            if offset + 4 <= len(data) and data[offset + 1] in (StandardDescriptorNumbers.CONFIGURATION, StandardDescriptorNumbers.OTHER_SPEED):
+                length = data[offset + 2] | (data[offset + 3] << 8)
+            else:
+                length = data[offset]
+
+            if length < 2:
+                raise ValueError(f"invalid blob length {length} at offset {offset}")
+
+            yield data[offset:offset + length]
+            offset += length
+
+
+def _parse_chunk(parser, first_index, blobs):
+    """ Parses a chunk of blobs inside of a worker process; capturing any failures. """
+
+    results = []
+
+    for index, blob in enumerate(blobs, first_index):
+        try:
+            results.append(BatchResult(index, parser(blob)))
+        except Exception as e: # pylint: disable=broad-except
+            message = "".join(traceback.format_exception_only(type(e), e)).strip()
+            results.append(BatchResult(index, error=message))
+
+    return results
+
+
+def _iter_chunks(blobs, chunk_size):
+    """ Splits an iterable of blobs into (first index, list of blobs) chunks. """
+
+    blobs = iter(blobs)
+    first_index = 0
+
+    while True:
+        chunk = list(itertools.islice(blobs, chunk_size))
+        if not chunk:
+            return
+
+        yield first_index, chunk
+        first_index += len(chunk)
+
+
+def _collect_results(pending, ordered):
+    """ Removes at least one chunk from our deque of pending (future, first index, count) entries, yielding its results.
+
+    If `ordered` is set, this waits for the oldest chunk; otherwise, for whichever chunks complete first.
+    """
+
+    if ordered:
+        completed = [pending.popleft()]
+    else:
+        done, _   = wait([future for future, _, _ in pending], return_when=FIRST_COMPLETED)
+        completed = [entry for entry in pending if entry[0] in done]
+
+        for entry in completed:
+            pending.remove(entry)
+
+    for future, first_index, count in completed:
+        try:
+            yield from future.result()
+
+        # If the worker itself failed (e.g. it crashed), report that for each blob it was parsing.
+        except Exception as e: # pylint: disable=broad-except
+            message = f"worker failed: {e!r}"
+            for index in range(first_index, first_index + count):
+                yield BatchResult(index, error=message)
+
+
+def parse_batch(blobs, parser=parse_blob, *, workers=None, chunk_size=256, ordered=True, max_pending=None):
+    """ Parses a collection of descriptor blobs across a pool of processes, yielding a BatchResult for each.
+
+    Failures are reported in the corresponding BatchResult's `error`, rather than aborting the batch;
+    including failures of a worker process itself, which are reported for each blob it was parsing.
+    A worker failure breaks the whole pool, and so is also reported for any other chunks in flight at
+    the time; the pool is then replaced, and the rest of the batch is parsed as usual.
+
+    Parameters:
+        blobs       -- An iterable of bytes-like blobs; or a path or binary file, which is read with `read_blobs`.
+        parser      -- The function used to parse each blob. This is run in the worker processes, so it
+                       must be picklable (e.g. a module-level function), as must its results.
+        workers     -- The number of worker processes to use; defaults to the number of CPUs. If zero,
+                       blobs are parsed in this process, which can be useful for debugging.
+        chunk_size  -- The number of blobs sent to a worker at once. Larger chunks amortize the cost of
+                       sending work between processes.
+        ordered     -- If true, results are yielded in the order of their blobs; otherwise, results are
+                       yielded as soon as they're available.
+        max_pending -- The maximum number of chunks in flight at once; which bounds our memory use.
+                       Defaults to twice the number of workers.
+    """
+
+    if isinstance(blobs, (str, os.PathLike)) or hasattr(blobs, 'fileno'):
+        blobs = read_blobs(blobs)
+
+    # Blobs may be memoryviews or mmap slices; but only bytes can be sent to our workers.
+    chunks = ((first_index, [bytes(blob) for blob in chunk]) for first_index, chunk in _iter_chunks(blobs, chunk_size))
+
+    # If we've been asked not to use any workers, just parse everything here.
+    if workers == 0:
+        for first_index, chunk in chunks:
+            yield from _parse_chunk(parser, first_index, chunk)
+        return
+
+    workers     = workers or os.cpu_count() or 1
+    max_pending = max_pending or (workers * 2)
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending  = deque()
+
+    try:
+        for first_index, chunk in chunks:
+
+            # Keep a bounded number of chunks in flight; waiting for results before we submit more.
+            while len(pending) >= max_pending:
+                yield from _collect_results(pending, ordered)
+
+            # If a worker has failed since our last submission, our pool is broken; so replace it. The chunks
+            # that were in flight will already have failed, and will be reported as we collect them.
+            try:
+                future = executor.submit(_parse_chunk, parser, first_index, chunk)
+            except BrokenProcessPool:
+                executor.shutdown(wait=True)
+                executor = ProcessPoolExecutor(max_workers=workers)
+                future   = executor.submit(_parse_chunk, parser, first_index, chunk)
+
+            pending.append((future, first_index, len(chunk)))
+
+        # Finally, drain any remaining work.
+        while pending:
+            yield from _collect_results(pending, ordered)
+
+    # If our caller stops early, don't bother parsing anything that hasn't started yet.
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
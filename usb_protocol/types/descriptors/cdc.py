@@ -9,12 +9,25 @@ from enum import IntEnum
 import construct
 from   construct  import this, Default
 
-from .. import LanguageIDs
+from ..._lazy import lazy_attributes as _lazy_attributes
 from ..descriptor import \
     DescriptorField, DescriptorNumber, DescriptorFormat, \
     BCDFieldAdapter, DescriptorLength
 
 
+# Our language tables are large; so LanguageIDs is kept available here, but only loaded on first use.
+_LAZY_ATTRIBUTES = {'LanguageIDs': 'usb_protocol.types.languages'}
+
+__getattr__, __dir__ = _lazy_attributes(__name__, attributes=_LAZY_ATTRIBUTES)
+
+
+class CDCInterfaceClassCodes(IntEnum):
+    """ Interface class codes used by Communications Class devices. """
+
+    COMMUNICATIONS = 0x02
+    DATA           = 0x0A
+
+
 class CDCDescriptorNumbers(IntEnum):
     CS_INTERFACE  = 0x24
     CS_ENDPOINT   = 0x25
@@ -81,3 +94,6 @@ CallManagementFunctionalDescriptor = DescriptorFormat(
     "bmCapabilities"         / DescriptorField(description="Call Management capabilities", default=0),
     "bDataInterface"         / DescriptorField(description="Data Interface Number")
 )
+
+# Everything defined above, and our lazily-loaded names; as `import *` provided before they were lazy.
+__all__ = [name for name in list(globals()) if not name.startswith('_')] + list(_LAZY_ATTRIBUTES)
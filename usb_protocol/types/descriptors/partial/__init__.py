@@ -1 +1,3 @@
-from .standard import *
+from ...._lazy import lazy_attributes as _lazy_attributes
+
+__getattr__, __dir__ = _lazy_attributes(__name__, submodules=('standard',), reexport='standard')
@@ -0,0 +1,284 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+Registry that maps on-wire descriptors to the DescriptorFormats that describe them.
+
+Formats are keyed by the constant descriptor numbers they declare (e.g. bDescriptorType and
+bDescriptorSubtype), and by the class of the interface they're valid in; so finding the format
+for a descriptor is a handful of hash lookups, no matter how many formats are registered.
+"""
+
+from .standard import (
+    StandardDescriptorNumbers,
+    DeviceCapabilityTypes,
+    DeviceDescriptor,
+    ConfigurationDescriptor,
+    StringDescriptor,
+    InterfaceDescriptor,
+    EndpointDescriptor,
+    DeviceQualifierDescriptor,
+    InterfaceAssociationDescriptor,
+    BinaryObjectStoreDescriptor,
+    USB2ExtensionDescriptor,
+    SuperSpeedUSBDeviceCapabilityDescriptor,
+    SuperSpeedEndpointCompanionDescriptor,
+)
+from .        import cdc, midi1, midi2, uac1, uac2, uac3
+
+from .uac2    import AudioInterfaceClassCodes, AudioInterfaceSubclassCodes
+from .uac3    import AudioInterfaceProtocolCodes
+
+
+class DescriptorRegistry:
+    """ Maps (bDescriptorType, further descriptor numbers, interface class) to DescriptorFormats.
+
+    Interface classes are given as a (bInterfaceClass, bInterfaceSubclass, bInterfaceProtocol) tuple;
+    a subclass or protocol of `None` matches any value. Formats registered without an interface class
+    are used for any descriptor that doesn't have a class-specific match.
+    """
+
+    def __init__(self):
+
+        # Our dispatch tables; keyed by (interface class, descriptor type). Each entry is a list of
+        # (positions, formats) pairs; where `formats` maps the bytes found at `positions` to a format.
+        # Pairs that check more positions are more specific, and are kept first.
+        self._tables = {}
+
+        # Track the interface classes we know about, so we don't look up any others; and
+        # cache the contexts we search for each interface class we see.
+        self._interface_classes = set()
+        self._context_cache     = {}
+
+
+    def register(self, descriptor_format, interface_class=None, *, descriptor_numbers=None):
+        """ Adds a format to the registry.
+
+        Parameters:
+            descriptor_format  -- The DescriptorFormat to register.
+            interface_class    -- The (class, subclass, protocol) of interfaces this format is valid in;
+                                  or None if it's valid anywhere.
+            descriptor_numbers -- A tuple of (offset, number) identifying the format's descriptors. If not
+                                  provided, the DescriptorNumbers declared by the format are used.
+        """
+
+        if descriptor_numbers is None:
+            descriptor_numbers = descriptor_format.get_descriptor_numbers()
+
+        numbers = dict(descriptor_numbers)
+        if 1 not in numbers:
+            raise ValueError("only formats with a constant bDescriptorType can be registered")
+
+        # Our descriptor type selects a table; every other number is part of the key within it.
+        descriptor_type = numbers.pop(1)
+        positions       = tuple(sorted(numbers))
+        values          = tuple(numbers[position] for position in positions)
+
+        tables = self._tables.setdefault((interface_class, descriptor_type), [])
+        for table_positions, formats in tables:
+            if table_positions == positions:
+                break
+        else:
+            formats = {}
+            tables.append((positions, formats))
+            tables.sort(key=lambda table: len(table[0]), reverse=True)
+
+        existing = formats.get(values)
+        if (existing is not None) and (existing is not descriptor_format):
+            raise ValueError(f"a format is already registered for descriptor numbers {descriptor_numbers}")
+
+        formats[values] = descriptor_format
+
+        if interface_class is not None:
+            self._interface_classes.add(interface_class)
+            self._context_cache.clear()
+
+
+    def _contexts_for(self, interface_class):
+        """ Returns the registered contexts that apply to an interface, from most to least specific. """
+
+        try:
+            return self._context_cache[interface_class]
+        except KeyError:
+            pass
+
+        if interface_class is None:
+            contexts = (None,)
+        else:
+            device_class, subclass, protocol = interface_class
+            candidates = ((device_class, subclass, protocol), (device_class, subclass, None), (device_class, None, None))
+            contexts   = tuple(c for c in candidates if c in self._interface_classes) + (None,)
+
+        self._context_cache[interface_class] = contexts
+        return contexts
+
+
+    def find_format(self, data, offset=0, interface_class=None):
+        """ Returns the DescriptorFormat for the raw descriptor at the given offset; or None if it's not known.
+
+        Parameters:
+            data            -- A bytes-like object (or memoryview) containing the descriptor.
+            offset          -- The offset of the descriptor in the buffer.
+            interface_class -- The (class, subclass, protocol) of the interface containing the descriptor, if any.
+        """
+
+        length          = data[offset]
+        descriptor_type = data[offset + 1]
+
+        for context in self._contexts_for(interface_class):
+            for positions, formats in self._tables.get((context, descriptor_type), ()):
+
+                # Skip any formats that need bytes this descriptor doesn't have.
+                if positions and positions[-1] >= length:
+                    continue
+
+                descriptor_format = formats.get(tuple(data[offset + position] for position in positions))
+                if descriptor_format is not None:
+                    return descriptor_format
+
+        return None
+
+
+    def lookup(self, descriptor_type, descriptor_subtype=None, interface_class=None):
+        """ Returns the format registered for a given descriptor type (and subtype); or None if there isn't one.
+
+        This only finds formats identified by their type and subtype alone; formats that are identified by
+        further fields (such as UAC2's format type descriptors) can be found with `find_format`.
+        """
+
+        positions = () if descriptor_subtype is None else (2,)
+        values    = () if descriptor_subtype is None else (descriptor_subtype,)
+
+        for context in self._contexts_for(interface_class):
+            for table_positions, formats in self._tables.get((context, descriptor_type), ()):
+                if table_positions == positions and values in formats:
+                    return formats[values]
+
+        return None
+
+
+
+# Shorthands for the interface class codes used below.
+AUDIO            = AudioInterfaceClassCodes.AUDIO
+AUDIO_CONTROL    = AudioInterfaceSubclassCodes.AUDIO_CONTROL
+AUDIO_STREAMING  = AudioInterfaceSubclassCodes.AUDIO_STREAMING
+MIDI_STREAMING   = AudioInterfaceSubclassCodes.MIDI_STREAMING
+IP_VERSION_01_00 = AudioInterfaceProtocolCodes.IP_VERSION_01_00
+IP_VERSION_02_00 = AudioInterfaceProtocolCodes.IP_VERSION_02_00
+IP_VERSION_03_00 = AudioInterfaceProtocolCodes.IP_VERSION_03_00
+
+# Formats for descriptors whose meaning doesn't depend on the interface they're in.
+STANDARD_FORMATS = (
+    DeviceDescriptor,
+    ConfigurationDescriptor,
+    StringDescriptor,
+    InterfaceDescriptor,
+    EndpointDescriptor,
+    DeviceQualifierDescriptor,
+    InterfaceAssociationDescriptor,
+    BinaryObjectStoreDescriptor,
+    SuperSpeedEndpointCompanionDescriptor,
+)
+
+# Class-specific formats, keyed by the (bInterfaceClass, bInterfaceSubclass, bInterfaceProtocol)
+# of the interface they appear in. A subclass or protocol of `None` matches any value.
+#
+# Class modules also define variants of standard descriptors (e.g. uac2.StandardAudioControlInterfaceDescriptor)
+# for building descriptors; these aren't registered, so such descriptors parse as their standard counterparts.
+CLASS_SPECIFIC_FORMATS = {
+    (AUDIO, AUDIO_CONTROL, IP_VERSION_01_00): (
+        uac1.AudioControlInterruptEndpointDescriptor,
+    ),
+    (AUDIO, AUDIO_CONTROL, IP_VERSION_02_00): (
+        uac2.ClassSpecificAudioControlInterfaceDescriptor,
+        uac2.ClockSourceDescriptor,
+        uac2.InputTerminalDescriptor,
+        uac2.OutputTerminalDescriptor,
+        uac2.FeatureUnitDescriptor,
+        uac2.AudioControlInterruptEndpointDescriptor,
+    ),
+    (AUDIO, AUDIO_STREAMING, IP_VERSION_02_00): (
+        uac2.ClassSpecificAudioStreamingInterfaceDescriptor,
+        uac2.TypeIFormatTypeDescriptor,
+        uac2.ExtendedTypeIFormatTypeDescriptor,
+        uac2.TypeIIFormatTypeDescriptor,
+        uac2.ExtendedTypeIIFormatTypeDescriptor,
+        uac2.TypeIIIFormatTypeDescriptor,
+        uac2.ExtendedTypeIIIFormatTypeDescriptor,
+        uac2.ClassSpecificAudioStreamingIsochronousAudioDataEndpointDescriptor,
+    ),
+    (AUDIO, AUDIO_CONTROL, IP_VERSION_03_00): (
+        uac3.HeaderDescriptor,
+        uac3.InputTerminalDescriptor,
+        uac3.OutputTerminalDescriptor,
+        uac3.AudioControlInterruptEndpointDescriptor,
+    ),
+    (AUDIO, AUDIO_STREAMING, IP_VERSION_03_00): (
+        uac3.ClassSpecificAudioStreamingInterfaceDescriptor,
+    ),
+    (AUDIO, MIDI_STREAMING, IP_VERSION_01_00): (
+        midi1.ClassSpecificMidiStreamingInterfaceHeaderDescriptor,
+        midi1.MidiInJackDescriptor,
+        midi1.MidiOutJackDescriptorHead,
+        midi1.ClassSpecificMidiStreamingBulkDataEndpointDescriptorHead,
+    ),
+    (cdc.CDCInterfaceClassCodes.COMMUNICATIONS, None, None): (
+        cdc.HeaderDescriptor,
+        cdc.ACMFunctionalDescriptor,
+        cdc.UnionFunctionalDescriptor,
+        cdc.CallManagementFunctionalDescriptor,
+    ),
+}
+
+# Formats that are identified by fields that aren't DescriptorNumbers; as (format, interface class, descriptor numbers).
+KEYED_FORMATS = (
+
+    # Device capabilities are identified by their bDevCapabilityType.
+    (USB2ExtensionDescriptor,                 None, ((1, StandardDescriptorNumbers.DEVICE_CAPABILITY), (2, DeviceCapabilityTypes.USB_2_EXTENSION))),
+    (SuperSpeedUSBDeviceCapabilityDescriptor, None, ((1, StandardDescriptorNumbers.DEVICE_CAPABILITY), (2, DeviceCapabilityTypes.SUPERSPEED_USB))),
+
+    # Other-speed configurations share the configuration descriptor's layout.
+    (ConfigurationDescriptor,                 None, ((1, StandardDescriptorNumbers.OTHER_SPEED),)),
+
+    # MIDI 1.0 and 2.0 streaming interfaces share a class, subclass and protocol; but MIDI 2.0 headers
+    # have a bcdMSC of 2.0, whose major version is the header's fifth byte.
+    (midi2.ClassSpecificMidiStreamingInterfaceHeaderDescriptor, (AUDIO, MIDI_STREAMING, IP_VERSION_01_00),
+        ((1, 0x24), (2, 0x01), (4, 0x02))),
+)
+
+# A few formats aren't registered at all, as raw descriptors don't contain enough to tell them apart
+# from the formats above:
+#
+#   - standard.StringLanguageDescriptor is only distinguished from StringDescriptor by being string
+#     descriptor zero; which is part of the request for it, rather than the descriptor itself.
+#   - midi2.StandardMidiStreamingDataEndpointDescriptor declares the same numbers as
+#     midi1.ClassSpecificMidiStreamingBulkDataEndpointDescriptorHead; which describes class-specific
+#     MIDI endpoint descriptors in either version.
+#   - The standard interface and endpoint variants defined by the class modules; see above.
+
+
+def _create_default_registry():
+    """ Creates the registry containing all of the formats this library defines. """
+
+    registry = DescriptorRegistry()
+
+    for descriptor_format in STANDARD_FORMATS:
+        registry.register(descriptor_format)
+
+    for interface_class, formats in CLASS_SPECIFIC_FORMATS.items():
+        for descriptor_format in formats:
+            registry.register(descriptor_format, interface_class)
+
+    for descriptor_format, interface_class, descriptor_numbers in KEYED_FORMATS:
+        registry.register(descriptor_format, interface_class, descriptor_numbers=descriptor_numbers)
+
+    return registry
+
+
+# The registry used when no other is specified.
+default_registry = _create_default_registry()
+
+
+def find_format(data, offset=0, interface_class=None):
+    """ Returns the DescriptorFormat for a raw descriptor, using the default registry. See `DescriptorRegistry.find_format`. """
+    return default_registry.find_format(data, offset, interface_class)
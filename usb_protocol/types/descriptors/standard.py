@@ -14,7 +14,7 @@ from enum import IntEnum
 import construct
 from   construct  import this, Default
 
-from .. import LanguageIDs
+from ..._lazy import lazy_attributes as _lazy_attributes
 from ..descriptor import (
     DescriptorField,
     DescriptorNumber,
@@ -24,6 +24,12 @@ from ..descriptor import (
 )
 
 
+# Our language tables are large; so LanguageIDs is kept available here, but only loaded on first use.
+_LAZY_ATTRIBUTES = {'LanguageIDs': 'usb_protocol.types.languages'}
+
+__getattr__, __dir__ = _lazy_attributes(__name__, attributes=_LAZY_ATTRIBUTES)
+
+
 class StandardDescriptorNumbers(IntEnum):
     """ Numbers of our standard descriptors. """
 
@@ -187,14 +193,14 @@ BinaryObjectStoreDescriptor = DescriptorFormat(
 USB2ExtensionDescriptor = DescriptorFormat(
     "bLength"               / construct.Const(0x7, construct.Int8ul),
     "bDescriptorType"       / DescriptorNumber(StandardDescriptorNumbers.DEVICE_CAPABILITY),
-    "bDevCapabilityType"    / construct.Const(DeviceCapabilityTypes.USB_2_EXTENSION, construct.Int8ul),
+    "bDevCapabilityType"    / construct.Const(int(DeviceCapabilityTypes.USB_2_EXTENSION), construct.Int8ul),
     "bmAttributes"          / DescriptorField("Attributes", default=0b10, length=4)
 )
 
 SuperSpeedUSBDeviceCapabilityDescriptor = DescriptorFormat(
     "bLength"               / construct.Const(0xA, construct.Int8ul),
     "bDescriptorType"       / DescriptorNumber(StandardDescriptorNumbers.DEVICE_CAPABILITY),
-    "bDevCapabilityType"    / construct.Const(DeviceCapabilityTypes.SUPERSPEED_USB, construct.Int8ul),
+    "bDevCapabilityType"    / construct.Const(int(DeviceCapabilityTypes.SUPERSPEED_USB), construct.Int8ul),
     "bmAttributes"          / DescriptorField("Attributes", default=0),
     "wSpeedsSupported"      / DescriptorField("USB3 Speeds Supported", default=0b1000),
     "bFunctionalitySupport" / DescriptorField("Lowest Speed with Full Support", default=3),
@@ -260,6 +266,8 @@ class DescriptorParserCases(unittest.TestCase):
 
 
     def test_string_language_descriptor_build(self):
+        from ..languages import LanguageIDs
+
         data = StringLanguageDescriptor.build({
             'wLANGID': (LanguageIDs.ENGLISH_US,)
         })
@@ -314,5 +322,9 @@ class DescriptorParserCases(unittest.TestCase):
         self.assertEqual(result, b"\x40\x01")
 
 
+# Everything defined above, and our lazily-loaded names; as `import *` provided before they were lazy.
+__all__ = [name for name in list(globals()) if not name.startswith('_')] + list(_LAZY_ATTRIBUTES)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,119 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for the batch descriptor parser.
+"""
+
+import os
+import tempfile
+import unittest
+
+from .batch     import parse_batch, parse_blob, read_blobs
+from .standard  import DeviceDescriptor, EndpointDescriptor
+
+
+def _crash(blob):
+    """ Parser that takes down its worker process; used to test worker failures. """
+    os._exit(1)
+
+
+def _crash_on_short_blobs(blob):
+    """ Parser that takes down its worker process for any blob shorter than a device descriptor. """
+
+    if len(blob) < 18:
+        os._exit(1)
+
+    return DeviceDescriptor.parse(blob)
+
+
+class BatchParserCases(unittest.TestCase):
+
+    DEVICE = bytes([0x12, 0x01, 0x00, 0x02, 0xFF, 0xFF, 0xFF, 64, 0x09, 0x12, 0x01, 0x00, 0x10, 0x01, 1, 2, 3, 1])
+
+    CONFIGURATION = bytes([
+        9, 2, 39, 0, 1, 1, 0, 0x80, 250,          # configuration descriptor
+        9, 4, 0, 0, 1, 0x02, 0x02, 0x01, 0,       # CDC communications interface
+        5, 0x24, 0x00, 0x10, 0x01,                # header functional descriptor
+        4, 0x24, 0x02, 0x02,                      # ACM functional descriptor
+        5, 0x24, 0x06, 0, 1,                      # union functional descriptor
+        7, 5, 0x82, 3, 8, 0, 255,                 # notification endpoint
+    ])
+
+    BLOBS = [DEVICE, CONFIGURATION] * 20
+
+
+    def test_parse_blob(self):
+        device, = parse_blob(self.DEVICE)
+        self.assertEqual(device.idVendor, 0x1209)
+
+        descriptors = parse_blob(self.CONFIGURATION)
+        self.assertEqual(len(descriptors), 6)
+        self.assertEqual(descriptors[-1].bEndpointAddress, 0x82)
+
+
+    def test_ordered_batch(self):
+        results = list(parse_batch(self.BLOBS, workers=2, chunk_size=3))
+
+        self.assertEqual([result.index for result in results], list(range(len(self.BLOBS))))
+        self.assertTrue(all(result.error is None for result in results))
+        self.assertEqual(results[0].value, parse_blob(self.DEVICE))
+        self.assertEqual(results[1].value, parse_blob(self.CONFIGURATION))
+
+        # Results should come back usable, despite crossing process boundaries.
+        self.assertEqual(results[2].value[0]._to_detail_dictionary()['Vendor ID'], 0x1209)
+
+
+    def test_unordered_batch(self):
+        results = list(parse_batch(self.BLOBS, workers=2, chunk_size=3, ordered=False))
+        self.assertEqual(sorted(result.index for result in results), list(range(len(self.BLOBS))))
+
+
+    def test_failures_are_reported(self):
+        blobs   = [self.DEVICE, self.DEVICE[0:10], self.DEVICE]
+        results = list(parse_batch(blobs, EndpointDescriptor.parse, workers=1))
+
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result.value is None for result in results))
+        self.assertIn("ValidationError", results[0].error)
+
+        results = list(parse_batch(blobs, DeviceDescriptor.parse, workers=0))
+        self.assertEqual([result.error is None for result in results], [True, False, True])
+
+
+    def test_worker_failures_are_reported(self):
+        results = list(parse_batch([self.DEVICE] * 4, _crash, workers=1, chunk_size=2))
+
+        self.assertEqual([result.index for result in results], [0, 1, 2, 3])
+        self.assertTrue(all(result.error.startswith("worker failed") for result in results))
+
+
+    def test_batch_continues_after_worker_failures(self):
+        blobs   = [self.DEVICE[0:10]] + [self.DEVICE] * 20
+        results = list(parse_batch(blobs, _crash_on_short_blobs, workers=1, chunk_size=2, max_pending=2))
+
+        # Every blob should have a result; with failures reported for our crashed chunk...
+        self.assertEqual([result.index for result in results], list(range(len(blobs))))
+        self.assertTrue(results[0].error.startswith("worker failed"))
+
+        # ... and the chunks submitted after it parsed as usual, by a new pool.
+        for result in results[-10:]:
+            self.assertIsNone(result.error)
+            self.assertEqual(result.value.idVendor, 0x1209)
+
+
+    def test_read_blobs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corpus.bin")
+
+            with open(path, 'wb') as file:
+                file.write(b"".join(self.BLOBS))
+
+            self.assertEqual(list(read_blobs(path)), self.BLOBS)
+
+            results = list(parse_batch(path, workers=0))
+            self.assertEqual(len(results), len(self.BLOBS))
+
+
+if __name__ == "__main__":
+    unittest.main()
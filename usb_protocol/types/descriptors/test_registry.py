@@ -0,0 +1,100 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for the descriptor format registry.
+"""
+
+import unittest
+
+from . import cdc, midi1, midi2, uac2
+from .standard import StandardDescriptorNumbers, ConfigurationDescriptor, EndpointDescriptor, InterfaceDescriptor, \
+    StringDescriptor, StringLanguageDescriptor, USB2ExtensionDescriptor, SuperSpeedUSBDeviceCapabilityDescriptor
+from .registry import DescriptorRegistry, default_registry, find_format, CLASS_SPECIFIC_FORMATS
+
+UAC2_AUDIO_STREAMING = (0x01, 0x02, 0x20)
+MIDI_STREAMING       = (0x01, 0x03, 0x00)
+
+
+class DescriptorRegistryCases(unittest.TestCase):
+
+    def test_all_class_specific_formats_resolve(self):
+        for interface_class, formats in CLASS_SPECIFIC_FORMATS.items():
+            for descriptor_format in formats:
+
+                # Synthesize a descriptor containing only the format's descriptor numbers...
+                data = bytearray(32)
+                for offset, number in descriptor_format.get_descriptor_numbers():
+                    data[offset] = number
+                data[0] = len(data)
+
+                # ... and check that we find our format from it.
+                concrete_class = tuple(0 if value is None else value for value in interface_class)
+                with self.subTest(descriptor_format=descriptor_format, interface_class=interface_class):
+                    self.assertIs(find_format(data, 0, concrete_class), descriptor_format)
+
+
+    def test_format_types_are_distinguished(self):
+        self.assertIs(find_format(bytes([6, 0x24, 0x02, 0x01, 2, 16]), 0, UAC2_AUDIO_STREAMING), uac2.TypeIFormatTypeDescriptor)
+        self.assertIs(find_format(bytes([6, 0x24, 0x02, 0x03, 2, 16]), 0, UAC2_AUDIO_STREAMING), uac2.TypeIIIFormatTypeDescriptor)
+
+
+    def test_standard_formats(self):
+        self.assertIs(find_format(bytes([7, 5, 0x81, 2, 64, 0, 0])), EndpointDescriptor)
+        self.assertIs(find_format(bytes([9, 7, 9, 0, 1, 1, 0, 0x80, 250])), ConfigurationDescriptor)
+
+        # Standard descriptors are still found inside of class-specific interfaces.
+        self.assertIs(find_format(bytes([7, 5, 0x81, 5, 64, 0, 1]), 0, UAC2_AUDIO_STREAMING), EndpointDescriptor)
+        self.assertIs(find_format(bytes([9, 4, 0, 0, 0, 1, 2, 0x20, 0]), 0, UAC2_AUDIO_STREAMING), InterfaceDescriptor)
+
+
+    def test_device_capabilities(self):
+        usb2_extension = USB2ExtensionDescriptor.build({'bmAttributes': 0b10})
+        superspeed     = SuperSpeedUSBDeviceCapabilityDescriptor.build({})
+
+        self.assertIs(find_format(usb2_extension), USB2ExtensionDescriptor)
+        self.assertIs(find_format(superspeed), SuperSpeedUSBDeviceCapabilityDescriptor)
+        self.assertIsNone(find_format(bytes([20, 0x10, 4, 0]) + bytes(16)))
+
+
+    def test_midi_headers(self):
+        self.assertIs(find_format(bytes([7, 0x24, 0x01, 0x00, 0x02, 7, 0]), 0, MIDI_STREAMING),
+            midi2.ClassSpecificMidiStreamingInterfaceHeaderDescriptor)
+        self.assertIs(find_format(bytes([7, 0x24, 0x01, 0x00, 0x01, 65, 0]), 0, MIDI_STREAMING),
+            midi1.ClassSpecificMidiStreamingInterfaceHeaderDescriptor)
+
+
+    def test_string_descriptors(self):
+
+        # String descriptor zero can't be told apart from other string descriptors by its contents.
+        self.assertIs(find_format(StringLanguageDescriptor.build({'wLANGID': (0x0409,)})), StringDescriptor)
+
+
+    def test_unknown_descriptors(self):
+        self.assertIsNone(find_format(bytes([9, 0x21, 0x11, 0x01, 0, 1, 0x22, 0x3f, 0])))
+        self.assertIsNone(find_format(bytes([9, 0x24, 0x0a, 1, 1, 0, 0, 0]), 0, (0xff, 0xff, 0xff)))
+
+
+    def test_lookup(self):
+        self.assertIs(default_registry.lookup(StandardDescriptorNumbers.ENDPOINT), EndpointDescriptor)
+        self.assertIs(default_registry.lookup(0x24, 0x00, (0x02, 0x02, 0x01)), cdc.HeaderDescriptor)
+        self.assertIsNone(default_registry.lookup(0x24, 0x00))
+
+
+    def test_conflicting_registration(self):
+        registry = DescriptorRegistry()
+        registry.register(cdc.HeaderDescriptor, (0x02, None, None))
+
+        # Registering the same format twice is harmless...
+        registry.register(cdc.HeaderDescriptor, (0x02, None, None))
+
+        # ... but registering a different format under the same numbers isn't allowed.
+        with self.assertRaises(ValueError):
+            registry.register(cdc.ACMFunctionalDescriptor, (0x02, None, None), descriptor_numbers=((1, 0x24), (2, 0x00)))
+
+        # The same numbers can still be used for another interface class.
+        registry.register(cdc.ACMFunctionalDescriptor, (0x0a, None, None), descriptor_numbers=((1, 0x24), (2, 0x00)))
+
+
+if __name__ == "__main__":
+    unittest.main()
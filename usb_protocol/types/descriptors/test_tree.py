@@ -0,0 +1,102 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for the descriptor tree parser.
+"""
+
+import unittest
+
+from . import cdc, uac2
+from .standard import StandardDescriptorNumbers, ConfigurationDescriptor, InterfaceDescriptor, EndpointDescriptor
+from .tree     import iter_descriptors, parse_configuration
+
+
+class DescriptorTreeCases(unittest.TestCase):
+
+    AUDIO_CONFIGURATION = bytes([
+        9, 2, 65, 0, 2, 1, 0, 0x80, 250,          # configuration descriptor
+        9, 4, 0, 0, 0, 0x01, 0x01, 0x20, 0,       # UAC2 audio control interface
+        9, 0x24, 0x01, 0x00, 0x02, 8, 9, 0, 0,    # class-specific AC interface header
+        8, 0x24, 0x0a, 1, 1, 0, 0, 0,             # clock source
+        9, 4, 1, 0, 1, 0x01, 0x02, 0x20, 0,       # UAC2 audio streaming interface
+        6, 0x24, 0x02, 0x01, 2, 16,               # type I format type descriptor
+        7, 5, 0x81, 5, 0xc4, 0, 1,                # isochronous endpoint
+        8, 0x25, 0x01, 0, 0, 0, 0, 0,             # class-specific isochronous endpoint
+    ])
+
+    CDC_CONFIGURATION = bytes([
+        9, 2, 39, 0, 1, 1, 0, 0x80, 250,          # configuration descriptor
+        9, 4, 0, 0, 1, 0x02, 0x02, 0x01, 0,       # CDC communications interface
+        5, 0x24, 0x00, 0x10, 0x01,                # header functional descriptor
+        4, 0x24, 0x02, 0x02,                      # ACM functional descriptor
+        5, 0x24, 0x06, 0, 1,                      # union functional descriptor
+        7, 5, 0x82, 3, 8, 0, 255,                 # notification endpoint
+        0xff, 0xff,                               # trailing data past wTotalLength
+    ])
+
+
+    def test_audio_configuration_tree(self):
+        configuration = parse_configuration(self.AUDIO_CONFIGURATION)
+        self.assertIs(configuration.descriptor_format, ConfigurationDescriptor)
+        self.assertEqual(configuration.parse().wTotalLength, 65)
+
+        control, streaming = configuration.children
+        self.assertIs(control.descriptor_format, InterfaceDescriptor)
+        self.assertEqual(control.interface_class, (0x01, 0x01, 0x20))
+
+        header, clock = control.children
+        self.assertIs(header.descriptor_format, uac2.ClassSpecificAudioControlInterfaceDescriptor)
+        self.assertIs(clock.descriptor_format,  uac2.ClockSourceDescriptor)
+        self.assertEqual(clock.parse().bClockID, 1)
+
+        format_type, endpoint = streaming.children
+        self.assertIs(format_type.descriptor_format, uac2.TypeIFormatTypeDescriptor)
+        self.assertIs(endpoint.descriptor_format, EndpointDescriptor)
+
+        class_endpoint, = endpoint.children
+        self.assertIs(class_endpoint.descriptor_format, uac2.ClassSpecificAudioStreamingIsochronousAudioDataEndpointDescriptor)
+        self.assertIs(class_endpoint.interface, streaming)
+
+
+    def test_cdc_configuration_tree(self):
+        configuration = parse_configuration(self.CDC_CONFIGURATION)
+
+        interface, = configuration.children
+        formats = [child.descriptor_format for child in interface.children]
+        self.assertEqual(formats, [cdc.HeaderDescriptor, cdc.ACMFunctionalDescriptor, cdc.UnionFunctionalDescriptor, EndpointDescriptor])
+        self.assertEqual(interface.children[0].parse().bcdCDC, 1.1)
+
+
+    def test_lazy_endpoint_walk(self):
+        nodes = list(iter_descriptors(self.AUDIO_CONFIGURATION))
+
+        # Without build_tree, nodes are linked to their parents, but no children are collected...
+        self.assertEqual(len(nodes), 8)
+        self.assertEqual(nodes[0].children, [])
+
+        # ... and nothing is parsed until it's asked for.
+        endpoints = [node for node in nodes if node.descriptor_type == StandardDescriptorNumbers.ENDPOINT]
+        self.assertEqual([endpoint.parse().bEndpointAddress for endpoint in endpoints], [0x81])
+        self.assertTrue(all(node._parsed is None for node in nodes if node not in endpoints))
+
+
+    def test_walk_respects_total_length(self):
+        nodes = list(iter_descriptors(self.CDC_CONFIGURATION))
+        self.assertEqual(nodes[-1].descriptor_type, StandardDescriptorNumbers.ENDPOINT)
+        self.assertEqual(bytes(nodes[-1].raw), bytes([7, 5, 0x82, 3, 8, 0, 255]))
+
+
+    def test_invalid_descriptor_sets(self):
+        with self.assertRaises(ValueError):
+            list(iter_descriptors(bytes([9, 2, 11, 0, 1, 1, 0, 0x80, 250, 0, 4])))
+
+        with self.assertRaises(ValueError):
+            list(iter_descriptors(self.AUDIO_CONFIGURATION[0:20]))
+
+        with self.assertRaises(ValueError):
+            parse_configuration(self.AUDIO_CONFIGURATION[9:18])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+Parsers that walk complete descriptor sets -- e.g. the response to a GET_DESCRIPTOR(CONFIGURATION)
+request -- and turn them into a configuration → interface → endpoint tree.
+
+Descriptors are walked using their bLength fields, and are only parsed on request; so callers that
+only need a few descriptors don't pay for parsing the rest. For example, to find every endpoint:
+
+.. code-block:: python
+
+    for node in iter_descriptors(configuration_blob):
+        if node.descriptor_type == StandardDescriptorNumbers.ENDPOINT:
+            print(node.parse().bEndpointAddress)
+
+"""
+
+from .standard import StandardDescriptorNumbers
+from .registry import find_format
+
+
+# The class-specific endpoint descriptor type; which is shared by the audio, MIDI and communications classes.
+CS_ENDPOINT = 0x25
+
+
+class DescriptorNode:
+    """ A single descriptor inside of a larger descriptor set.
+
+    Nodes reference the buffer they were found in, rather than copying it; and are only parsed
+    when `parse()` is called.
+    """
+
+    __slots__ = ('data', 'offset', 'length', 'descriptor_type', 'parent', 'interface', 'children', '_format', '_parsed')
+
+    # Marker used to note that we haven't yet looked up our format.
+    _UNRESOLVED = object()
+
+    def __init__(self, data, offset, length, descriptor_type, parent=None, interface=None):
+        """
+        Parameters:
+            data            -- A memoryview of the buffer containing this descriptor.
+            offset          -- The offset of this descriptor in the buffer.
+            length          -- The length of this descriptor, as given by its bLength.
+            descriptor_type -- The descriptor's bDescriptorType.
+            parent          -- The node that this descriptor belongs to, if any.
+            interface       -- The interface descriptor node this descriptor appears in, if any.
+        """
+        self.data            = data
+        self.offset          = offset
+        self.length          = length
+        self.descriptor_type = descriptor_type
+        self.parent          = parent
+        self.interface       = interface
+        self.children        = []
+
+        self._format = self._UNRESOLVED
+        self._parsed = None
+
+
+    @property
+    def descriptor_subtype(self):
+        """ The third byte of the descriptor, which is the bDescriptorSubtype for class-specific descriptors. """
+        return self.data[self.offset + 2] if self.length > 2 else None
+
+
+    @property
+    def raw(self):
+        """ A memoryview of this descriptor's raw bytes. """
+        return self.data[self.offset:self.offset + self.length]
+
+
+    @property
+    def interface_class(self):
+        """ The (class, subclass, protocol) of the interface this descriptor appears in; or None. """
+
+        interface = self if (self.descriptor_type == StandardDescriptorNumbers.INTERFACE) else self.interface
+        if interface is None or interface.length < 8:
+            return None
+
+        position = interface.offset + 5
+        return tuple(interface.data[position:position + 3])
+
+
+    @property
+    def descriptor_format(self):
+        """ The DescriptorFormat used to parse this descriptor; or None if it's not known. """
+
+        if self._format is self._UNRESOLVED:
+            self._format = find_format(self.data, self.offset, self.interface_class)
+
+        return self._format
+
+
+    def parse(self):
+        """ Parses this descriptor, caching the result. Returns None if the descriptor's format isn't known. """
+
+        if (self._parsed is None) and (self.descriptor_format is not None):
+            self._parsed, _ = self.descriptor_format.parse_from(self.data, self.offset, length=self.length, compiled=True)
+
+        return self._parsed
+
+
+    def __repr__(self):
+        return f"<DescriptorNode type=0x{self.descriptor_type:02x} offset={self.offset} length={self.length}>"
+
+
+
+def iter_descriptors(data, offset=0, *, build_tree=False):
+    """ Walks a set of concatenated descriptors, yielding a DescriptorNode for each.
+
+    If the set starts with a configuration descriptor, the walk is bounded by its wTotalLength.
+    Each node's `parent` refers to the configuration, interface or endpoint it belongs to.
+
+    Parameters:
+        data       -- Any buffer-protocol object containing the descriptors. This isn't copied.
+        offset     -- The offset of the first descriptor in the buffer.
+        build_tree -- If true, each node is also added to its parent's `children`.
+    """
+
+    data = memoryview(data)
+    if data.format != 'B' or data.ndim != 1:
+        data = data.cast('B')
+
+    end = len(data)
+
+    # If we're walking a configuration, don't walk past its wTotalLength.
+    if (end - offset >= 4) and (data[offset + 1] in (StandardDescriptorNumbers.CONFIGURATION, StandardDescriptorNumbers.OTHER_SPEED)):
+        end = min(end, offset + (data[offset + 2] | (data[offset + 3] << 8)))
+
+    configuration = None
+    interface     = None
+    endpoint      = None
+
+    while offset < end:
+        length = data[offset]
+
+        if length < 2:
+            raise ValueError(f"invalid descriptor length {length} at offset {offset}")
+        if offset + length > end:
+            raise ValueError(f"descriptor at offset {offset} runs past the end of the descriptor set")
+
+        descriptor_type = data[offset + 1]
+
+        # Figure out where this descriptor lives in our hierarchy...
+        if descriptor_type in (StandardDescriptorNumbers.CONFIGURATION, StandardDescriptorNumbers.OTHER_SPEED):
+            node = configuration = DescriptorNode(data, offset, length, descriptor_type)
+            interface = endpoint = None
+
+        elif descriptor_type == StandardDescriptorNumbers.INTERFACE:
+            node = interface = DescriptorNode(data, offset, length, descriptor_type, configuration)
+            endpoint = None
+
+        elif descriptor_type == StandardDescriptorNumbers.ENDPOINT:
+            node = endpoint = DescriptorNode(data, offset, length, descriptor_type, interface or configuration, interface)
+
+        elif descriptor_type == StandardDescriptorNumbers.INTERFACE_ASSOCIATION:
+            node = DescriptorNode(data, offset, length, descriptor_type, configuration)
+
+        # Endpoint companions and class-specific endpoint descriptors belong to the preceding endpoint...
+        elif descriptor_type in (CS_ENDPOINT, StandardDescriptorNumbers.SUPERSPEED_USB_ENDPOINT_COMPANION,
+                StandardDescriptorNumbers.SUPERSPEEDPLUS_ISOCHRONOUS_ENDPOINT_COMPANION):
+            node = DescriptorNode(data, offset, length, descriptor_type, endpoint or interface or configuration, interface)
+
+        # ... and everything else belongs to the current interface.
+        else:
+            node = DescriptorNode(data, offset, length, descriptor_type, interface or configuration, interface)
+
+        if build_tree and node.parent is not None:
+            node.parent.children.append(node)
+
+        yield node
+        offset += length
+
+
+def parse_configuration(data, offset=0):
+    """ Parses a full configuration descriptor set into a tree of DescriptorNodes.
+
+    Returns the node for the configuration descriptor; its `children` contain its interfaces
+    (and interface associations), whose `children` contain their endpoints and class-specific descriptors.
+    """
+
+    descriptors   = iter_descriptors(data, offset, build_tree=True)
+    configuration = next(descriptors, None)
+
+    if (configuration is None) or (configuration.descriptor_type not in (StandardDescriptorNumbers.CONFIGURATION, StandardDescriptorNumbers.OTHER_SPEED)):
+        raise ValueError("descriptor set does not start with a configuration descriptor")
+
+    # Walk the remainder of our descriptors, which builds our tree.
+    for _ in descriptors:
+        pass
+
+    return configuration
@@ -18,7 +18,7 @@ from enum import IntEnum
 import construct
 from   construct  import this, Default
 
-from .. import LanguageIDs
+from ..._lazy import lazy_attributes as _lazy_attributes
 from .standard import StandardDescriptorNumbers
 
 from ..descriptor import (
@@ -30,6 +30,12 @@ from ..descriptor import (
 )
 
 
+# Our language tables are large; so LanguageIDs is kept available here, but only loaded on first use.
+_LAZY_ATTRIBUTES = {'LanguageIDs': 'usb_protocol.types.languages'}
+
+__getattr__, __dir__ = _lazy_attributes(__name__, attributes=_LAZY_ATTRIBUTES)
+
+
 class AudioInterfaceClassCodes(IntEnum):
     # As defined in [Audio30], Table A-4
     AUDIO = 0x01
@@ -665,3 +671,6 @@ OutputTerminalDescriptor = DescriptorFormat(
     "wConnectorsDescrID"  / DescriptorField(description="ID of the connectors descriptor for this input terminal. Zero if no connectors descriptor is present.", default=0),
     "wTerminalDescrStr"   / DescriptorField(description="ID of a class-specific string descriptor, describing the output terminal.")
 )
+
+# Everything defined above, and our lazily-loaded names; as `import *` provided before they were lazy.
+__all__ = [name for name in list(globals()) if not name.startswith('_')] + list(_LAZY_ATTRIBUTES)
@@ -0,0 +1,309 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+A streaming decoder for USB 2.0 packets.
+
+The decoder accepts any iterable of raw packets -- each a bytes-like object starting with the packet's PID,
+and ending with its CRC, if it has one -- and yields typed packet objects. Packets keep a memoryview of
+their raw data, and data packets a memoryview of their payload; so decoding never copies packet data:
+
+.. code-block:: python
+
+    for packet in decode_packets(captured_packets):
+        if isinstance(packet, TokenPacket) and packet.valid:
+            print(packet.pid.summarize(), packet.address, packet.endpoint)
+
+Packets that can't be decoded -- those with an invalid PID, or the wrong length for their PID -- are
+yielded as plain USBPacket objects, with `valid` set to False; so the stream always contains one packet
+for each of its inputs.
+"""
+
+from .    import USBPacketID, USBTransferType, _get_pid_tables
+from .crc import CRC16_INITIAL, CRC16_RESIDUAL, crc5, crc16_update, get_crc5_token_table
+
+
+class USBPacket:
+    """ A single USB packet. Packets that can't be decoded are represented by instances of this class.
+
+    Attributes:
+        pid   -- The packet's USBPacketID; or None if the packet is empty.
+        data  -- A memoryview of the packet's raw bytes, including its PID and CRC.
+        valid -- True iff the packet's PID, length and CRC are all correct.
+    """
+
+    __slots__ = ('pid', 'data', 'valid')
+
+    def __init__(self, pid, data, valid):
+        self.pid   = pid
+        self.data  = data
+        self.valid = valid
+
+
+    def _describe(self):
+        """ Returns a description of the packet's fields, for use in our repr. """
+        return ""
+
+
+    def __repr__(self):
+        pid     = self.pid.summarize() if (self.pid is not None) else "(empty)"
+        invalid = "" if self.valid else " (invalid)"
+        return f"<{type(self).__name__} {pid}{self._describe()}{invalid}>"
+
+
+
+class TokenPacket(USBPacket):
+    """ A token packet: an IN, OUT, SETUP or PING token, or a start-of-frame packet.
+
+    Attributes:
+        address      -- The device address the token targets; or None for SOF packets.
+        endpoint     -- The endpoint number the token targets; or None for SOF packets.
+        frame_number -- The frame number of SOF packets; or None for all other tokens.
+        crc5         -- The packet's CRC5, as received.
+    """
+
+    __slots__ = ('address', 'endpoint', 'frame_number', 'crc5')
+
+    def __init__(self, pid, data, valid, address, endpoint, frame_number, crc5):
+        self.pid          = pid
+        self.data         = data
+        self.valid        = valid
+        self.address      = address
+        self.endpoint     = endpoint
+        self.frame_number = frame_number
+        self.crc5         = crc5
+
+
+    def _describe(self):
+        return f" address={self.address} endpoint={self.endpoint}"
+
+
+
+class SOFPacket(TokenPacket):
+    """ A start-of-frame packet; which carries a frame number, rather than an address and endpoint. """
+
+    __slots__ = ()
+
+    def _describe(self):
+        return f" frame={self.frame_number}"
+
+
+
+class DataPacket(USBPacket):
+    """ A DATA0, DATA1, DATA2 or MDATA packet.
+
+    Attributes:
+        payload -- A memoryview of the packet's payload; excluding its PID and CRC.
+        crc16   -- The packet's CRC16, as received.
+    """
+
+    __slots__ = ('payload', 'crc16')
+
+    def __init__(self, pid, data, valid, payload, crc16):
+        self.pid     = pid
+        self.data    = data
+        self.valid   = valid
+        self.payload = payload
+        self.crc16   = crc16
+
+
+    def _describe(self):
+        return f" length={len(self.payload)}"
+
+
+
+class HandshakePacket(USBPacket):
+    """ An ACK, NAK, STALL, NYET or ERR handshake; or a PRE packet, which shares ERR's PID. """
+
+    __slots__ = ()
+
+
+
+class SplitPacket(USBPacket):
+    """ A SPLIT token, which precedes transactions with full- and low-speed devices behind high-speed hubs.
+
+    Attributes:
+        hub_address   -- The address of the hub performing the split transaction.
+        complete      -- True for complete-split (CSPLIT) tokens; False for start-split (SSPLIT) tokens.
+        port          -- The hub port the target device is attached to.
+        s             -- The token's S bit; which indicates a low-speed device for interrupt and control
+                         transfers, and the start of a payload for isochronous OUT start-splits.
+        e             -- The token's E bit; which indicates the end of a payload for isochronous OUT start-splits.
+        endpoint_type -- The USBTransferType of the target endpoint.
+        crc5          -- The packet's CRC5, as received.
+    """
+
+    __slots__ = ('hub_address', 'complete', 'port', 's', 'e', 'endpoint_type', 'crc5')
+
+    def __init__(self, pid, data, valid, hub_address, complete, port, s, e, endpoint_type, crc5):
+        self.pid           = pid
+        self.data          = data
+        self.valid         = valid
+        self.hub_address   = hub_address
+        self.complete      = complete
+        self.port          = port
+        self.s             = s
+        self.e             = e
+        self.endpoint_type = endpoint_type
+        self.crc5          = crc5
+
+
+    def _describe(self):
+        kind = "CSPLIT" if self.complete else "SSPLIT"
+        return f" {kind} hub={self.hub_address} port={self.port} type={self.endpoint_type.name}"
+
+
+
+#
+# Decoders for each kind of packet; each takes (pid, data, check_crcs) and returns a packet object.
+#
+
+# Our CRC5 table for token fields; which is set when our decoders are first built.
+_token_crcs = None
+
+# Each USBTransferType, indexed by its value.
+_TRANSFER_TYPES = tuple(USBTransferType)
+
+
+def _decode_invalid(pid, data, check_crcs):
+    """ Decodes a packet with an invalid PID. """
+    return USBPacket(pid, data, False)
+
+
+def _decode_token(pid, data, check_crcs):
+    """ Decodes an IN, OUT, SETUP or PING token. """
+
+    if len(data) != 3:
+        return USBPacket(pid, data, False)
+
+    field = data[1] | (data[2] << 8)
+    crc   = field >> 11
+    return TokenPacket(pid, data, crc == _token_crcs[field & 0x7FF], field & 0x7F, (field >> 7) & 0xF, None, crc)
+
+
+def _decode_sof(pid, data, check_crcs):
+    """ Decodes a start-of-frame packet. """
+
+    if len(data) != 3:
+        return USBPacket(pid, data, False)
+
+    field = data[1] | (data[2] << 8)
+    crc   = field >> 11
+    return SOFPacket(pid, data, crc == _token_crcs[field & 0x7FF], None, None, field & 0x7FF, crc)
+
+
+def _decode_data(pid, data, check_crcs):
+    """ Decodes a DATA0, DATA1, DATA2 or MDATA packet. """
+
+    if len(data) < 3:
+        return USBPacket(pid, data, False)
+
+    # A correct CRC16 leaves a fixed residual, when run over both the payload and the CRC itself.
+    valid = (crc16_update(CRC16_INITIAL, data[1:]) == CRC16_RESIDUAL) if check_crcs else True
+    return DataPacket(pid, data, valid, data[1:-2], data[-2] | (data[-1] << 8))
+
+
+def _decode_handshake(pid, data, check_crcs):
+    """ Decodes a handshake packet. """
+
+    if len(data) != 1:
+        return USBPacket(pid, data, False)
+
+    return HandshakePacket(pid, data, True)
+
+
+def _decode_split(pid, data, check_crcs):
+    """ Decodes a SPLIT token. """
+
+    if len(data) != 4:
+        return USBPacket(pid, data, False)
+
+    field = data[1] | (data[2] << 8) | (data[3] << 16)
+    crc   = field >> 19
+    valid = crc == crc5(field & 0x7FFFF, bit_length=19)
+
+    return SplitPacket(pid, data, valid,
+        hub_address   = field & 0x7F,
+        complete      = bool(field & (1 << 7)),
+        port          = (field >> 8) & 0x7F,
+        s             = bool(field & (1 << 15)),
+        e             = bool(field & (1 << 16)),
+        endpoint_type = _TRANSFER_TYPES[(field >> 17) & 0b11],
+        crc5          = crc,
+    )
+
+
+# The decoder for each (valid) PID.
+_DECODERS_BY_PID = {
+    USBPacketID.OUT:   _decode_token,
+    USBPacketID.IN:    _decode_token,
+    USBPacketID.SETUP: _decode_token,
+    USBPacketID.PING:  _decode_token,
+    USBPacketID.SOF:   _decode_sof,
+    USBPacketID.DATA0: _decode_data,
+    USBPacketID.DATA1: _decode_data,
+    USBPacketID.DATA2: _decode_data,
+    USBPacketID.MDATA: _decode_data,
+    USBPacketID.ACK:   _decode_handshake,
+    USBPacketID.NAK:   _decode_handshake,
+    USBPacketID.STALL: _decode_handshake,
+    USBPacketID.NYET:  _decode_handshake,
+    USBPacketID.ERR:   _decode_handshake,
+    USBPacketID.SPLIT: _decode_split,
+}
+
+# A table of (pid, decoder) for each possible PID byte; which is only built once it's needed.
+_decoders = None
+
+def _get_decoders():
+    """ Returns our table of decoders, building it if necessary. """
+
+    global _decoders, _token_crcs
+
+    if _decoders is None:
+        _token_crcs = get_crc5_token_table()
+        _decoders   = tuple((pid, _DECODERS_BY_PID.get(pid, _decode_invalid)) for pid in _get_pid_tables()[0])
+
+    return _decoders
+
+
+def decode_packet(data, check_crcs=True):
+    """ Decodes a single raw packet.
+
+    Parameters:
+        data       -- A bytes-like object containing the packet; starting with its PID.
+        check_crcs -- If false, the CRC16s of data packets aren't checked; which makes decoding large
+                      payloads much faster. The CRC5s of tokens are always checked.
+    """
+
+    if type(data) is not memoryview:
+        data = memoryview(data)
+
+    if not data:
+        return USBPacket(None, data, False)
+
+    pid, decoder = (_decoders or _get_decoders())[data[0]]
+    return decoder(pid, data, check_crcs)
+
+
+def decode_packets(packets, check_crcs=True):
+    """ Decodes a stream of raw packets; yielding a packet object for each.
+
+    Parameters:
+        packets    -- An iterable of bytes-like objects; each containing a single packet, starting with its PID.
+        check_crcs -- If false, the CRC16s of data packets aren't checked; which makes decoding large
+                      payloads much faster. The CRC5s of tokens are always checked.
+    """
+
+    decoders = _decoders or _get_decoders()
+
+    for data in packets:
+        if type(data) is not memoryview:
+            data = memoryview(data)
+
+        if not data:
+            yield USBPacket(None, data, False)
+            continue
+
+        pid, decoder = decoders[data[0]]
+        yield decoder(pid, data, check_crcs)
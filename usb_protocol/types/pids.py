@@ -0,0 +1,93 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+Table-driven decoding of USB packet identifiers (PIDs); for single PIDs, and for large captures.
+
+Every possible PID byte is decoded once, into a 256-entry table; so decoding a PID is a single lookup.
+Whole arrays of PID bytes can be classified in one vectorized pass, if NumPy is installed:
+
+.. code-block:: python
+
+    core_pids, valid, categories = classify_pids(capture_pid_bytes)
+    data_packets = (categories == USBPIDCategory.DATA) & valid
+
+"""
+
+from .        import USBPacketID, USBPIDCategory, _get_pid_tables
+from .._lazy  import import_optional
+
+
+def get_pid_table(skip_checks=False):
+    """ Returns a 256-entry tuple mapping each possible PID byte to the USBPacketID it decodes to.
+
+    Parameters:
+        skip_checks -- If true, each PID's check nibble is ignored; as with `USBPacketID.from_int`.
+    """
+    return _get_pid_tables()[bool(skip_checks)]
+
+
+# Our table of PID categories; created the first time it's needed.
+_category_table = None
+
+def get_pid_category_table():
+    """ Returns a 256-entry tuple mapping each possible PID byte to its USBPIDCategory. """
+
+    global _category_table
+
+    if _category_table is None:
+        _category_table = tuple(pid.category() for pid in get_pid_table())
+
+    return _category_table
+
+
+# Our NumPy lookup tables; created the first time they're needed.
+_numpy_tables = None
+
+def _get_numpy_tables(numpy):
+    """ Returns (core PID, validity, category) lookup tables for use with NumPy. """
+
+    global _numpy_tables
+
+    if _numpy_tables is None:
+        table = get_pid_table()
+
+        _numpy_tables = (
+            numpy.array([pid & USBPacketID.PID_CORE_MASK for pid in table],  dtype=numpy.uint8),
+            numpy.array([not pid.is_invalid() for pid in table],              dtype=numpy.bool_),
+            numpy.array([pid.category() for pid in table],                    dtype=numpy.uint8),
+        )
+
+        for lookup_table in _numpy_tables:
+            lookup_table.flags.writeable = False
+
+    return _numpy_tables
+
+
+def classify_pids(raw_pids):
+    """ Decodes an array of raw PID bytes in a single vectorized pass. Requires NumPy.
+
+    Parameters:
+        raw_pids -- The raw PID bytes; as a bytes-like object, or as an array of integers from 0 to 255.
+
+    Returns a (core_pids, valid, categories) tuple of NumPy arrays, each the same length as `raw_pids`:
+        core_pids  -- The four-bit PID of each packet, as uint8; comparable to USBPacketID values.
+        valid      -- A boolean array; true iff the PID's check nibble is the inverse of its PID.
+        categories -- The USBPIDCategory of each packet, as uint8.
+    """
+
+    numpy = import_optional('numpy', "classify_pids()")
+
+    if isinstance(raw_pids, (bytes, bytearray, memoryview)):
+        raw_pids = numpy.frombuffer(raw_pids, dtype=numpy.uint8)
+    else:
+        raw_pids = numpy.asarray(raw_pids)
+
+        if raw_pids.dtype != numpy.uint8:
+            if raw_pids.size and ((raw_pids.min() < 0) or (raw_pids.max() > 0xFF)):
+                raise ValueError("PIDs must be between 0 and 255")
+            raw_pids = raw_pids.astype(numpy.uint8)
+
+    core_pid_table, valid_table, category_table = _get_numpy_tables(numpy)
+    return core_pid_table[raw_pids], valid_table[raw_pids], category_table[raw_pids]
+
@@ -0,0 +1,303 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for our pcap and pcapng capture reader.
+"""
+
+import gc
+import os
+import struct
+import tempfile
+import unittest
+
+from .               import USBPacketID, USBDirection, USBStandardRequests, USBTransferType
+from .capture        import CaptureReader, LinkType
+from .packets        import TokenPacket, DataPacket
+from .transfers      import TransferDecoder
+from .test_transfers import _setup, _in, _out
+
+
+def _pcap(records, link_type=LinkType.USB_2_0, byteorder='<', nanoseconds=False):
+    """ Creates a pcap file containing the given (timestamp in µs or ns, data) records. """
+
+    magic  = 0xA1B23C4D if nanoseconds else 0xA1B2C3D4
+    scale  = 1_000_000_000 if nanoseconds else 1_000_000
+    result = struct.pack(byteorder + "IHHiIII", magic, 2, 4, 0, 0, 65535, link_type)
+
+    for timestamp, data in records:
+        result += struct.pack(byteorder + "IIII", timestamp // scale, timestamp % scale, len(data), len(data)) + data
+
+    return result
+
+
+def _block(block_type, body, byteorder='<'):
+    """ Creates a pcapng block. """
+    body  += bytes(-len(body) % 4)
+    length = len(body) + 12
+    return struct.pack(byteorder + "II", block_type, length) + body + struct.pack(byteorder + "I", length)
+
+
+def _section(byteorder='<'):
+    return _block(0x0A0D0D0A, struct.pack(byteorder + "IHHq", 0x1A2B3C4D, 1, 0, -1), byteorder)
+
+
+def _interface(link_type, resolution=None, byteorder='<'):
+    options = b""
+    if resolution is not None:
+        options = struct.pack(byteorder + "HHB3x", 9, 1, resolution) + struct.pack(byteorder + "HH", 0, 0)
+    return _block(1, struct.pack(byteorder + "HHI", link_type, 0, 65535) + options, byteorder)
+
+
+def _enhanced_packet(interface, timestamp, data, byteorder='<'):
+    header = struct.pack(byteorder + "IIIII", interface, timestamp >> 32, timestamp & 0xFFFFFFFF, len(data), len(data))
+    return _block(6, header + data, byteorder)
+
+
+def _simple_packet(data, byteorder='<'):
+    return _block(3, struct.pack(byteorder + "I", len(data)) + data, byteorder)
+
+
+def _usbmon(event_type, transfer_type, endpoint_address, device, data=b"", setup=None, header_length=48):
+    """ Creates a usbmon record; with a little-endian header. """
+
+    header = struct.pack("<QBBBBHbbqiiII8s", 0xFFFF0000DEADBEEF, ord(event_type), transfer_type, endpoint_address,
+        device, 1, 0 if setup is not None else ord('-'), 0, 0, 0, 0, len(data), len(data), setup or bytes(8))
+    return header + bytes(header_length - 48) + data
+
+
+class CaptureReaderCases(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+
+
+    def _write(self, name, contents):
+        path = os.path.join(self._directory.name, name)
+        with open(path, 'wb') as file:
+            file.write(contents)
+        return path
+
+
+    def _packets(self):
+        """ Returns the raw packets of a short control transfer. """
+        return [*_setup(0, 0x80, 6, 0x0100, length=18), *_in(0, 0, USBPacketID.DATA1, bytes(18)), *_out(0, 0, USBPacketID.DATA1)]
+
+
+    def test_pcap(self):
+        packets = self._packets()
+
+        for byteorder in '<>':
+            for nanoseconds in (False, True):
+                path = self._write("capture.pcap", _pcap(enumerate(packets, start=1000), byteorder=byteorder, nanoseconds=nanoseconds))
+
+                with CaptureReader(path) as capture:
+                    records = list(capture)
+
+                    self.assertEqual([bytes(record.data) for record in records], packets)
+                    self.assertEqual(records[1].timestamp, 1001 if nanoseconds else 1_001_000)
+                    self.assertIs(records[0].link_type, LinkType.USB_2_0)
+                    self.assertIsInstance(records[0].data, memoryview)
+
+                    packet = records[0].packet()
+                    self.assertIsInstance(packet, TokenPacket)
+                    self.assertIs(packet.pid, USBPacketID.SETUP)
+
+                    del records, packet
+
+
+    def test_pcapng(self):
+        packets = self._packets()
+        urb     = _usbmon('S', 2, 0x80, 5, setup=bytes([0x80, 0x06, 0x00, 0x01, 0x00, 0x00, 0x12, 0x00]), header_length=64)
+
+        for byteorder in '<>':
+            contents = b"".join([
+                _section(byteorder),
+                _interface(LinkType.USB_LINUX_MMAPPED, byteorder=byteorder),
+                _interface(LinkType.USB_2_0, resolution=9, byteorder=byteorder),
+                _enhanced_packet(1, 5, packets[0], byteorder),
+                _enhanced_packet(0, 7, urb, byteorder),
+                *(_enhanced_packet(1, 10 + i, packet, byteorder) for i, packet in enumerate(packets[1:])),
+
+                # A second section, with its own interfaces.
+                _section('<'),
+                _interface(LinkType.USB_2_0_HIGH_SPEED),
+                _simple_packet(packets[0]),
+            ])
+            path = self._write("capture.pcapng", contents)
+
+            with CaptureReader(path) as capture:
+                records = list(capture)
+                self.assertEqual(len(records), len(packets) + 2)
+
+                self.assertEqual(records[0].timestamp, 5)
+                self.assertEqual(records[1].timestamp, 7000)
+                self.assertEqual((records[0].interface, records[1].interface, records[-1].interface), (1, 0, 0))
+                self.assertEqual(capture.link_types, {LinkType.USB_2_0, LinkType.USB_LINUX_MMAPPED, LinkType.USB_2_0_HIGH_SPEED})
+
+                # Our USB 2.0 records should feed straight into our packet decoder...
+                usb_records = [record for record in records if record.link_type in (LinkType.USB_2_0, LinkType.USB_2_0_HIGH_SPEED)]
+                self.assertEqual([bytes(record.packet().data) for record in usb_records], packets + packets[:1])
+                self.assertIsNone(usb_records[-1].timestamp)
+
+                # ... and our usbmon records into URBs.
+                urb_record = records[1].urb()
+                self.assertEqual(urb_record.event_type, 'S')
+                self.assertIs(urb_record.transfer_type, USBTransferType.CONTROL)
+                self.assertIs(urb_record.direction, USBDirection.IN)
+                self.assertEqual(urb_record.device, 5)
+                self.assertIs(urb_record.setup.request, USBStandardRequests.GET_DESCRIPTOR)
+
+                with self.assertRaises(ValueError):
+                    records[1].packet()
+                with self.assertRaises(ValueError):
+                    records[0].urb()
+
+                del records, usb_records, urb_record
+
+
+    def test_usbmon_pcap(self):
+        path = self._write("usbmon.pcap", _pcap([(0, _usbmon('C', 3, 0x81, 2, data=b"\x01\x02\x03"))], link_type=LinkType.USB_LINUX))
+
+        with CaptureReader(path) as capture:
+            urb = capture[0].urb()
+            self.assertIs(urb.transfer_type, USBTransferType.BULK)
+            self.assertEqual((urb.endpoint, urb.setup, bytes(urb.data)), (1, None, b"\x01\x02\x03"))
+            del urb
+
+
+    def test_random_access(self):
+        packets = self._packets()
+        path    = self._write("capture.pcap", _pcap(enumerate(packets)) + b"\x00" * 7)
+
+        with CaptureReader(path) as capture:
+            # Our truncated trailing record should be ignored.
+            self.assertEqual(len(capture), len(packets))
+
+            self.assertEqual(bytes(capture[3].data), packets[3])
+            self.assertEqual(bytes(capture[-1].data), packets[-1])
+            self.assertEqual([bytes(record.data) for record in capture.records(2, 4)], packets[2:4])
+            self.assertEqual(capture[4].number, 4)
+
+            with self.assertRaises(IndexError):
+                capture[len(packets)]
+
+
+    def test_persistent_index(self):
+        packets    = self._packets()
+        path       = self._write("capture.pcapng", _section() + _interface(LinkType.USB_2_0) +
+            b"".join(_enhanced_packet(0, i, packet) for i, packet in enumerate(packets)))
+        index_path = path + ".idx"
+
+        # An interrupted pass shouldn't leave an index behind...
+        with CaptureReader(path, index_path=index_path) as capture:
+            for record in capture:
+                break
+            del record
+
+        gc.collect()
+        self.assertFalse(os.path.exists(index_path))
+        self.assertFalse(os.path.exists(index_path + ".tmp"))
+
+        # ... but a complete one should.
+        with CaptureReader(path, index_path=index_path) as capture:
+            self.assertEqual(len(list(capture)), len(packets))
+
+        self.assertTrue(os.path.exists(index_path))
+
+        # Later readers should use our index, without walking the capture.
+        with CaptureReader(path, index_path=index_path) as capture:
+            capture._walk = None
+
+            self.assertEqual(len(capture), len(packets))
+            self.assertEqual(bytes(capture[5].data), packets[5])
+            self.assertIs(capture[5].link_type, LinkType.USB_2_0)
+            self.assertEqual(capture[5].timestamp, 5000)
+
+        # Changing the capture should invalidate our index.
+        with open(path, 'ab') as file:
+            file.write(_enhanced_packet(0, 99, packets[0]))
+
+        with CaptureReader(path, index_path=index_path) as capture:
+            self.assertEqual(len(capture), len(packets) + 1)
+
+
+    def test_rewritten_captures_are_reindexed(self):
+        path       = self._write("capture.pcap", _pcap([(0, b"\x69\x00"), (1, b"\xd2\x00")]))
+        index_path = path + ".idx"
+
+        with CaptureReader(path, index_path=index_path) as capture:
+            capture.build_index()
+
+        # Rewrite our capture in place, with the same size, and the same modification time; but different records.
+        status = os.stat(path)
+        with open(path, 'r+b') as file:
+            file.write(_pcap([(0, b"\x69\x00\xd2"), (1, b"\x00")]))
+        os.utime(path, ns=(status.st_atime_ns, status.st_mtime_ns))
+
+        with CaptureReader(path, index_path=index_path) as capture:
+            self.assertEqual([bytes(record.data) for record in capture.records()], [b"\x69\x00\xd2", b"\x00"])
+
+
+    def test_walks_during_indexing(self):
+        packets    = self._packets()[:5]
+        interfaces = _interface(LinkType.USB_2_0) + _interface(LinkType.USB_2_0_HIGH_SPEED) + _interface(LinkType.USB_2_0_FULL_SPEED)
+        path       = self._write("capture.pcapng", _section() + interfaces +
+            b"".join(_enhanced_packet(i % 3, i, packets[i % 5]) for i in range(15)))
+
+        for index_path in (None, path + ".idx"):
+            with self.subTest(index_path=index_path), CaptureReader(path, index_path=index_path) as capture:
+                numbers = []
+
+                for record in capture:
+                    numbers.append(record.number)
+
+                    # The index can't be used until our first pass has built it...
+                    with self.assertRaises(RuntimeError):
+                        len(capture)
+                    with self.assertRaises(RuntimeError):
+                        capture[0]
+
+                    # ... but the capture can still be walked again, independently.
+                    if record.number == 7:
+                        self.assertEqual([inner.link_type for inner in capture][:3],
+                            [LinkType.USB_2_0, LinkType.USB_2_0_HIGH_SPEED, LinkType.USB_2_0_FULL_SPEED])
+
+                self.assertEqual(numbers, list(range(15)))
+                self.assertEqual(len(capture), 15)
+                self.assertEqual(len(capture._interfaces), 3)
+                self.assertEqual(bytes(capture[14].data), packets[4])
+                self.assertIs(capture[14].link_type, LinkType.USB_2_0_FULL_SPEED)
+                del record
+
+            if index_path is not None:
+                self.assertTrue(os.path.exists(index_path))
+
+
+    def test_transfers_from_capture(self):
+        path = self._write("capture.pcap", _pcap(enumerate(self._packets())))
+
+        with CaptureReader(path) as capture:
+            transfers = list(TransferDecoder().transfers(record.packet() for record in capture))
+
+            self.assertEqual(len(transfers), 1)
+            self.assertIs(transfers[0].setup.request, USBStandardRequests.GET_DESCRIPTOR)
+            self.assertEqual(transfers[0].data, bytes(18))
+            self.assertIsInstance(transfers[0].transactions[1].data, DataPacket)
+
+            del transfers
+
+
+    def test_invalid_files(self):
+        with self.assertRaises(ValueError):
+            CaptureReader(self._write("invalid", b"not a capture"))
+
+        path = self._write("invalid.pcapng", _section() + struct.pack("<II", 6, 13) + bytes(8))
+        with CaptureReader(path) as capture:
+            with self.assertRaises(ValueError):
+                list(capture)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for our USB CRC implementations.
+"""
+
+import random
+import timeit
+import unittest
+
+from .crc import CRC16_INITIAL, CRC16_RESIDUAL, crc5, crc16, crc16_update, crc5_batch, crc16_batch
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _crc5_bitwise(value, bit_length=11):
+    """ Computes a CRC5 one bit at a time; directly from its definition. """
+
+    crc = 0b11111
+    for bit in range(bit_length):
+        crc = (crc >> 1) ^ 0b10100 if ((crc ^ (value >> bit)) & 1) else (crc >> 1)
+
+    return crc ^ 0b11111
+
+
+def _crc16_bitwise(data):
+    """ Computes a CRC16 one bit at a time; directly from its definition. """
+
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if (crc & 1) else (crc >> 1)
+
+    return crc ^ 0xFFFF
+
+
+class CRCCases(unittest.TestCase):
+
+    def test_crc5_matches_bitwise(self):
+        for value in range(2048):
+            self.assertEqual(crc5(value), _crc5_bitwise(value))
+
+        generator = random.Random(0)
+        for bit_length in (0, 3, 8, 16, 19, 24):
+            for value in (generator.getrandbits(bit_length) for _ in range(100)):
+                self.assertEqual(crc5(value, bit_length), _crc5_bitwise(value, bit_length))
+
+
+    def test_crc5_of_captured_tokens(self):
+        # SETUP to address 0, endpoint 0; and the example from the USB CRC whitepaper.
+        self.assertEqual(crc5(0), 0x10 >> 3)
+        self.assertEqual(crc5(0x15 | (0xE << 7)), 0b11101)
+
+
+    def test_crc16_matches_bitwise(self):
+        generator = random.Random(0)
+
+        for length in (0, 1, 2, 31, 32, 33, 64, 512, 1023):
+            data = bytes(generator.getrandbits(8) for _ in range(length))
+
+            with self.subTest(length=length):
+                self.assertEqual(crc16(data), _crc16_bitwise(data))
+                self.assertEqual(crc16(memoryview(data)), _crc16_bitwise(data))
+
+                # Running the CRC over the data and its CRC should leave our residual.
+                self.assertEqual(crc16_update(CRC16_INITIAL, data + crc16(data).to_bytes(2, 'little')), CRC16_RESIDUAL)
+
+
+    def test_crc16_of_captured_packet(self):
+        # The data stage of a GET_DESCRIPTOR(DEVICE) request.
+        self.assertEqual(crc16(bytes([0x80, 0x06, 0x00, 0x01, 0x00, 0x00, 0x40, 0x00])), 0x94DD)
+
+
+    def test_table_driven_crcs_are_faster_than_bitwise(self):
+        payload = bytes(range(256)) * 2
+
+        self.assertLess(
+            min(timeit.repeat(lambda: crc16(payload),          number=20, repeat=3)),
+            min(timeit.repeat(lambda: _crc16_bitwise(payload), number=20, repeat=3))
+        )
+        self.assertLess(
+            min(timeit.repeat(lambda: [crc5(value) for value in range(2048)],          number=5, repeat=3)),
+            min(timeit.repeat(lambda: [_crc5_bitwise(value) for value in range(2048)], number=5, repeat=3))
+        )
+
+
+
+@unittest.skipIf(numpy is None, "NumPy isn't installed")
+class BatchCRCCases(unittest.TestCase):
+
+    def _packed_payloads(self, count, seed=0):
+        """ Returns (data, offsets, payloads) for a set of random payloads of assorted lengths. """
+
+        generator = random.Random(seed)
+        payloads  = [generator.randbytes(generator.choice((0, 1, 2, 3, 8, 31, 64, 512, 1023))) for _ in range(count)]
+
+        offsets, position = [], 0
+        for payload in payloads:
+            offsets.append(position)
+            position += len(payload)
+
+        return b"".join(payloads), offsets, payloads
+
+
+    def test_crc5_batch(self):
+        fields = numpy.arange(2048)
+        self.assertEqual(crc5_batch(fields).tolist(), [crc5(value) for value in range(2048)])
+
+        # Bits above our 11-bit field, such as a token's received CRC, should be ignored.
+        self.assertEqual(crc5_batch([0x1000 | 0x15 | (0xE << 7)]).tolist(), [0b11101])
+
+
+    def test_crc16_batch(self):
+        data, offsets, payloads = self._packed_payloads(500)
+
+        self.assertEqual(crc16_batch(data, offsets).tolist(), [crc16(payload) for payload in payloads])
+        self.assertEqual(crc16_batch(numpy.frombuffer(data, dtype=numpy.uint8), numpy.array(offsets)).tolist(),
+            [crc16(payload) for payload in payloads])
+
+        self.assertEqual(len(crc16_batch(b"", [])), 0)
+        self.assertEqual(crc16_batch(b"", [0, 0]).tolist(), [0, 0])
+
+        with self.assertRaises(ValueError):
+            crc16_batch(b"abc", [2, 1])
+        with self.assertRaises(ValueError):
+            crc16_batch(b"abc", [4])
+
+
+    def test_batch_crcs_are_faster_than_bitwise(self):
+        data, offsets, payloads = self._packed_payloads(200)
+
+        self.assertLess(
+            min(timeit.repeat(lambda: crc16_batch(data, offsets),                    number=1, repeat=3)),
+            min(timeit.repeat(lambda: [_crc16_bitwise(payload) for payload in payloads], number=1, repeat=3))
+        )
+
+        fields = numpy.arange(2048)
+        self.assertLess(
+            min(timeit.repeat(lambda: crc5_batch(fields),                              number=5, repeat=3)),
+            min(timeit.repeat(lambda: [_crc5_bitwise(value) for value in range(2048)], number=5, repeat=3))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
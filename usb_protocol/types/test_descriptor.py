@@ -0,0 +1,481 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for the core descriptor types.
+"""
+
+import mmap
+import pickle
+import subprocess
+import sys
+import timeit
+import unittest
+
+from concurrent.futures import ProcessPoolExecutor
+
+import construct
+
+from .descriptor  import DescriptorFormat, BCDFieldAdapter, BCDVersion
+from .descriptors import standard, cdc, midi1, midi2, uac1, uac2, uac3, microsoft10
+from .descriptors.standard import \
+    DeviceDescriptor, ConfigurationDescriptor, EndpointDescriptor, StringDescriptor, InterfaceDescriptor, \
+    DeviceQualifierDescriptor, SuperSpeedEndpointCompanionDescriptor
+
+
+def _all_descriptor_formats():
+    """ Returns (name, format) for every DescriptorFormat defined in our descriptor modules. """
+
+    for module in (standard, cdc, midi1, midi2, uac1, uac2, uac3, microsoft10):
+        for name, value in vars(module).items():
+            if isinstance(value, construct.Struct) and hasattr(value, 'Partial'):
+                yield f"{module.__name__}.{name}", value
+
+
+def _parse_device_descriptor(data):
+    """ Parses a device descriptor; used to test sending results between processes. """
+    return DeviceDescriptor.parse(data)
+
+
+class CompiledParserCases(unittest.TestCase):
+
+    DEVICE_DESCRIPTOR = bytes([
+        0x12,         # Length
+        0x01,         # Type
+        0x00, 0x02,   # USB version
+        0xFF,         # class
+        0xFF,         # subclass
+        0xFF,         # protocol
+        64,           # ep0 max packet size
+        0x09, 0x12,   # VID
+        0x01, 0x00,   # PID
+        0x10, 0x01,   # device rev
+        0x01,         # manufacturer string
+        0x02,         # product string
+        0x03,         # serial number
+        0x01          # number of configurations
+    ])
+
+
+    def assertParsesIdentically(self, descriptor_format, data):
+        interpreted = descriptor_format.parse(data)
+        compiled    = descriptor_format.parse(data, compiled=True)
+
+        self.assertEqual(compiled, interpreted)
+        self.assertIs(compiled._format, descriptor_format)
+        self.assertEqual(compiled._to_detail_dictionary(), interpreted._to_detail_dictionary())
+
+
+    def test_compiled_device_descriptor(self):
+        self.assertParsesIdentically(DeviceDescriptor, self.DEVICE_DESCRIPTOR)
+
+        parsed = DeviceDescriptor.parse(self.DEVICE_DESCRIPTOR, compiled=True)
+        self.assertEqual(parsed.bDescriptorType, 1)
+        self.assertEqual(parsed.bcdUSB,        2.0)
+        self.assertEqual(parsed.bcdDevice,     1.1)
+
+
+    def test_compiled_partial_descriptor(self):
+        self.assertParsesIdentically(DeviceDescriptor.Partial, self.DEVICE_DESCRIPTOR[0:8])
+        self.assertParsesIdentically(EndpointDescriptor, bytes([7, 5, 0x81, 2, 64, 0, 1]))
+
+
+    def test_compiled_string_descriptor(self):
+        self.assertParsesIdentically(StringDescriptor, b"\x0C\x03H\0e\0l\0l\0o\0")
+
+
+    def test_compiled_parse_validates_constants(self):
+        with self.assertRaises(construct.ConstError):
+            DeviceDescriptor.parse(b"\x12\x02" + self.DEVICE_DESCRIPTOR[2:], compiled=True)
+
+
+    def test_compiled_parse_of_truncated_data(self):
+        with self.assertRaises(construct.StreamError):
+            DeviceDescriptor.parse(b"\x12\x01\x00", compiled=True)
+        with self.assertRaises(construct.StreamError):
+            DeviceDescriptor.parse_from(b"\x12\x01\x00", length=18, compiled=True)
+
+
+    def test_compiled_parser_is_cached(self):
+        self.assertIs(DeviceDescriptor.get_compiled(), DeviceDescriptor.get_compiled())
+        self.assertIsNot(DeviceDescriptor.get_compiled(), DeviceDescriptor.Partial.get_compiled())
+
+
+    def test_all_formats_compile(self):
+        for name, descriptor_format in _all_descriptor_formats():
+            with self.subTest(descriptor=name):
+                self.assertIsInstance(descriptor_format.get_compiled(), construct.Compiled)
+                self.assertIsInstance(descriptor_format.Partial.get_compiled(), construct.Compiled)
+
+
+class BufferParserCases(unittest.TestCase):
+
+    CONFIGURATION = bytes([
+        9, 2, 21, 0, 1, 1, 0, 0x80, 250,  # configuration descriptor
+        7, 5, 0x81, 2, 64, 0, 255,        # endpoint descriptor
+    ]) + b"\x0C\x03H\0e\0l\0l\0o\0"       # string descriptor, followed by trailing data
+
+
+    def test_parse_from_buffer_types(self):
+        for buffer in (self.CONFIGURATION, bytearray(self.CONFIGURATION), memoryview(self.CONFIGURATION)):
+            with self.subTest(buffer_type=type(buffer)):
+                parsed, consumed = EndpointDescriptor.parse_from(buffer, 9)
+                self.assertEqual(consumed, 7)
+                self.assertEqual(parsed.bEndpointAddress, 0x81)
+                self.assertEqual(parsed._to_detail_dictionary()['Endpoint Address'], 0x81)
+
+
+    def test_parse_from_mmap(self):
+        with mmap.mmap(-1, len(self.CONFIGURATION)) as mapped:
+            mapped.write(self.CONFIGURATION)
+
+            parsed, consumed = ConfigurationDescriptor.parse_from(mapped, compiled=True)
+            self.assertEqual(consumed, 9)
+            self.assertEqual(parsed.wTotalLength, 21)
+
+
+    def test_parse_from_stops_at_descriptor_length(self):
+        buffer = memoryview(self.CONFIGURATION + b"\xff\xff")
+
+        parsed, consumed = StringDescriptor.parse_from(buffer, 16)
+        self.assertEqual(consumed, 12)
+        self.assertEqual(parsed.bString, "Hello")
+
+
+    def test_parse_from_matches_parse(self):
+        parsed, _ = ConfigurationDescriptor.parse_from(self.CONFIGURATION)
+        self.assertEqual(parsed, ConfigurationDescriptor.parse(self.CONFIGURATION[0:9]))
+
+
+    def test_parse_from_truncated_buffer(self):
+        with self.assertRaises(construct.StreamError):
+            EndpointDescriptor.parse_from(self.CONFIGURATION[0:12], 9)
+
+
+class RecordParserCases(unittest.TestCase):
+
+    DESCRIPTORS = (
+        (DeviceDescriptor,                      CompiledParserCases.DEVICE_DESCRIPTOR),
+        (ConfigurationDescriptor,               bytes([9, 2, 32, 0, 1, 1, 0, 0x80, 250])),
+        (InterfaceDescriptor,                   bytes([9, 4, 0, 0, 2, 0xff, 0xff, 0xff, 0])),
+        (EndpointDescriptor,                    bytes([7, 5, 0x81, 2, 0, 2, 0])),
+        (EndpointDescriptor,                    bytes([9, 5, 0x01, 1, 0xc0, 0, 1, 0, 0x81])),
+        (DeviceQualifierDescriptor,             bytes([9, 6, 0, 2, 0, 0, 0, 64, 1])),
+        (SuperSpeedEndpointCompanionDescriptor, bytes([6, 48, 15, 0, 0, 0])),
+    )
+
+
+    def test_records_match_containers(self):
+        for descriptor_format, data in self.DESCRIPTORS:
+            with self.subTest(data=data):
+                record    = descriptor_format.parse_record(data)
+                container = descriptor_format.parse(data)
+
+                self.assertEqual(record, container)
+                self.assertEqual(record.to_detail_dictionary(), container._to_detail_dictionary())
+                self.assertEqual(record.to_detail_dictionary(use_pretty_names=False),
+                    container._to_detail_dictionary(use_pretty_names=False))
+
+
+    def test_record_access(self):
+        record = DeviceDescriptor.parse_record(CompiledParserCases.DEVICE_DESCRIPTOR)
+
+        self.assertEqual(record.idVendor, 0x1209)
+        self.assertEqual(record['idVendor'], 0x1209)
+        self.assertEqual(record.bcdDevice, 1.1)
+        self.assertEqual(len(record), 14)
+        self.assertEqual(list(record)[0:2], ['bLength', 'bDescriptorType'])
+        self.assertIn('bNumConfigurations', record)
+        self.assertIsNone(record.get('bString'))
+
+        with self.assertRaises(KeyError):
+            record['bString']
+
+        # Records are compact; they don't carry a dictionary around.
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertIs(type(record), DeviceDescriptor.get_record_type())
+
+
+    def test_record_optional_fields(self):
+        short = EndpointDescriptor.parse_record(bytes([7, 5, 0x81, 2, 0, 2, 0, 0xff, 0xff]))
+        self.assertIsNone(short.bRefresh)
+
+        audio = EndpointDescriptor.parse_record(bytes([9, 5, 0x01, 1, 0xc0, 0, 1, 0, 0x81]))
+        self.assertEqual(audio.bSynchAddress, 0x81)
+
+
+    def test_record_validation(self):
+        with self.assertRaises(construct.ConstError):
+            DeviceDescriptor.parse_record(b"\x12\x02" + CompiledParserCases.DEVICE_DESCRIPTOR[2:])
+
+        with self.assertRaises(construct.ValidationError):
+            EndpointDescriptor.parse_record(bytes([8, 5, 0x81, 2, 0, 2, 0, 0]))
+
+        with self.assertRaises(construct.StreamError):
+            DeviceDescriptor.parse_record(CompiledParserCases.DEVICE_DESCRIPTOR[0:10])
+
+        # Formats without a fixed layout can't be parsed into records.
+        with self.assertRaises(ValueError):
+            StringDescriptor.get_record_type()
+
+
+    def test_record_from_buffer(self):
+        data = memoryview(BufferParserCases.CONFIGURATION)
+        self.assertEqual(EndpointDescriptor.parse_record(data, 9).bEndpointAddress, 0x81)
+
+
+class DetailDictionaryCases(unittest.TestCase):
+
+    def test_detail_dictionary(self):
+        parsed = DeviceDescriptor.parse(CompiledParserCases.DEVICE_DESCRIPTOR)
+
+        details = parsed._to_detail_dictionary()
+        self.assertEqual(details['Vendor ID'], 0x1209)
+        self.assertEqual(details['bLength'], 0x12)
+        self.assertEqual(list(details)[0:3], ['bLength', 'Descriptor type', 'USB Version'])
+
+        self.assertEqual(parsed._to_detail_dictionary(use_pretty_names=False)['idVendor'], 0x1209)
+
+
+    def test_private_fields_are_excluded(self):
+        parsed = DeviceQualifierDescriptor.parse(bytes([9, 6, 0, 2, 0, 0, 0, 64, 1, 0]))
+
+        self.assertIn('_bReserved', parsed)
+        self.assertNotIn('_bReserved', parsed._to_detail_dictionary(use_pretty_names=False))
+
+
+    def test_dictionary_rows(self):
+        descriptors = [
+            EndpointDescriptor.parse(bytes([7, 5, 0x81, 2, 64, 0, 1])),
+            EndpointDescriptor.parse_record(bytes([9, 5, 0x01, 1, 0xc0, 0, 1, 0, 0x81])),
+        ]
+
+        rows = EndpointDescriptor.to_detail_rows(descriptors)
+        self.assertEqual(rows, [descriptor._to_detail_dictionary() for descriptor in descriptors])
+
+        rows = EndpointDescriptor.to_detail_rows(descriptors, use_pretty_names=False)
+        self.assertEqual(rows[1]['bSynchAddress'], 0x81)
+
+
+    def test_tuple_rows(self):
+        descriptors = [
+            EndpointDescriptor.parse(bytes([7, 5, 0x81, 2, 64, 0, 1])),
+            EndpointDescriptor.Partial.parse(bytes([7, 5, 0x02])),
+        ]
+
+        self.assertEqual(EndpointDescriptor.get_detail_columns()[2], "Endpoint Address")
+        self.assertEqual(EndpointDescriptor.get_detail_columns(use_pretty_names=False)[2], "bEndpointAddress")
+
+        full, partial = EndpointDescriptor.to_detail_rows(descriptors, as_tuples=True)
+        self.assertEqual(full,    (7, 5, 0x81, 2, 64, 1, None, None))
+        self.assertEqual(partial, (7, 5, 0x02, None, None, None, None, None))
+
+
+class BCDFieldCases(unittest.TestCase):
+
+    # Our original, string-based BCD conversions; which our faster versions need to match exactly.
+    @staticmethod
+    def _reference_decode(obj):
+        hex_string = f"{obj:04x}"
+        return float(f"{hex_string[0:2]}.{hex_string[2:]}")
+
+    @staticmethod
+    def _reference_encode(obj):
+        integer = int(obj) % 100
+        percent = int(round(obj * 100)) % 100
+
+        if float(f"{integer:02}.{percent:02}") != obj:
+            raise AssertionError("BCD fields must be in the format XX.YY")
+
+        return int(f"{integer:02}{percent:02}", 16)
+
+
+    def setUp(self):
+        self.adapter = BCDFieldAdapter(construct.Int16ul)
+        self.raw_values = [int(f"{value:04}", 16) for value in range(10000)]
+
+
+    def test_decode_matches_reference(self):
+        for raw in self.raw_values:
+            self.assertEqual(self.adapter._decode(raw, None, None), self._reference_decode(raw))
+
+
+    def test_encode_matches_reference(self):
+        for raw in self.raw_values:
+            value = self._reference_decode(raw)
+            self.assertEqual(self.adapter._encode(value, None, None), self._reference_encode(value))
+
+        for invalid in (1.234, 100.0, -1.0):
+            with self.assertRaises(AssertionError):
+                self.adapter._encode(invalid, None, None)
+
+
+    def test_invalid_bcd(self):
+        with self.assertRaises(ValueError):
+            self.adapter._decode(0x0a00, None, None)
+
+
+    def test_exact_versions(self):
+        self.assertEqual(str(BCDVersion("2.1")), "2.10")
+        self.assertEqual(BCDVersion("2.01").to_bcd(), 0x0201)
+        self.assertEqual(BCDVersion.from_bcd(0x0210), 2.1)
+        self.assertNotEqual(BCDVersion(2, 10), BCDVersion(2, 1))
+
+        data = CompiledParserCases.DEVICE_DESCRIPTOR
+        for compiled in (False, True):
+            parsed = DeviceDescriptor.parse(data, compiled=compiled, exact_bcd=True)
+            self.assertEqual(repr(parsed.bcdUSB), "BCDVersion('2.00')")
+            self.assertEqual(str(parsed.bcdDevice), "1.10")
+
+        exact = BCDFieldAdapter(construct.Int16ul, exact=True)
+        self.assertEqual(exact.parse(b"\x10\x02"), BCDVersion(2, 10))
+        self.assertEqual(exact.build(BCDVersion("2.01")), b"\x01\x02")
+
+
+    def test_bcd_microbenchmark(self):
+        number = 2000
+
+        decode    = min(timeit.repeat(lambda: self.adapter._decode(0x0210, None, None), number=number, repeat=3))
+        reference = min(timeit.repeat(lambda: self._reference_decode(0x0210),         number=number, repeat=3))
+        self.assertLess(decode, reference)
+
+        encode    = min(timeit.repeat(lambda: self.adapter._encode(2.1, None, None), number=number, repeat=3))
+        reference = min(timeit.repeat(lambda: self._reference_encode(2.1),         number=number, repeat=3))
+        self.assertLess(encode, reference)
+
+
+class PicklingCases(unittest.TestCase):
+
+    def test_format_identifiers(self):
+        self.assertEqual(DeviceDescriptor.get_identifier(), "usb_protocol.types.descriptors.standard:DeviceDescriptor")
+
+        for name, descriptor_format in _all_descriptor_formats():
+            with self.subTest(descriptor=name):
+                self.assertIs(DescriptorFormat.from_identifier(descriptor_format.get_identifier()), descriptor_format)
+                self.assertIs(DescriptorFormat.from_identifier(descriptor_format.Partial.get_identifier()), descriptor_format.Partial)
+
+        # Formats that aren't assigned to a module-level name can't be identified.
+        with self.assertRaises(ValueError):
+            DescriptorFormat(*DeviceDescriptor.subcons).get_identifier()
+
+
+    def test_pickle_container(self):
+        parsed   = DeviceDescriptor.parse(CompiledParserCases.DEVICE_DESCRIPTOR)
+        pickled  = pickle.dumps(parsed)
+        restored = pickle.loads(pickled)
+
+        # Only the format's name should be pickled; not the format itself.
+        self.assertNotIn(b"construct", pickled)
+
+        self.assertEqual(restored, parsed)
+        self.assertIs(restored._format, DeviceDescriptor)
+        self.assertEqual(restored._to_detail_dictionary(), parsed._to_detail_dictionary())
+
+
+    def test_pickle_parse_results(self):
+        data = CompiledParserCases.DEVICE_DESCRIPTOR
+
+        for parsed in (DeviceDescriptor.parse(data), DeviceDescriptor.parse(data, compiled=True),
+                DeviceDescriptor.parse_from(bytearray(b"\x00" + data), 1)[0]):
+            with self.subTest(parsed=parsed):
+                pickled  = pickle.dumps(parsed)
+                restored = pickle.loads(pickled)
+
+                # Only our fields should be pickled; not the stream they were parsed from.
+                self.assertNotIn(b"_io", pickled)
+                self.assertEqual(restored, parsed)
+                self.assertIs(restored._format, DeviceDescriptor)
+
+
+    def test_pickle_partial_and_record(self):
+        partial = DeviceDescriptor.Partial.parse(CompiledParserCases.DEVICE_DESCRIPTOR[0:8])
+        self.assertIs(pickle.loads(pickle.dumps(partial))._format, DeviceDescriptor.Partial)
+
+        record = EndpointDescriptor.parse_record(bytes([7, 5, 0x81, 2, 64, 0, 1]))
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+
+
+    def test_results_cross_process_boundaries(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            parsed = executor.submit(_parse_device_descriptor, CompiledParserCases.DEVICE_DESCRIPTOR).result()
+
+        self.assertEqual(parsed.idVendor, 0x1209)
+        self.assertEqual(parsed._to_detail_dictionary()['Vendor ID'], 0x1209)
+
+
+class LazyPartialCases(unittest.TestCase):
+
+    # Imports every descriptor module in a fresh interpreter, and reports the time spent creating
+    # DescriptorFormats, the overall import time, and how many Partials were created along the way.
+    IMPORT_BENCHMARK = """
+import importlib, time
+import usb_protocol.types.descriptor as descriptor
+
+formats  = []
+elapsed  = 0
+original = descriptor.DescriptorFormat.__init__
+
+def timed_init(self, *args, **kwargs):
+    global elapsed
+
+    start = time.perf_counter()
+    original(self, *args, **kwargs)
+
+    # Emulate eagerly creating our Partials, if requested.
+    if {eager} and (self._partial_arguments is not None):
+        self.Partial
+
+    elapsed += time.perf_counter() - start
+    formats.append(self)
+
+descriptor.DescriptorFormat.__init__ = timed_init
+
+start = time.perf_counter()
+for name in ('standard', 'cdc', 'microsoft10', 'midi1', 'midi2', 'uac1', 'uac2', 'uac3'):
+    importlib.import_module('usb_protocol.types.descriptors.' + name)
+total = time.perf_counter() - start
+
+print(elapsed, total, sum(f._partial is not None for f in formats))
+"""
+
+    def _run_import_benchmark(self, eager, runs=3):
+        """ Returns the best (format creation time, import time, partials created) across several fresh imports. """
+
+        results = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", self.IMPORT_BENCHMARK.format(eager=eager)],
+                capture_output=True, text=True, check=True).stdout.split()
+            results.append((float(output[0]), float(output[1]), int(output[2])))
+
+        return min(results)
+
+
+    def test_partial_is_created_on_demand(self):
+        descriptor_format = DescriptorFormat(*DeviceDescriptor.subcons)
+        self.assertIsNone(descriptor_format._partial)
+
+        partial = descriptor_format.Partial
+        self.assertIs(descriptor_format.Partial, partial)
+        self.assertEqual(partial.parse(bytes([0x12, 0x01, 0x00, 0x02, 0xFF, 0xFF, 0xFF, 64])).bMaxPacketSize0, 64)
+
+        # Partials don't have Partials of their own.
+        self.assertFalse(hasattr(partial, 'Partial'))
+
+
+    def test_import_benchmark(self):
+        lazy_creation,  lazy_import,  lazy_partials  = self._run_import_benchmark(eager=False)
+        eager_creation, eager_import, eager_partials = self._run_import_benchmark(eager=True)
+
+        details = f"formats created in {lazy_creation * 1e3:.2f}ms (import {lazy_import * 1e3:.1f}ms) lazily; " \
+            f"{eager_creation * 1e3:.2f}ms (import {eager_import * 1e3:.1f}ms) eagerly"
+
+        # Importing our descriptor modules shouldn't create any Partials...
+        self.assertEqual(lazy_partials, 0, details)
+        self.assertGreater(eager_partials, 0, details)
+
+        # ... which should make creating their formats substantially cheaper.
+        self.assertLess(lazy_creation, eager_creation / 2, details)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for our USB packet decoder.
+"""
+
+import unittest
+
+from .        import USBPacketID, USBTransferType
+from .crc     import crc5, crc16
+from .packets import USBPacket, TokenPacket, SOFPacket, DataPacket, HandshakePacket, SplitPacket, \
+    decode_packet, decode_packets
+
+
+def _token(pid, field):
+    """ Creates a raw token packet with the given PID and 11-bit field. """
+    return bytes([pid.byte()]) + (field | (crc5(field) << 11)).to_bytes(2, 'little')
+
+
+def _data(pid, payload):
+    """ Creates a raw data packet with the given PID and payload. """
+    return bytes([pid.byte()]) + payload + crc16(payload).to_bytes(2, 'little')
+
+
+class PacketDecoderCases(unittest.TestCase):
+
+    def test_decode_tokens(self):
+        packet = decode_packet(bytes([0x2D, 0x00, 0x10]))
+        self.assertIsInstance(packet, TokenPacket)
+        self.assertIs(packet.pid, USBPacketID.SETUP)
+        self.assertEqual((packet.address, packet.endpoint, packet.frame_number), (0, 0, None))
+        self.assertTrue(packet.valid)
+
+        packet = decode_packet(_token(USBPacketID.IN, 0x7F | (0xF << 7)))
+        self.assertEqual((packet.address, packet.endpoint), (0x7F, 0xF))
+        self.assertTrue(packet.valid)
+
+        packet = decode_packet(_token(USBPacketID.PING, 5))
+        self.assertIsInstance(packet, TokenPacket)
+        self.assertTrue(packet.valid)
+
+
+    def test_decode_sof(self):
+        packet = decode_packet(_token(USBPacketID.SOF, 1234))
+        self.assertIsInstance(packet, SOFPacket)
+        self.assertEqual((packet.frame_number, packet.address, packet.endpoint), (1234, None, None))
+        self.assertTrue(packet.valid)
+
+
+    def test_decode_data(self):
+        raw    = bytearray([0xC3, 0x80, 0x06, 0x00, 0x01, 0x00, 0x00, 0x40, 0x00, 0xDD, 0x94])
+        packet = decode_packet(raw)
+
+        self.assertIsInstance(packet, DataPacket)
+        self.assertIs(packet.pid, USBPacketID.DATA0)
+        self.assertEqual(bytes(packet.payload), raw[1:-2])
+        self.assertEqual(packet.crc16, 0x94DD)
+        self.assertTrue(packet.valid)
+
+        # Payloads should be views of the original data, rather than copies.
+        self.assertIs(packet.payload.obj, raw)
+
+        # Zero-length packets have a CRC of zero.
+        packet = decode_packet(bytes([0x4B, 0x00, 0x00]))
+        self.assertEqual(len(packet.payload), 0)
+        self.assertTrue(packet.valid)
+
+        packet = decode_packet(_data(USBPacketID.MDATA, bytes(range(256)) * 4))
+        self.assertTrue(packet.valid)
+
+
+    def test_decode_handshakes(self):
+        for pid in (USBPacketID.ACK, USBPacketID.NAK, USBPacketID.STALL, USBPacketID.NYET, USBPacketID.ERR):
+            packet = decode_packet(bytes([pid.byte()]))
+            self.assertIsInstance(packet, HandshakePacket)
+            self.assertIs(packet.pid, pid)
+            self.assertTrue(packet.valid)
+
+
+    def test_decode_split(self):
+        field  = 5 | (1 << 7) | (3 << 8) | (1 << 15) | (USBTransferType.INTERRUPT << 17)
+        raw    = bytes([USBPacketID.SPLIT.byte()]) + (field | (crc5(field, bit_length=19) << 19)).to_bytes(3, 'little')
+        packet = decode_packet(raw)
+
+        self.assertIsInstance(packet, SplitPacket)
+        self.assertEqual((packet.hub_address, packet.complete, packet.port, packet.s, packet.e),
+            (5, True, 3, True, False))
+        self.assertIs(packet.endpoint_type, USBTransferType.INTERRUPT)
+        self.assertTrue(packet.valid)
+
+
+    def test_invalid_packets(self):
+        # Corrupted CRCs...
+        self.assertFalse(decode_packet(bytes([0x2D, 0x00, 0x18])).valid)
+        self.assertFalse(decode_packet(bytes([0xC3, 0x80, 0x06, 0x00, 0x01, 0x00, 0x00, 0x40, 0x01, 0xDD, 0x94])).valid)
+
+        # ... unless we've been asked not to check data packets.
+        self.assertTrue(decode_packet(bytes([0xC3, 0x00, 0x00, 0x00]), check_crcs=False).valid)
+
+        # Packets that can't be decoded are represented by our base class.
+        for raw in (b"", bytes([0x00]), bytes([0x2D, 0x00]), bytes([0xC3, 0x00]), bytes([0xD2, 0x00])):
+            with self.subTest(raw=raw):
+                packet = decode_packet(raw)
+                self.assertFalse(packet.valid)
+
+        self.assertIs(type(decode_packet(bytes([0x2D, 0x00]))), USBPacket)
+        self.assertIs(type(decode_packet(bytes([0xD2, 0x00]))), USBPacket)
+        self.assertIsNone(decode_packet(b"").pid)
+        self.assertTrue(decode_packet(bytes([0x61, 0x00, 0x10])).pid.is_invalid())
+
+
+    def test_decode_stream(self):
+        stream  = [bytes([0x2D, 0x00, 0x10]), _data(USBPacketID.DATA0, bytes(8)), bytes([0xD2]), b""]
+        packets = list(decode_packets(stream))
+
+        self.assertEqual([type(packet) for packet in packets], [TokenPacket, DataPacket, HandshakePacket, USBPacket])
+        self.assertEqual([packet.valid for packet in packets], [True, True, True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
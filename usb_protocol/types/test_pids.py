@@ -0,0 +1,100 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for our table-driven PID decoding.
+"""
+
+import timeit
+import unittest
+
+from .     import USBPacketID, USBPIDCategory
+from .pids import get_pid_table, get_pid_category_table, classify_pids
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class PIDTableCases(unittest.TestCase):
+
+    def test_tables_match_bitwise_decoding(self):
+        for value in range(256):
+            with self.subTest(value=value):
+                self.assertEqual(get_pid_table()[value],                 USBPacketID._decode_int(value, skip_checks=False))
+                self.assertEqual(get_pid_table(skip_checks=True)[value], USBPacketID._decode_int(value, skip_checks=True))
+                self.assertIs(get_pid_category_table()[value],           USBPIDCategory(value & USBPIDCategory.MASK))
+
+
+    def test_from_int_and_from_byte(self):
+        self.assertIs(USBPacketID.from_byte(b"\x69"), USBPacketID.IN)
+        self.assertIs(USBPacketID.from_byte(b"\xd2"), USBPacketID.ACK)
+        self.assertIs(USBPacketID.from_int(0x2d, skip_checks=False), USBPacketID.SETUP)
+
+        # A bad check nibble should only be detected when we're checking for it.
+        self.assertTrue(USBPacketID.from_byte(b"\x61").is_invalid())
+        self.assertFalse(USBPacketID.from_byte(b"\x61", skip_checks=True).is_invalid())
+
+        # Values that can't be looked up should still be decoded.
+        self.assertTrue(USBPacketID.from_int(0x169, skip_checks=False).is_invalid())
+
+
+    def test_classification_matches_categories(self):
+        for value in range(32):
+            pid = USBPacketID(value)
+
+            with self.subTest(pid=pid):
+                category = USBPIDCategory(value & USBPIDCategory.MASK)
+                self.assertIs(pid.category(), category)
+                self.assertEqual(pid.is_data(),      category is USBPIDCategory.DATA)
+                self.assertEqual(pid.is_token(),     category is USBPIDCategory.TOKEN)
+                self.assertEqual(pid.is_handshake(), category is USBPIDCategory.HANDSHAKE)
+                self.assertEqual(pid.summarize(),    pid._summarize())
+
+
+    def test_decoding_is_faster_than_bitwise(self):
+        raw = list(range(256))
+
+        def table_decode():
+            for value in raw:
+                USBPacketID.from_int(value, skip_checks=False)
+
+        def bitwise_decode():
+            for value in raw:
+                USBPacketID._decode_int(value, skip_checks=False)
+
+        table_time   = min(timeit.repeat(table_decode,   number=20, repeat=3))
+        bitwise_time = min(timeit.repeat(bitwise_decode, number=20, repeat=3))
+        self.assertLess(table_time, bitwise_time)
+
+
+@unittest.skipIf(numpy is None, "NumPy isn't installed")
+class BulkClassificationCases(unittest.TestCase):
+
+    def test_classification_matches_tables(self):
+        raw = bytes(range(256)) * 4
+        core_pids, valid, categories = classify_pids(raw)
+
+        self.assertEqual(len(core_pids), len(raw))
+
+        for position, value in enumerate(raw):
+            pid = get_pid_table()[value]
+            self.assertEqual(core_pids[position],  pid & USBPacketID.PID_CORE_MASK)
+            self.assertEqual(valid[position],      not pid.is_invalid())
+            self.assertEqual(categories[position], pid.category())
+
+
+    def test_integer_arrays(self):
+        core_pids, valid, categories = classify_pids(numpy.array([0x69, 0x4b, 0x61]))
+
+        self.assertEqual(core_pids.tolist(),  [USBPacketID.IN, USBPacketID.DATA1, USBPacketID.OUT])
+        self.assertEqual(valid.tolist(),      [True, True, False])
+        self.assertEqual(categories.tolist(), [USBPIDCategory.TOKEN, USBPIDCategory.DATA, USBPIDCategory.TOKEN])
+
+        with self.assertRaises(ValueError):
+            classify_pids([0x100])
+
+
+if __name__ == "__main__":
+    unittest.main()
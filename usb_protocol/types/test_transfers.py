@@ -0,0 +1,314 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+    Unit tests for our transaction and transfer reassembly.
+"""
+
+import unittest
+
+from .          import USBPacketID, USBDirection, USBStandardRequests, USBTransferType
+from .crc       import crc5, crc16
+from .packets   import decode_packets
+from .transfers import TransferDecoder
+
+
+def _token(pid, address=0, endpoint=0):
+    """ Creates a raw token packet. """
+    field = address | (endpoint << 7)
+    return bytes([pid.byte()]) + (field | (crc5(field) << 11)).to_bytes(2, 'little')
+
+
+def _sof(frame_number):
+    """ Creates a raw start-of-frame packet. """
+    return bytes([USBPacketID.SOF.byte()]) + (frame_number | (crc5(frame_number) << 11)).to_bytes(2, 'little')
+
+
+def _data(pid, payload=b""):
+    """ Creates a raw data packet. """
+    return bytes([pid.byte()]) + payload + crc16(payload).to_bytes(2, 'little')
+
+
+def _handshake(pid):
+    """ Creates a raw handshake packet. """
+    return bytes([pid.byte()])
+
+
+def _split(hub_address, port, complete, endpoint_type=USBTransferType.INTERRUPT, s=False, e=False):
+    """ Creates a raw SPLIT token. """
+    field = hub_address | (complete << 7) | (port << 8) | (s << 15) | (e << 16) | (endpoint_type << 17)
+    return bytes([USBPacketID.SPLIT.byte()]) + (field | (crc5(field, bit_length=19) << 19)).to_bytes(3, 'little')
+
+
+def _setup(address, request_type, request, value=0, index=0, length=0, endpoint=0):
+    """ Creates the packets of an acknowledged SETUP transaction. """
+    payload = bytes([request_type, request]) + value.to_bytes(2, 'little') + index.to_bytes(2, 'little') + length.to_bytes(2, 'little')
+    return [_token(USBPacketID.SETUP, address, endpoint), _data(USBPacketID.DATA0, payload), _handshake(USBPacketID.ACK)]
+
+
+def _in(address, endpoint, pid, payload=b"", handshake=USBPacketID.ACK):
+    """ Creates the packets of an IN transaction. """
+    packets = [_token(USBPacketID.IN, address, endpoint)]
+    if pid is not None:
+        packets.append(_data(pid, payload))
+    if handshake is not None:
+        packets.append(_handshake(handshake))
+    return packets
+
+
+def _out(address, endpoint, pid, payload=b"", handshake=USBPacketID.ACK):
+    """ Creates the packets of an OUT transaction. """
+    packets = [_token(USBPacketID.OUT, address, endpoint), _data(pid, payload)]
+    if handshake is not None:
+        packets.append(_handshake(handshake))
+    return packets
+
+
+def _nak(address, endpoint=0):
+    """ Creates the packets of a NAK'd IN transaction. """
+    return [_token(USBPacketID.IN, address, endpoint), _handshake(USBPacketID.NAK)]
+
+
+# A configuration with a bulk IN endpoint (0x81, 64 bytes) and an isochronous OUT endpoint (0x02, 192 bytes).
+CONFIGURATION = bytes([
+    0x09, 0x02, 0x20, 0x00, 0x01, 0x01, 0x00, 0x80, 0x32,
+    0x09, 0x04, 0x00, 0x00, 0x02, 0xFF, 0x00, 0x00, 0x00,
+    0x07, 0x05, 0x81, 0x02, 0x40, 0x00, 0x00,
+    0x07, 0x05, 0x02, 0x01, 0xC0, 0x00, 0x01,
+])
+
+
+class TransferDecoderCases(unittest.TestCase):
+
+    def _transfers(self, *transactions, decoder=None):
+        """ Reassembles the given transactions' packets; returning the resulting transfers. """
+
+        decoder = decoder or TransferDecoder()
+        packets = [packet for transaction in transactions for packet in transaction]
+        return list(decoder.transfers(decode_packets(packets)))
+
+
+    def test_transactions(self):
+        decoder = TransferDecoder()
+        packets = [*_setup(0, 0x80, 6, 0x0100, length=18), _sof(5), *_nak(0), _handshake(USBPacketID.ACK)]
+
+        transactions = list(decoder.transactions(decode_packets(packets)))
+        self.assertEqual([transaction.status for transaction in transactions], [USBPacketID.ACK, USBPacketID.NAK])
+        self.assertEqual(len(transactions[0].data.payload), 8)
+        self.assertIsNone(transactions[1].data)
+        self.assertIs(transactions[1].direction, USBDirection.IN)
+
+        # Our stray ACK couldn't be part of any transaction.
+        self.assertEqual(decoder.discarded_packets, 1)
+
+
+    def test_control_read(self):
+        descriptor = bytes(range(18))
+
+        transfers = self._transfers(
+            _setup(0, 0x80, 6, 0x0100, length=64),
+            _nak(0),
+            _in(0, 0, USBPacketID.DATA1, descriptor),
+            _out(0, 0, USBPacketID.DATA1),
+        )
+
+        self.assertEqual(len(transfers), 1)
+        transfer = transfers[0]
+
+        self.assertIs(transfer.transfer_type, USBTransferType.CONTROL)
+        self.assertIs(transfer.setup.request, USBStandardRequests.GET_DESCRIPTOR)
+        self.assertIs(transfer.direction, USBDirection.IN)
+        self.assertEqual(transfer.setup.value, 0x0100)
+        self.assertEqual(transfer.data, descriptor)
+        self.assertIs(transfer.status, USBPacketID.ACK)
+        self.assertEqual(transfer.retries, 1)
+        self.assertEqual(len(transfer.transactions), 3)
+        self.assertTrue(transfer.complete)
+
+
+    def test_control_toggle_retries(self):
+        # If the device doesn't see the host's ACK, it'll resend its data with the same toggle.
+        transfers = self._transfers(
+            _setup(3, 0x80, 6, 0x0100, length=18),
+            _in(3, 0, USBPacketID.DATA1, bytes(8)),
+            _in(3, 0, USBPacketID.DATA1, bytes(8)),
+            _in(3, 0, USBPacketID.DATA0, bytes(8)),
+            _in(3, 0, USBPacketID.DATA1, bytes(2)),
+            _out(3, 0, USBPacketID.DATA1),
+        )
+
+        self.assertEqual(len(transfers[0].data), 18)
+        self.assertEqual(transfers[0].retries, 1)
+
+
+    def test_control_without_data_and_stalls(self):
+        transfers = self._transfers(
+            _setup(0, 0x00, 5, value=7),
+            _in(0, 0, USBPacketID.DATA1),
+            _setup(7, 0x80, 6, 0x0600, length=10),
+            _in(7, 0, None, handshake=USBPacketID.STALL),
+        )
+
+        self.assertIs(transfers[0].setup.request, USBStandardRequests.SET_ADDRESS)
+        self.assertIs(transfers[0].status, USBPacketID.ACK)
+        self.assertIs(transfers[0].direction, USBDirection.OUT)
+        self.assertEqual(transfers[0].data, b"")
+
+        self.assertIs(transfers[1].status, USBPacketID.STALL)
+        self.assertTrue(transfers[1].complete)
+
+
+    def test_interrupted_control_transfer(self):
+        transfers = self._transfers(
+            _setup(1, 0x80, 6, 0x0100, length=18),
+            _in(1, 0, USBPacketID.DATA1, bytes(8)),
+            _setup(1, 0x80, 0, length=2),
+            _in(1, 0, USBPacketID.DATA1, bytes(2)),
+            _out(1, 0, USBPacketID.DATA1),
+        )
+
+        self.assertEqual([transfer.complete for transfer in transfers], [False, True])
+        self.assertIs(transfers[1].setup.request, USBStandardRequests.GET_STATUS)
+
+
+    def test_learned_bulk_endpoints(self):
+        decoder = TransferDecoder()
+
+        # Fetch our configuration descriptor, so the decoder can learn its endpoints.
+        self._transfers(
+            _setup(4, 0x80, 6, 0x0200, length=len(CONFIGURATION)),
+            _in(4, 0, USBPacketID.DATA1, CONFIGURATION),
+            _out(4, 0, USBPacketID.DATA1),
+            decoder=decoder
+        )
+
+        transfers = self._transfers(
+            _in(4, 1, USBPacketID.DATA0, bytes(64)),
+            _nak(4, 1),
+            _in(4, 1, USBPacketID.DATA1, bytes(64)),
+            _in(4, 1, USBPacketID.DATA1, bytes(64)),
+            _in(4, 1, USBPacketID.DATA0, bytes(10)),
+            _in(4, 1, USBPacketID.DATA1, bytes(64)),
+            decoder=decoder
+        )
+
+        # Our first transfer ends with a short packet; our second is incomplete at the end of our capture.
+        self.assertEqual(len(transfers), 2)
+        self.assertIs(transfers[0].transfer_type, USBTransferType.BULK)
+        self.assertEqual(len(transfers[0].data), 138)
+        self.assertEqual(transfers[0].retries, 2)
+        self.assertTrue(transfers[0].complete)
+        self.assertFalse(transfers[1].complete)
+
+        # Our isochronous endpoint should produce one transfer per packet.
+        transfers = self._transfers(
+            _out(4, 2, USBPacketID.DATA0, bytes(192), handshake=None),
+            _out(4, 2, USBPacketID.DATA0, bytes(100), handshake=None),
+            decoder=decoder
+        )
+        self.assertEqual([transfer.transfer_type for transfer in transfers], [USBTransferType.ISOCHRONOUS] * 2)
+        self.assertEqual([len(transfer.data) for transfer in transfers], [192, 100])
+
+
+    def test_unknown_endpoints(self):
+        transfers = self._transfers(
+            _out(9, 3, USBPacketID.DATA0, bytes(512)),
+            _out(9, 3, USBPacketID.DATA1, bytes(512)),
+            _out(9, 3, USBPacketID.DATA0),
+            _in(9, 5, USBPacketID.DATA0, bytes(33), handshake=None),
+        )
+
+        self.assertEqual([transfer.transfer_type for transfer in transfers], [USBTransferType.BULK, USBTransferType.ISOCHRONOUS])
+        self.assertEqual(len(transfers[0].data), 1024)
+
+
+    def test_concurrent_endpoints(self):
+        transfers = self._transfers(
+            _setup(1, 0x80, 0, length=2),
+            _setup(2, 0x80, 8, length=1),
+            _in(2, 0, USBPacketID.DATA1, b"\x01"),
+            _in(1, 0, USBPacketID.DATA1, b"\x00\x00"),
+            _out(1, 0, USBPacketID.DATA1),
+            _out(2, 0, USBPacketID.DATA1),
+        )
+
+        self.assertEqual([(transfer.address, transfer.setup.request) for transfer in transfers],
+            [(1, USBStandardRequests.GET_STATUS), (2, USBStandardRequests.GET_CONFIGURATION)])
+        self.assertEqual([transfer.data for transfer in transfers], [b"\x00\x00", b"\x01"])
+
+
+    def test_split_transactions(self):
+        transfers = self._transfers(
+            [_split(2, 1, False), *_nak(5, 1)[:1], _handshake(USBPacketID.ACK)],
+            [_split(2, 1, True),  *_nak(5, 1)[:1], _handshake(USBPacketID.NYET)],
+            [_split(2, 1, True),  *_in(5, 1, USBPacketID.DATA0, bytes(3), handshake=None)],
+            [_sof(100)],
+        )
+
+        self.assertEqual(len(transfers), 1)
+        self.assertEqual(transfers[0].data, bytes(3))
+        self.assertIs(transfers[0].transfer_type, USBTransferType.BULK)
+        self.assertIsNotNone(transfers[0].transactions[0].split)
+
+
+    def test_isochronous_out_splits(self):
+        decoder   = TransferDecoder()
+        transfers = self._transfers(*(
+            [_split(2, 1, False, USBTransferType.ISOCHRONOUS, s=True, e=True), *_out(5, 2, USBPacketID.DATA0, bytes([n]) * 4, handshake=None)]
+            for n in range(3)
+        ), decoder=decoder)
+
+        # Isochronous OUT start-splits have no complete-splits; so each should be a transfer of its own.
+        self.assertEqual([transfer.data for transfer in transfers], [bytes([n]) * 4 for n in range(3)])
+        self.assertTrue(all(transfer.transfer_type is USBTransferType.ISOCHRONOUS for transfer in transfers))
+        self.assertTrue(all(transfer.complete for transfer in transfers))
+        self.assertEqual(list(decoder.flush()), [])
+
+
+    def test_isochronous_out_split_pieces(self):
+        iso = USBTransferType.ISOCHRONOUS
+
+        # Packets of more than 188 bytes are sent as a beginning, any middles, and an end.
+        transfers = self._transfers(
+            [_split(2, 1, False, iso, s=True),  *_out(5, 2, USBPacketID.DATA0, b"\x01" * 188, handshake=None)],
+            [_split(2, 1, False, iso),          *_out(5, 2, USBPacketID.DATA0, b"\x02" * 188, handshake=None)],
+            [_split(2, 1, False, iso, e=True),  *_out(5, 2, USBPacketID.DATA0, b"\x03" * 24,  handshake=None)],
+            [_split(2, 1, False, iso, s=True),  *_out(5, 2, USBPacketID.DATA0, b"\x04" * 188, handshake=None)],
+            [_split(2, 1, False, iso, e=True),  *_out(5, 2, USBPacketID.DATA0, b"\x05" * 112, handshake=None)],
+        )
+
+        self.assertEqual([len(transfer.data) for transfer in transfers], [400, 300])
+        self.assertEqual(transfers[1].data, b"\x04" * 188 + b"\x05" * 112)
+        self.assertTrue(all(transfer.complete for transfer in transfers))
+
+
+    def test_lost_handshake_on_unknown_pipe(self):
+
+        # A bulk IN pipe where the host's ACK of one packet was lost; so the device sends it again.
+        transfers = self._transfers(
+            _in(6, 1, USBPacketID.DATA0, bytes(64)),
+            _in(6, 1, USBPacketID.DATA1, bytes(64), handshake=None),
+            _in(6, 1, USBPacketID.DATA1, bytes(64)),
+            _in(6, 1, USBPacketID.DATA0, bytes(5)),
+        )
+
+        self.assertEqual(len(transfers), 1)
+        self.assertIs(transfers[0].transfer_type, USBTransferType.BULK)
+        self.assertEqual(len(transfers[0].data), 133)
+        self.assertEqual(transfers[0].retries, 1)
+
+
+    def test_streaming(self):
+        decoder = TransferDecoder()
+        packets = [*_setup(0, 0x80, 6, 0x0100, length=18), *_in(0, 0, USBPacketID.DATA1, bytes(18)), *_out(0, 0, USBPacketID.DATA1)]
+
+        # Feed our packets one at a time; our transfer should only appear once it's complete.
+        transfers = []
+        for packet in decode_packets(packets):
+            transfers.append(list(decoder.transfers([packet], final=False)))
+
+        self.assertEqual([len(completed) for completed in transfers], [0] * (len(packets) - 1) + [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,674 @@
+#
+# This file is part of usb-protocol.
+#
+"""
+A streaming engine that reassembles decoded USB 2.0 packets into transactions, and transactions into transfers.
+
+Packets are grouped into transactions -- a token, followed by an optional data packet and an optional
+handshake -- and each transaction is assigned to its (address, endpoint) pipe; where it's combined with
+its neighbours into control, bulk, interrupt or isochronous transfers:
+
+.. code-block:: python
+
+    decoder = TransferDecoder()
+
+    for transfer in decoder.transfers(decode_packets(captured_packets)):
+        if transfer.setup is not None:
+            print(transfer.setup.request, transfer.status, bytes(transfer.data))
+
+Each pipe's data toggle is tracked, so retransmitted packets are counted as retries rather than duplicated
+into a transfer's data. Endpoint types and maximum packet sizes are learned from any configuration descriptors
+in the traffic; or can be provided with `set_endpoint()`. Pipes whose type isn't known are treated as bulk
+pipes; unless they carry data without handshakes, in which case they're treated as isochronous.
+
+All per-pipe state lives in flat, preallocated arrays, indexed by address, direction and endpoint number;
+so the engine's memory use doesn't grow with the length of a capture, and finding a pipe never hashes.
+"""
+
+from array import array
+
+from .        import USBPacketID, USBDirection, USBRequestType, USBRequestRecipient, USBStandardRequests, \
+    USBStandardFeatures, USBTransferType
+from .packets import TokenPacket, SOFPacket, DataPacket, HandshakePacket, SplitPacket
+
+
+class SetupRequest:
+    """ The contents of a SETUP packet's data stage; which describe a control request.
+
+    Attributes:
+        request_type -- The raw bmRequestType field.
+        direction    -- The USBDirection of the request's data stage.
+        type         -- The request's USBRequestType.
+        recipient    -- The request's USBRequestRecipient.
+        request      -- The request number; as a USBStandardRequests member, for standard requests.
+        value        -- The request's wValue.
+        index        -- The request's wIndex.
+        length       -- The request's wLength.
+    """
+
+    __slots__ = ('request_type', 'direction', 'type', 'recipient', 'request', 'value', 'index', 'length')
+
+    def __init__(self, payload):
+        """
+        Parameters:
+            payload -- The eight bytes of a SETUP transaction's data packet.
+        """
+
+        if len(payload) != 8:
+            raise ValueError(f"SETUP data should be eight bytes long, not {len(payload)}")
+
+        request_type = payload[0]
+        recipient    = request_type & 0b11111
+
+        self.request_type = request_type
+        self.direction    = USBDirection.from_request_type(request_type)
+        self.type         = USBRequestType.from_request_type(request_type)
+        self.recipient    = USBRequestRecipient(recipient) if (recipient < 4) else USBRequestRecipient.RESERVED
+        self.request      = payload[1]
+        self.value        = payload[2] | (payload[3] << 8)
+        self.index        = payload[4] | (payload[5] << 8)
+        self.length       = payload[6] | (payload[7] << 8)
+
+        if self.type is USBRequestType.STANDARD:
+            try:
+                self.request = USBStandardRequests(self.request)
+            except ValueError:
+                pass
+
+
+    def __repr__(self):
+        request = getattr(self.request, 'name', self.request)
+        return f"<SetupRequest {self.direction.name} {request} value=0x{self.value:04x} index=0x{self.index:04x} length={self.length}>"
+
+
+
+class USBTransaction:
+    """ A single transaction: a token packet, and the data packet and handshake that followed it, if any.
+
+    Attributes:
+        split     -- The SplitPacket that preceded the token, for split transactions; or None.
+        token     -- The transaction's TokenPacket.
+        data      -- The transaction's DataPacket; or None, if it had no data stage.
+        handshake -- The transaction's HandshakePacket; or None, if it had no handshake.
+    """
+
+    __slots__ = ('split', 'token', 'data', 'handshake')
+
+    def __init__(self, split, token, data=None, handshake=None):
+        self.split     = split
+        self.token     = token
+        self.data      = data
+        self.handshake = handshake
+
+
+    @property
+    def address(self):
+        """ The address of the device the transaction targets. """
+        return self.token.address
+
+
+    @property
+    def endpoint(self):
+        """ The number of the endpoint the transaction targets. """
+        return self.token.endpoint
+
+
+    @property
+    def direction(self):
+        """ The USBDirection of the transaction's data stage. """
+        return USBDirection.IN if (self.token.pid is USBPacketID.IN) else USBDirection.OUT
+
+
+    @property
+    def status(self):
+        """ The USBPacketID of the transaction's handshake; or None, if it had no handshake. """
+        return self.handshake.pid if (self.handshake is not None) else None
+
+
+    def __repr__(self):
+        parts = [self.token.pid.summarize()]
+        if self.data is not None:
+            parts.append(f"{self.data.pid.summarize()}[{len(self.data.payload)}]")
+        if self.handshake is not None:
+            parts.append(self.handshake.pid.summarize())
+
+        return f"<USBTransaction address={self.address} endpoint={self.endpoint} {' '.join(parts)}>"
+
+
+
+class USBTransfer:
+    """ A single transfer, reassembled from the transactions on one pipe.
+
+    Attributes:
+        transfer_type -- The transfer's USBTransferType.
+        address       -- The address of the device the transfer targets.
+        endpoint      -- The number of the endpoint the transfer targets.
+        direction     -- The USBDirection of the transfer's data; for control transfers, that of their data stage.
+        setup         -- The SetupRequest that started a control transfer; or None for all other transfers.
+        transactions  -- The transactions that made up the transfer; excluding any that were retried.
+        payloads      -- A list of memoryviews of each of the transfer's data packets' payloads.
+        status        -- The USBPacketID of the handshake that ended the transfer; or None, if it didn't end
+                         with a handshake.
+        retries       -- The number of transactions that were NAK'd, went unanswered, or carried repeated data.
+        complete      -- True iff the transfer ended normally, or was stalled; false if it was cut short.
+    """
+
+    __slots__ = ('transfer_type', 'address', 'endpoint', 'direction', 'setup',
+        'transactions', 'payloads', 'status', 'retries', 'complete')
+
+    def __init__(self, transfer_type, address, endpoint, direction, setup=None):
+        self.transfer_type = transfer_type
+        self.address       = address
+        self.endpoint      = endpoint
+        self.direction     = direction
+        self.setup         = setup
+        self.transactions  = []
+        self.payloads      = []
+        self.status        = None
+        self.retries       = 0
+        self.complete      = False
+
+
+    @property
+    def data(self):
+        """ The transfer's data; excluding any SETUP data, for control transfers. """
+        return b"".join(self.payloads)
+
+
+    def __repr__(self):
+        setup  = f" {self.setup!r}" if (self.setup is not None) else ""
+        status = self.status.summarize() if (self.status is not None) else "no status"
+        state  = "" if self.complete else " (incomplete)"
+        length = sum(len(payload) for payload in self.payloads)
+        return f"<USBTransfer {self.transfer_type.name} {self.direction.name} address={self.address} " \
+               f"endpoint={self.endpoint}{setup} length={length} {status} retries={self.retries}{state}>"
+
+
+
+class TransferDecoder:
+    """ Reassembles a stream of decoded packets into transactions and transfers.
+
+    A decoder follows a single bus; and keeps its state between calls, so a capture can be fed to it in pieces.
+    """
+
+    # The number of pipes we keep state for: one for each address, direction and endpoint number.
+    PIPE_COUNT = 128 * 2 * 16
+
+    # Marks toggles and transfer types we haven't yet learned.
+    UNKNOWN = 0xFF
+
+    # The stages of a control transfer.
+    _DATA_STAGE   = 0
+    _STATUS_STAGE = 1
+
+    def __init__(self):
+
+        # Our per-pipe state. Control pipes are bidirectional; and so only use the state for their OUT direction.
+        self._types            = bytearray([self.UNKNOWN]) * self.PIPE_COUNT
+        self._toggles          = bytearray([self.UNKNOWN]) * self.PIPE_COUNT
+        self._stages           = bytearray(self.PIPE_COUNT)
+        self._max_packet_sizes = array('H', bytes(2 * self.PIPE_COUNT))
+        self._transfers        = [None] * self.PIPE_COUNT
+        self._start_splits     = [None] * self.PIPE_COUNT
+
+        # Endpoint zero is always a control endpoint.
+        for address in range(128):
+            self._types[address << 5] = USBTransferType.CONTROL
+
+        # The transaction we're currently assembling; and any SPLIT token that should precede the next.
+        self._transaction = None
+        self._split       = None
+
+        #: The number of packets we couldn't fit into a transaction; such as invalid or stray packets.
+        self.discarded_packets = 0
+
+
+    @staticmethod
+    def _pipe(address, endpoint, direction=USBDirection.OUT):
+        """ Returns the index of the state for the given pipe. """
+        return (address << 5) | (direction << 4) | endpoint
+
+
+    def set_endpoint(self, address, endpoint_address, transfer_type, max_packet_size=0):
+        """ Tells the decoder the type, and optionally the maximum packet size, of an endpoint.
+
+        Parameters:
+            address          -- The address of the device the endpoint belongs to.
+            endpoint_address -- The endpoint's address; its number, with bit 7 set for IN endpoints.
+            transfer_type    -- The endpoint's USBTransferType.
+            max_packet_size  -- The endpoint's maximum packet size, in bytes; or zero, if unknown.
+        """
+
+        pipe = (address << 5) | ((endpoint_address >> 3) & 0b10000) | (endpoint_address & 0xF)
+
+        # Control endpoints are bidirectional; and so are always recorded in their OUT pipe.
+        if transfer_type == USBTransferType.CONTROL:
+            pipe &= ~0b10000
+
+        self._types[pipe]            = transfer_type
+        self._max_packet_sizes[pipe] = max_packet_size
+
+
+    #
+    # Transaction assembly.
+    #
+
+    def transactions(self, packets, final=True):
+        """ Groups a stream of decoded packets into transactions; yielding each as it's completed.
+
+        Parameters:
+            packets -- An iterable of packet objects, as created by `decode_packets()`.
+            final   -- If true, the stream is assumed to end with the iterable; and any partially received
+                       transaction is yielded at its end. If false, it's kept until our next call.
+        """
+
+        for packet in packets:
+            packet_type = type(packet)
+
+            if not packet.valid:
+                self.discarded_packets += 1
+
+            # Tokens (and start-of-frame packets) start a new transaction; ending any previous one.
+            elif (packet_type is TokenPacket) or (packet_type is SOFPacket):
+                if self._transaction is not None:
+                    yield self._transaction
+
+                if packet_type is TokenPacket:
+                    self._transaction = USBTransaction(self._split, packet)
+                else:
+                    self._transaction = None
+
+                self._split = None
+
+            elif packet_type is DataPacket:
+                transaction = self._transaction
+                if (transaction is not None) and (transaction.data is None):
+                    transaction.data = packet
+                else:
+                    self.discarded_packets += 1
+
+            # Handshakes always end a transaction.
+            elif packet_type is HandshakePacket:
+                transaction = self._transaction
+                if transaction is not None:
+                    transaction.handshake = packet
+                    self._transaction = None
+                    yield transaction
+                else:
+                    self.discarded_packets += 1
+
+            elif packet_type is SplitPacket:
+                if self._transaction is not None:
+                    yield self._transaction
+                    self._transaction = None
+
+                self._split = packet
+
+            else:
+                self.discarded_packets += 1
+
+        if final and (self._transaction is not None):
+            yield self._transaction
+            self._transaction = None
+
+
+    #
+    # Transfer assembly.
+    #
+
+    def transfers(self, packets, final=True):
+        """ Reassembles a stream of decoded packets into transfers; yielding each as it's completed.
+
+        Parameters:
+            packets -- An iterable of packet objects, as created by `decode_packets()`.
+            final   -- If true, the stream is assumed to end with the iterable; and any transfers still in
+                       progress are yielded, marked incomplete, at its end. If false, they're kept until our next call.
+        """
+
+        add_transaction = self.add_transaction
+
+        for transaction in self.transactions(packets, final=final):
+            transfer = add_transaction(transaction)
+            if transfer is not None:
+                yield transfer
+
+        if final:
+            yield from self.flush()
+
+
+    def flush(self):
+        """ Yields, and forgets, each of the transfers still in progress; marked incomplete. """
+
+        transfers = self._transfers
+
+        for pipe, transfer in enumerate(transfers):
+            if transfer is not None:
+                transfers[pipe] = None
+                yield transfer
+
+        self._start_splits = [None] * self.PIPE_COUNT
+
+
+    def add_transaction(self, transaction):
+        """ Adds a single transaction to its pipe; returning the transfer it completed, if any. """
+
+        token = transaction.token
+        pid   = token.pid
+
+        # Split transactions are only complete once both their start- and complete-splits have been seen.
+        if transaction.split is not None:
+            transaction = self._combine_split(transaction)
+            if transaction is None:
+                return None
+
+        address  = token.address
+        endpoint = token.endpoint
+        pipe     = (address << 5) | endpoint
+
+        # Control endpoints share a single pipe for both directions...
+        if (pid is USBPacketID.SETUP) or (self._types[pipe] == USBTransferType.CONTROL):
+            return self._add_control_transaction(transaction, pipe)
+
+        # ... while every other endpoint has one pipe per direction.
+        if pid is USBPacketID.IN:
+            pipe |= 0b10000
+
+        # Isochronous split transactions are marked as such by their SPLIT tokens.
+        transfer_type = self._types[pipe]
+        if transfer_type == self.UNKNOWN:
+            split = transaction.split
+            if split is not None:
+                unanswered = split.endpoint_type is USBTransferType.ISOCHRONOUS
+            else:
+                unanswered = (transaction.handshake is None) and (transaction.data is not None)
+
+            transfer_type = USBTransferType.ISOCHRONOUS if unanswered else USBTransferType.BULK
+
+            # Remember our guess; so a single lost handshake can't later move the pipe onto the isochronous path.
+            self._types[pipe] = transfer_type
+
+        if transfer_type == USBTransferType.ISOCHRONOUS:
+            return self._add_isochronous_transaction(transaction, pipe)
+
+        return self._add_bulk_transaction(transaction, pipe, transfer_type)
+
+
+    def _combine_split(self, transaction):
+        """ Combines the start- and complete-split halves of a split transaction.
+
+        Returns a single transaction containing the token, data and handshake that reached the device; or None,
+        if the split transaction isn't complete yet.
+        """
+
+        token = transaction.token
+        split = transaction.split
+        pipe  = self._pipe(token.address, token.endpoint, USBDirection.IN if (token.pid is USBPacketID.IN) else USBDirection.OUT)
+
+        # Isochronous OUT start-splits carry their data to the device, and have neither a handshake nor
+        # a complete-split; so they're complete as they are.
+        if not split.complete and (split.endpoint_type is USBTransferType.ISOCHRONOUS) and (token.pid is USBPacketID.OUT):
+            return transaction
+
+        # Other start-splits are held until their complete-splits arrive; unless the hub refused them.
+        if not split.complete:
+            if (transaction.status is USBPacketID.ACK) or (transaction.handshake is None):
+                self._start_splits[pipe] = transaction
+            else:
+                self._count_retry(token, pipe)
+            return None
+
+        # A NYET means the hub hasn't yet finished the transaction with the device; so it'll be retried.
+        if transaction.status is USBPacketID.NYET:
+            return None
+
+        start = self._start_splits[pipe]
+        self._start_splits[pipe] = None
+
+        # OUT data is sent with the start-split; IN data is returned with the complete-split, which the host
+        # doesn't acknowledge. Either way, we'll present the transaction as it appeared to the device.
+        data      = transaction.data if (transaction.data is not None) else (start.data if (start is not None) else None)
+        handshake = transaction.handshake
+        if (handshake is None) and (transaction.data is not None) and (token.pid is USBPacketID.IN):
+            handshake = _SPLIT_ACK
+
+        return USBTransaction(split, token, data, handshake)
+
+
+    def _get_transfer(self, pipe, transfer_type, token, direction):
+        """ Returns the transfer in progress on the given pipe; creating one, if necessary. """
+
+        transfer = self._transfers[pipe]
+        if transfer is None:
+            transfer = self._transfers[pipe] = USBTransfer(_TRANSFER_TYPES[transfer_type], token.address, token.endpoint, direction)
+
+        return transfer
+
+
+    def _count_retry(self, token, pipe):
+        """ Counts a retried transaction against the transfer in progress on a pipe, if any. """
+
+        transfer = self._transfers[pipe & ~0b10000] if (self._types[pipe & ~0b10000] == USBTransferType.CONTROL) else self._transfers[pipe]
+        if transfer is not None:
+            transfer.retries += 1
+
+
+    def _accept_data(self, transaction, pipe):
+        """ Checks a delivered data packet's toggle; returning True if it carries new data, or False if it's a repeat. """
+
+        pid      = transaction.data.pid
+        expected = self._toggles[pipe]
+
+        # DATA2 and MDATA packets don't take part in toggling.
+        if (pid is not USBPacketID.DATA0) and (pid is not USBPacketID.DATA1):
+            return True
+
+        toggle = 1 if (pid is USBPacketID.DATA1) else 0
+        if (expected != self.UNKNOWN) and (toggle != expected):
+            return False
+
+        self._toggles[pipe] = toggle ^ 1
+        return True
+
+
+    def _add_control_transaction(self, transaction, pipe):
+        """ Adds a transaction to a control pipe. """
+
+        token     = transaction.token
+        status    = transaction.status
+        transfer  = self._transfers[pipe]
+
+        # A SETUP transaction always starts a new transfer; cutting short any that was in progress.
+        if token.pid is USBPacketID.SETUP:
+            data = transaction.data
+
+            # SETUPs that weren't acknowledged will be retried.
+            if (status is not USBPacketID.ACK) or (data is None) or (len(data.payload) != 8):
+                return None
+
+            setup = SetupRequest(data.payload)
+
+            self._transfers[pipe] = new_transfer = USBTransfer(USBTransferType.CONTROL, token.address, token.endpoint, setup.direction, setup)
+            new_transfer.transactions.append(transaction)
+
+            self._types[pipe]   = USBTransferType.CONTROL
+            self._toggles[pipe] = 1
+            self._stages[pipe]  = self._DATA_STAGE if setup.length else self._STATUS_STAGE
+
+            # If this SETUP was a retry of the one before it, it's the same transfer; otherwise, the old one was cut short.
+            if (transfer is not None) and (len(transfer.transactions) == 1) and (bytes(transfer.transactions[0].data.payload) == bytes(data.payload)):
+                new_transfer.retries = transfer.retries + 1
+                return None
+
+            return transfer
+
+        # Any other transaction continues the transfer in progress; if there is one.
+        if transfer is None:
+            return None
+
+        if (status is USBPacketID.NAK) or (status is None):
+            transfer.retries += 1
+            return None
+
+        if status is USBPacketID.STALL:
+            transfer.transactions.append(transaction)
+            return self._finish(transfer, pipe, status)
+
+        if token.pid is USBPacketID.PING:
+            return None
+
+        # Transactions in the direction of our data stage carry data; once the direction changes, we've reached our status stage.
+        if (self._stages[pipe] == self._DATA_STAGE) and (transaction.direction is transfer.direction):
+            if (transaction.data is not None) and self._accept_data(transaction, pipe):
+                transfer.transactions.append(transaction)
+                transfer.payloads.append(transaction.data.payload)
+            else:
+                transfer.retries += 1
+            return None
+
+        # An acknowledged status stage completes the transfer.
+        self._stages[pipe] = self._STATUS_STAGE
+        if status is USBPacketID.ACK:
+            transfer.transactions.append(transaction)
+            finished = self._finish(transfer, pipe, status)
+            self._snoop_request(finished)
+            return finished
+
+        return None
+
+
+    def _add_bulk_transaction(self, transaction, pipe, transfer_type):
+        """ Adds a transaction to a bulk or interrupt pipe. """
+
+        token    = transaction.token
+        status   = transaction.status
+        transfer = self._get_transfer(pipe, transfer_type, token, transaction.direction)
+
+        if token.pid is USBPacketID.PING:
+            if status is not USBPacketID.ACK:
+                transfer.retries += 1
+            return None
+
+        if status is USBPacketID.STALL:
+            transfer.transactions.append(transaction)
+            return self._finish(transfer, pipe, status)
+
+        # NAK'd and unanswered transactions will be retried.
+        data = transaction.data
+        if (data is None) or ((status is not USBPacketID.ACK) and (status is not USBPacketID.NYET)):
+            transfer.retries += 1
+            return None
+
+        if not self._accept_data(transaction, pipe):
+            transfer.retries += 1
+            return None
+
+        payload = data.payload
+        transfer.transactions.append(transaction)
+        transfer.payloads.append(payload)
+
+        # If we don't know this endpoint's maximum packet size, we'll assume it's the largest packet we've seen.
+        max_packet_size = self._max_packet_sizes[pipe]
+        if len(payload) > max_packet_size:
+            self._max_packet_sizes[pipe] = max_packet_size = len(payload)
+
+        # A short packet ends the transfer.
+        if len(payload) < max_packet_size or not payload:
+            return self._finish(transfer, pipe, status)
+
+        return None
+
+
+    def _add_isochronous_transaction(self, transaction, pipe):
+        """ Adds a transaction to an isochronous pipe. """
+
+        data = transaction.data
+        if data is None:
+            return None
+
+        transfer = self._get_transfer(pipe, USBTransferType.ISOCHRONOUS, transaction.token, transaction.direction)
+        transfer.transactions.append(transaction)
+        transfer.payloads.append(data.payload)
+
+        # Full-speed packets sent through a hub are split into pieces of up to 188 bytes; the last of which
+        # has its start-split's E bit set.
+        split = transaction.split
+        if (split is not None) and (transaction.direction is USBDirection.OUT):
+            finished = split.e
+
+        # High-bandwidth endpoints send several packets per microframe; which end with a DATA0 packet on IN
+        # endpoints, and with anything other than MDATA on OUT endpoints. Full-speed endpoints only ever send DATA0.
+        elif transaction.direction is USBDirection.IN:
+            finished = data.pid is USBPacketID.DATA0
+        else:
+            finished = data.pid is not USBPacketID.MDATA
+
+        return self._finish(transfer, pipe, transaction.status) if finished else None
+
+
+    def _finish(self, transfer, pipe, status):
+        """ Marks a transfer as complete, and removes it from its pipe. """
+
+        transfer.status   = status
+        transfer.complete = True
+        self._transfers[pipe] = None
+        return transfer
+
+
+    #
+    # Learning from standard requests.
+    #
+
+    def _snoop_request(self, transfer):
+        """ Updates our pipe state after a successful standard request, if it affects it. """
+
+        setup = transfer.setup
+        if setup.type is not USBRequestType.STANDARD:
+            return
+
+        address = transfer.address
+        request = setup.request
+        pipes   = slice(address << 5, (address + 1) << 5)
+
+        # Configuration descriptors tell us the type and maximum packet size of each endpoint.
+        if (request is USBStandardRequests.GET_DESCRIPTOR) and ((setup.value >> 8) == 2):
+            self._learn_endpoints(address, transfer.data)
+
+        # Setting a configuration or interface resets the data toggles of the affected endpoints...
+        elif request is USBStandardRequests.SET_CONFIGURATION:
+            self._toggles[pipes] = bytes(32)
+
+        # ... though we don't know which endpoints belong to an interface; so we'll accept any toggle for a while.
+        elif request is USBStandardRequests.SET_INTERFACE:
+            self._toggles[pipes] = bytes([self.UNKNOWN]) * 32
+
+        # Clearing an endpoint halt resets its toggle.
+        elif (request is USBStandardRequests.CLEAR_FEATURE) and (setup.recipient is USBRequestRecipient.ENDPOINT) and \
+                (setup.value == USBStandardFeatures.ENDPOINT_HALT):
+            endpoint_address = setup.index
+            self._toggles[(address << 5) | ((endpoint_address >> 3) & 0b10000) | (endpoint_address & 0xF)] = 0
+
+
+    def _learn_endpoints(self, address, configuration):
+        """ Learns the type and maximum packet size of each endpoint in a configuration descriptor set. """
+
+        position = 0
+        while position + 2 <= len(configuration):
+            length = configuration[position]
+            if length < 2:
+                break
+
+            # Endpoint descriptors: bEndpointAddress, bmAttributes, and wMaxPacketSize.
+            if (configuration[position + 1] == 5) and (length >= 7) and (position + 7 <= len(configuration)):
+                endpoint_address = configuration[position + 2]
+                transfer_type    = configuration[position + 3] & 0b11
+                max_packet_size  = (configuration[position + 4] | (configuration[position + 5] << 8)) & 0x7FF
+                self.set_endpoint(address, endpoint_address, transfer_type, max_packet_size)
+
+            position += length
+
+
+# Each USBTransferType, indexed by its value.
+_TRANSFER_TYPES = tuple(USBTransferType)
+
+# Stands in for the handshake a device gave a hub, when a complete-split returns IN data.
+_SPLIT_ACK = HandshakePacket(USBPacketID.ACK, memoryview(bytes([USBPacketID.ACK.byte()])), True)